@@ -0,0 +1,287 @@
+"""
+Headless JSON API over the product analytics
+
+Serves the same forecasts, fake review statistics, eco ratings and overall
+score as the product page, computed by the shared ProductAnalysis pipeline.
+Blocking work runs in a thread pool and concurrent identical requests share
+one computation. Stage timings, cache hit rates and request counts are
+exported for Prometheus at /metrics.
+
+Endpoints (all GET):
+    /health
+    /metrics (Prometheus text format)
+    /products?q=&offset=&limit=
+    /products/<product>/forecasts/sales
+    /products/<product>/forecasts/price
+    /products/<product>/fake-reviews
+    /products/<product>/eco-ratings?pin=<pin code>
+    /products/<product>/score?pin=<pin code>
+    /rankings?pin=<pin code>&limit=<products>&q=
+
+limit is capped at max_limit (ANALYTICS_API_MAX_LIMIT) and required for /rankings.
+Clients that take longer than ANALYTICS_API_READ_TIMEOUT to send the request
+line and headers get 408; headers over ANALYTICS_API_MAX_HEADER_BYTES get 431.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import config
+from modules.analytics import SnapshotStore
+from modules.analytics_service import AnalyticsService, RequestCoalescer
+from modules.carbon_emissions import CarbonEmissionsCalculator
+from modules.data_loader import DataLoader
+from modules.fake_review_detector import get_detector_registry
+from modules.forecast_store import ForecastStore
+from modules.tracing import TRACER, record_error
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               408: 'Request Timeout', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+# Metrics label values; any other path is counted as 'unknown'
+ROUTES = {'/health', '/metrics', '/products', '/rankings',
+          '/products/{product}/forecasts/sales', '/products/{product}/forecasts/price',
+          '/products/{product}/fake-reviews', '/products/{product}/eco-ratings', '/products/{product}/score'}
+
+
+def build_service(data_dir, snapshot_dir, store_dir, backend=config.FORECAST_BACKEND, n_jobs=config.FORECAST_WORKERS):
+    """
+    Wire the service to the same data, model, stores and warehouses as the app
+    
+    Returns:
+        AnalyticsService
+    """
+    app_dir = Path(__file__).parent
+    detector_registry = get_detector_registry(
+        Path(data_dir) / 'model training.csv',
+        app_dir / config.DETECTOR_MODEL_PATH
+    )
+    
+    carbon_calc = CarbonEmissionsCalculator()
+    warehouse_csv_path = Path(data_dir) / 'cross_platform_products.csv'
+    if warehouse_csv_path.exists():
+        carbon_calc.load_warehouse_data(str(warehouse_csv_path))
+    
+    return AnalyticsService(
+        DataLoader(str(data_dir)),
+        detector_registry=detector_registry,
+        carbon_calc=carbon_calc,
+        snapshot_store=SnapshotStore(snapshot_dir),
+        forecast_store=ForecastStore(store_dir),
+        backend=backend,
+        n_jobs=n_jobs,
+        timeout=config.FORECAST_TIMEOUT,
+        periods=config.FORECAST_PERIODS,
+        score_weights=config.SCORE_WEIGHTS,
+        incremental=config.FORECAST_INCREMENTAL,
+        fake_threshold=config.FAKE_REVIEW_THRESHOLD
+    )
+
+
+class AnalyticsAPI:
+    """Route HTTP requests to an AnalyticsService"""
+    
+    def __init__(self, service, coalescer=None, max_limit=100, read_timeout=10, max_header_bytes=16384):
+        """
+        Args:
+            service: AnalyticsService computing the responses
+            coalescer: RequestCoalescer sharing identical concurrent requests
+            max_limit: largest number of products one /products or /rankings request may cover
+            read_timeout: seconds allowed for reading the request line and headers
+            max_header_bytes: largest accepted request line plus headers
+        """
+        self.service = service
+        self.coalescer = coalescer or RequestCoalescer()
+        self.max_limit = max_limit
+        self.read_timeout = read_timeout
+        self.max_header_bytes = max_header_bytes
+    
+    async def handle(self, method, target):
+        """
+        Handle one request
+        
+        Returns:
+            tuple: (status code, JSON-ready body)
+        """
+        if method != 'GET':
+            return 405, {'error': f'{method} not allowed'}
+        
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        
+        if parts == ['health']:
+            return 200, {'status': 'ok', 'coalescing': self.coalescer.stats()}
+        
+        if parts == ['metrics']:
+            coalescing = self.coalescer.stats()
+            return 200, TRACER.prometheus_text() + ''.join(
+                f'# TYPE analytics_api_coalescer_{name} gauge\nanalytics_api_coalescer_{name} {value}\n'
+                for name, value in coalescing.items()
+            )
+        
+        if parts == ['products']:
+            try:
+                offset = int(params.get('offset', 0))
+                limit = int(params.get('limit', min(50, self.max_limit)))
+            except ValueError:
+                return 400, {'error': 'offset and limit must be integers'}
+            if offset < 0 or not 1 <= limit <= self.max_limit:
+                return 400, {'error': f'offset must be >= 0 and limit between 1 and {self.max_limit}'}
+            query = params.get('q', '')
+            return 200, await self.coalescer.run(('products', query, offset, limit), self.service.list_products,
+                                                 query, offset, limit)
+        
+        if parts == ['rankings']:
+            user_pin = params.get('pin', '').strip()
+            if not (user_pin.isdigit() and len(user_pin) == 6):
+                return 400, {'error': 'pin must be a 6-digit PIN code'}
+            try:
+                limit = int(params['limit'])
+            except (KeyError, ValueError):
+                limit = None
+            if limit is None or not 1 <= limit <= self.max_limit:
+                return 400, {'error': f'limit must be an integer between 1 and {self.max_limit}'}
+            query = params.get('q', '')
+            return 200, await self.coalescer.run(('rankings', user_pin, query, limit), self.service.rankings,
+                                                 user_pin, query, limit)
+        
+        if len(parts) < 3 or parts[0] != 'products':
+            return 404, {'error': 'Not found'}
+        
+        product, endpoint = parts[1], tuple(parts[2:])
+        if endpoint in (('forecasts', 'sales'), ('forecasts', 'price')):
+            key, func, args = ('forecasts', product, endpoint[1]), self.service.forecasts, (product, endpoint[1])
+        elif endpoint == ('fake-reviews',):
+            key, func, args = ('fake-reviews', product), self.service.fake_reviews, (product,)
+        elif endpoint in (('eco-ratings',), ('score',)):
+            user_pin = params.get('pin', '').strip()
+            if not (user_pin.isdigit() and len(user_pin) == 6):
+                return 400, {'error': 'pin must be a 6-digit PIN code'}
+            func = self.service.eco_ratings if endpoint == ('eco-ratings',) else self.service.overall_score
+            key, args = (endpoint[0], product, user_pin), (product, user_pin)
+        else:
+            return 404, {'error': 'Not found'}
+        
+        result = await self.coalescer.run(key, func, *args)
+        if result is None:
+            return 404, {'error': f'Unknown product: {product}'}
+        return 200, result
+    
+    @staticmethod
+    def route(target):
+        """Endpoint pattern of a request target, used as a low-cardinality metrics label"""
+        parts = [part for part in urlsplit(target).path.strip('/').split('/') if part]
+        if len(parts) >= 2 and parts[0] == 'products':
+            parts[1] = '{product}'
+        route = '/' + '/'.join(parts)
+        return route if route in ROUTES else 'unknown'
+    
+    async def _read_head(self, reader):
+        """
+        Read the request line and skip the headers, which no endpoint needs
+        
+        Returns:
+            list: request line fields, or None when the head exceeds max_header_bytes
+        """
+        line = await reader.readline()
+        request_line, size = line.decode('latin-1').split(), len(line)
+        while size <= self.max_header_bytes:
+            line = await reader.readline()
+            size += len(line)
+            if line in (b'\r\n', b'\n', b''):
+                return request_line
+        return None
+    
+    async def handle_connection(self, reader, writer):
+        """Serve one HTTP/1.1 request per connection"""
+        start = time.perf_counter()
+        route = None
+        try:
+            status = request_line = None
+            try:
+                request_line = await asyncio.wait_for(self._read_head(reader), self.read_timeout)
+            except asyncio.TimeoutError:
+                status, body = 408, {'error': f'Request not received within {self.read_timeout}s'}
+            except ValueError:
+                # A single line longer than the stream's buffer limit
+                pass
+            
+            if status is not None:
+                pass
+            elif request_line is None:
+                status, body = 431, {'error': f'Request headers exceed {self.max_header_bytes} bytes'}
+            elif len(request_line) != 3:
+                status, body = 400, {'error': 'Malformed request'}
+            else:
+                route = self.route(request_line[1])
+                try:
+                    status, body = await self.handle(request_line[0], request_line[1])
+                except ValueError as e:
+                    status, body = 400, {'error': str(e)}
+                except Exception as e:
+                    record_error(f"Error handling {request_line[1]}: {str(e)}", exc_info=True)
+                    status, body = 500, {'error': 'Internal error'}
+            
+            if isinstance(body, str):
+                payload, content_type = body.encode('utf-8'), 'text/plain; version=0.0.4'
+            else:
+                payload, content_type = json.dumps(body).encode('utf-8'), 'application/json'
+            writer.write(
+                f'HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Length: {len(payload)}\r\n'
+                f'Connection: close\r\n\r\n'.encode('latin-1') + payload
+            )
+            await writer.drain()
+            
+            # Requests interleave on the event loop thread, so they are counted rather than traced as spans
+            if route is not None:
+                TRACER.count('analytics_api_requests_total', route=route, status=status)
+                TRACER.count('analytics_api_request_seconds_total', time.perf_counter() - start, route=route)
+        finally:
+            writer.close()
+
+
+async def serve(api, host, port):
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    print(f"📡 Analytics API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    app_dir = Path(__file__).parent
+    
+    parser = argparse.ArgumentParser(description="Serve product analytics as a JSON API")
+    parser.add_argument('--data-dir', type=str, default=str(app_dir / 'data'), help='Path to data directory')
+    parser.add_argument('--snapshot-dir', type=str, default=str(app_dir / config.ANALYTICS_SNAPSHOT_DIR),
+                        help='Path to snapshot directory')
+    parser.add_argument('--store-dir', type=str, default=str(app_dir / config.FORECAST_STORE_DIR),
+                        help='Path to forecast store directory')
+    parser.add_argument('--workers', type=int, default=config.FORECAST_WORKERS,
+                        help='Worker processes for parallel fitting (1 = in-process)')
+    parser.add_argument('--backend', type=str, default=config.FORECAST_BACKEND, help="Forecasting engine ('prophet' or 'numpy')")
+    parser.add_argument('--host', type=str, default=config.ANALYTICS_API_HOST, help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=config.ANALYTICS_API_PORT, help='Port to listen on')
+    parser.add_argument('--threads', type=int, default=config.ANALYTICS_API_THREADS,
+                        help='Threads computing analyses concurrently')
+    parser.add_argument('--trace-log', type=str, default=config.TRACE_LOG_PATH,
+                        help='Append every finished trace to this file as JSON lines')
+    
+    args = parser.parse_args()
+    
+    TRACER.configure(log_path=args.trace_log, history=config.TRACE_HISTORY)
+    service = build_service(args.data_dir, args.snapshot_dir, args.store_dir, args.backend, args.workers)
+    api = AnalyticsAPI(service, RequestCoalescer(ThreadPoolExecutor(max_workers=args.threads)),
+                       max_limit=config.ANALYTICS_API_MAX_LIMIT, read_timeout=config.ANALYTICS_API_READ_TIMEOUT,
+                       max_header_bytes=config.ANALYTICS_API_MAX_HEADER_BYTES)
+    asyncio.run(serve(api, args.host, args.port))
@@ -0,0 +1,90 @@
+"""
+Background scheduler that publishes per-product analytics snapshots
+
+Recomputes forecasts, fake review statistics and forecast-based score
+components for every product whenever its data or the fake review model
+changes, and rebuilds everything on a fixed interval. The Streamlit app
+reads the published snapshots, so product pages render without fitting
+or scoring anything inline.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import config
+from modules.analytics import AnalyticsScheduler, SnapshotStore
+from modules.data_loader import DataLoader
+from modules.fake_review_detector import get_detector_registry
+from modules.forecast_store import ForecastStore
+from modules.tracing import TRACER
+
+
+def build_scheduler(data_dir, snapshot_dir, store_dir, backend=config.FORECAST_BACKEND,
+                    n_jobs=config.FORECAST_WORKERS, interval=config.ANALYTICS_INTERVAL,
+                    poll_interval=config.ANALYTICS_POLL_INTERVAL):
+    """
+    Wire the scheduler to the same data, model and forecast store as the app
+
+    Returns:
+        AnalyticsScheduler
+    """
+    app_dir = Path(__file__).parent
+    detector_registry = get_detector_registry(
+        Path(data_dir) / 'model training.csv',
+        app_dir / config.DETECTOR_MODEL_PATH
+    )
+
+    return AnalyticsScheduler(
+        DataLoader(str(data_dir)),
+        SnapshotStore(snapshot_dir),
+        detector_registry=detector_registry,
+        forecast_store=ForecastStore(store_dir),
+        backend=backend,
+        n_jobs=n_jobs,
+        timeout=config.FORECAST_TIMEOUT,
+        periods=config.FORECAST_PERIODS,
+        interval=interval,
+        poll_interval=poll_interval,
+        incremental=config.FORECAST_INCREMENTAL,
+        fake_threshold=config.FAKE_REVIEW_THRESHOLD
+    )
+
+
+if __name__ == "__main__":
+    app_dir = Path(__file__).parent
+
+    parser = argparse.ArgumentParser(description="Publish per-product analytics snapshots for the app")
+    parser.add_argument('--data-dir', type=str, default=str(app_dir / 'data'), help='Path to data directory')
+    parser.add_argument('--snapshot-dir', type=str, default=str(app_dir / config.ANALYTICS_SNAPSHOT_DIR),
+                        help='Path to snapshot directory')
+    parser.add_argument('--store-dir', type=str, default=str(app_dir / config.FORECAST_STORE_DIR),
+                        help='Path to forecast store directory')
+    parser.add_argument('--workers', type=int, default=config.FORECAST_WORKERS,
+                        help='Worker processes for parallel fitting (1 = in-process)')
+    parser.add_argument('--backend', type=str, default=config.FORECAST_BACKEND, help="Forecasting engine ('prophet' or 'numpy')")
+    parser.add_argument('--interval', type=int, default=config.ANALYTICS_INTERVAL,
+                        help='Seconds between full rebuilds of every snapshot')
+    parser.add_argument('--poll-interval', type=int, default=config.ANALYTICS_POLL_INTERVAL,
+                        help='Seconds between checks for changed data or models')
+    parser.add_argument('--once', action='store_true', help='Rebuild every snapshot once and exit')
+    parser.add_argument('--trace-log', type=str, default=config.TRACE_LOG_PATH,
+                        help='Append the trace of every snapshot build to this file as JSON lines')
+
+    args = parser.parse_args()
+
+    TRACER.configure(log_path=args.trace_log, history=config.TRACE_HISTORY)
+
+    scheduler = build_scheduler(args.data_dir, args.snapshot_dir, args.store_dir, args.backend, args.workers,
+                                args.interval, args.poll_interval)
+
+    if args.once:
+        print("📊 Publishing analytics snapshots...\n")
+        published = scheduler.run_once(force=True)
+        print(f"\n✅ Published {len(published)} snapshot(s) to {args.snapshot_dir}")
+    else:
+        print(f"📊 Analytics scheduler running (full rebuild every {args.interval}s, "
+              f"change check every {args.poll_interval}s)")
+        scheduler.run_forever()
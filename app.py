@@ -8,11 +8,14 @@ from pathlib import Path
 # Add modules to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+import config
 from modules.data_loader import DataLoader
-from modules.fake_review_detector import FakeReviewDetector
-from modules.forecasting import PriceForecastor, SalesForecastor
+from modules.fake_review_detector import get_detector_registry
+from modules.forecast_store import ForecastStore
 from modules.carbon_emissions import CarbonEmissionsCalculator
-from modules.product_score import ProductScoreCalculator
+from modules.analytics import get_snapshot_store
+from modules.analytics_service import AnalyticsService
+from modules.tracing import TRACER, record_error, span
 
 # Page configuration
 st.set_page_config(
@@ -22,6 +25,57 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+@st.cache_resource
+def get_tracer():
+    """Process-wide tracer, writing the trace of every render to TRACE_LOG_PATH when set"""
+    TRACER.configure(log_path=config.TRACE_LOG_PATH, history=config.TRACE_HISTORY)
+    return TRACER
+
+
+@st.cache_resource
+def get_forecast_store():
+    """Process-wide on-disk forecast store, warmed by precompute_forecasts.py"""
+    return ForecastStore(Path(__file__).parent / config.FORECAST_STORE_DIR)
+
+
+@st.cache_resource
+def get_analytics_snapshots():
+    """Process-wide reader of the snapshots published by analytics_scheduler.py"""
+    return get_snapshot_store(Path(__file__).parent / config.ANALYTICS_SNAPSHOT_DIR)
+
+
+@st.cache_resource
+def get_carbon_calculator(warehouse_csv_path):
+    """Process-wide emissions calculator with its warehouse network loaded once"""
+    carbon_calc = CarbonEmissionsCalculator()
+    if Path(warehouse_csv_path).exists():
+        carbon_calc.load_warehouse_data(str(warehouse_csv_path))
+    return carbon_calc
+
+
+@st.cache_resource
+def get_analytics_service(data_dir):
+    """Process-wide analytics service, keeping each product's computed analyses across reruns and sessions"""
+    return AnalyticsService(
+        DataLoader(str(data_dir)),
+        detector_registry=get_detector_registry(
+            Path(data_dir) / 'model training.csv',
+            Path(__file__).parent / config.DETECTOR_MODEL_PATH
+        ),
+        carbon_calc=get_carbon_calculator(str(Path(data_dir) / 'cross_platform_products.csv')),
+        snapshot_store=get_analytics_snapshots(),
+        forecast_store=get_forecast_store(),
+        backend=config.FORECAST_BACKEND,
+        n_jobs=config.FORECAST_WORKERS,
+        timeout=config.FORECAST_TIMEOUT,
+        periods=config.FORECAST_PERIODS,
+        score_weights=config.SCORE_WEIGHTS,
+        incremental=config.FORECAST_INCREMENTAL,
+        fake_threshold=config.FAKE_REVIEW_THRESHOLD
+    )
+
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -151,10 +205,6 @@ if 'user_pincode' not in st.session_state:
     st.session_state.user_pincode = None
 if 'selected_product' not in st.session_state:
     st.session_state.selected_product = None
-if 'detector_trained' not in st.session_state:
-    st.session_state.detector_trained = False
-if 'fake_detector' not in st.session_state:
-    st.session_state.fake_detector = FakeReviewDetector()
 if 'data_loader' not in st.session_state:
     # Determine data directory - look for data subdirectory first, then parent
     script_dir = Path(__file__).parent
@@ -243,21 +293,30 @@ def show_home_page():
     st.markdown("### 🛒 Select a Product to Analyze")
     
     data_loader = st.session_state.data_loader
-    products = data_loader.get_available_products()
     
-    # Create product cards
-    cols = st.columns(min(2, len(products)))
+    # Search the catalog instead of rendering one button per product
+    query = st.text_input("🔍 Search products", placeholder="e.g., iphone, running shoes", key="product_search")
     
-    for idx, product in enumerate(products):
-        col = cols[idx % len(cols)]
+    page_size = 50
+    _, total = data_loader.search_products(query, 0, 0)
+    
+    if total == 0:
+        st.info("No products match your search")
+    else:
+        n_pages = (total + page_size - 1) // page_size
+        page_number = 1
+        if n_pages > 1:
+            page_number = st.number_input(f"Page (1-{n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
         
-        with col:
-            if st.button(
-                f"📦 {product}",
-                key=f"product_{product}",
-                use_container_width=True,
-                help="Click to analyze this product"
-            ):
+        products, _ = data_loader.search_products(query, (page_number - 1) * page_size, page_size)
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            product = st.selectbox(f"{total:,} products found", products, key="product_choice")
+        with col2:
+            st.write("")
+            st.write("")
+            if st.button("📦 Analyze", type="primary", use_container_width=True, help="Analyze this product"):
                 st.session_state.selected_product = product
                 st.rerun()
     
@@ -318,6 +377,16 @@ def show_home_page():
         """)
 
 
+# Product page sections and the ProductAnalysis result each one needs
+ANALYSIS_SECTIONS = {
+    "📈 Sales Forecast": 'sales_forecasts',
+    "💰 Price Analysis": 'price_forecasts',
+    "⚠️ Fake Reviews": 'fake_reviews',
+    "🌱 Eco-Friendliness": 'eco_ratings',
+    "⭐ Overall Score": 'overall_score'
+}
+
+
 def show_product_details():
     """Display detailed product analysis"""
     
@@ -338,415 +407,334 @@ def show_product_details():
         return
     
     product = st.session_state.selected_product
+    user_pin = st.session_state.user_pincode
     st.markdown(f"### 📦 {product} - Detailed Analysis")
     
-    # Load data
     data_loader = st.session_state.data_loader
-    product_reviews = data_loader.load_product_reviews(product)
-    cross_platform_data = data_loader.load_cross_platform_data()
     
-    if product_reviews is None:
+    # Shared fake review detector: trained or loaded once per process
+    detector_registry = get_detector_registry(
+        Path(data_loader.data_dir) / 'model training.csv',
+        Path(__file__).parent / config.DETECTOR_MODEL_PATH
+    )
+    if not detector_registry.is_ready():
+        with st.spinner("🤖 Training fake review detector..."):
+            detector_registry.get()
+    
+    # Same pipeline as the analytics API; results persist across reruns and sessions
+    # until the product's data or the model changes
+    analysis = get_analytics_service(data_loader.data_dir).get_analysis(product)
+    
+    if analysis is None:
         st.error(f"Could not load data for {product}")
         return
     
-    # Initialize components
-    detector = st.session_state.fake_detector  # Use cached detector
-    price_forecaster = PriceForecastor(product)
-    sales_forecaster = SalesForecastor(product)
-    carbon_calc = CarbonEmissionsCalculator()
-    score_calc = ProductScoreCalculator()
-    
-    # Load warehouse data if available
-    if cross_platform_data is not None:
-        cross_platform_path = Path(data_loader.data_dir) / 'cross_platform_products.csv'
-        if cross_platform_path.exists():
-            carbon_calc.load_warehouse_data(str(cross_platform_path))
-    
-    # Train fake review detector if not already done
-    if not st.session_state.detector_trained:
-        try:
-            training_data_path = Path(data_loader.data_dir) / 'model training.csv'
-            if training_data_path.exists():
-                with st.spinner("🤖 Training fake review detector..."):
-                    detector.train(str(training_data_path))
-                st.session_state.detector_trained = True
-            else:
-                # Mark as trained even without data to prevent repeated attempts
-                st.session_state.detector_trained = True
-        except Exception as e:
-            st.warning(f"Could not train detector: {str(e)}")
-            st.session_state.detector_trained = True  # Mark as attempted to avoid loops
-    
-    # Create tabs for different analyses
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📈 Sales Forecast",
-        "💰 Price Analysis",
-        "⚠️ Fake Reviews",
-        "🌱 Eco-Friendliness",
-        "⭐ Overall Score"
-    ])
-    
-    # Tab 1: Sales Forecasting
-    with tab1:
-        st.markdown("#### Sales Forecasting (Next 90 Days)")
-        
-        platform_col = data_loader.extract_platform_column(product_reviews) if hasattr(data_loader, 'extract_platform_column') else None
-        
-        # Try to identify columns
-        date_col = data_loader.extract_date_column(product_reviews)
-        sales_col = data_loader.extract_sales_column(product_reviews)
-        
-        if date_col and sales_col:
-            prepared_data = sales_forecaster.prepare_data(
-                product_reviews,
-                platform_col or 'Platform',
-                date_col,
-                sales_col
-            )
+    # Only the selected section is computed; the others stay untouched until opened
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        section = st.radio(
+            "Analysis",
+            list(ANALYSIS_SECTIONS.keys()),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="analysis_section",
+            format_func=lambda name: f"{name} ✓" if analysis.is_computed(ANALYSIS_SECTIONS[name], user_pin) else name
+        )
+    with col2:
+        compute_all = st.button("⚡ Compute all")
+    
+    if compute_all:
+        with st.spinner("Computing every analysis..."):
+            analysis.overall_score(user_pin)
+        st.rerun()
+    
+    st.divider()
+    with span(f'section.{ANALYSIS_SECTIONS[section]}'):
+        SECTION_RENDERERS[section](analysis, user_pin)
+
+
+def render_sales_section(analysis, user_pin):
+    """Sales forecast section"""
+    st.markdown("#### Sales Forecasting (Next 90 Days)")
+    
+    forecasts = analysis.sales_forecasts()
+    
+    if forecasts is not None:
+        # Display forecasts
+        if forecasts:
+            st.success("✅ Sales forecast generated successfully!")
             
-            if prepared_data:
-                forecasts = sales_forecaster.forecast(prepared_data, periods=90)
+            summary = analysis.forecast_summary('sales')
+            for platform, forecast in forecasts.items():
+                st.subheader(f"{platform} - Sales Forecast")
                 
-                # Display forecasts
-                if forecasts:
-                    st.success("✅ Sales forecast generated successfully!")
-                    
-                    for platform, forecast in forecasts.items():
-                        st.subheader(f"{platform} - Sales Forecast")
-                        
-                        # Display chart
-                        chart_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-                        chart_data.columns = ['Date', 'Predicted Sales', 'Lower Bound', 'Upper Bound']
-                        
-                        st.line_chart(
-                            data=chart_data.set_index('Date')[['Predicted Sales']],
-                            use_container_width=True
-                        )
-                        
-                        # Statistics
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Average Sales", f"{forecast['yhat'].mean():.2f}")
-                        with col2:
-                            st.metric("Max Sales", f"{forecast['yhat'].max():.2f}")
-                        with col3:
-                            trend = "📈 Growing" if forecast['yhat'].iloc[-1] > forecast['yhat'].iloc[0] else "📉 Declining"
-                            st.metric("Trend", trend)
-                else:
-                    st.info("No sales data available for forecasting")
-            else:
-                st.warning("Could not prepare sales data for forecasting")
-        else:
-            st.info("Sales forecasting data not available in the dataset")
-    
-    # Tab 2: Price Analysis
-    with tab2:
-        st.markdown("#### Price Analysis (Next 90 Days)")
-        
-        price_col = data_loader.extract_price_column(product_reviews)
-        date_col = data_loader.extract_date_column(product_reviews)
-        
-        if price_col and date_col:
-            prepared_data = price_forecaster.prepare_data(
-                product_reviews,
-                platform_col or 'Platform',
-                date_col,
-                price_col
-            )
-            
-            if prepared_data:
-                forecasts = price_forecaster.forecast(prepared_data, periods=90)
+                # Display chart
+                chart_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+                chart_data.columns = ['Date', 'Predicted Sales', 'Lower Bound', 'Upper Bound']
                 
-                if forecasts:
-                    st.success("✅ Price forecast generated successfully!")
-                    
-                    all_prices = []
-                    
-                    for platform, forecast in forecasts.items():
-                        st.subheader(f"{platform} - Price Forecast")
-                        
-                        chart_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-                        chart_data.columns = ['Date', 'Predicted Price', 'Lower Bound', 'Upper Bound']
-                        
-                        st.line_chart(
-                            data=chart_data.set_index('Date')[['Predicted Price']],
-                            use_container_width=True
-                        )
-                        
-                        # Price statistics
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Current Price", f"₹{forecast['yhat'].iloc[0]:.2f}")
-                        with col2:
-                            st.metric("Average Price", f"₹{forecast['yhat'].mean():.2f}")
-                        with col3:
-                            stability = score_calc.calculate_price_stability_score(forecast)
-                            st.metric("Price Stability", f"{stability:.1f}%")
-                        
-                        all_prices.append(forecast['yhat'].mean())
-                    
-                    # Platform comparison
-                    st.divider()
-                    st.markdown("#### 📊 Platform Comparison")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        cheapest_idx = np.argmin(all_prices)
-                        platforms_list = list(forecasts.keys())
-                        st.info(f"💰 Cheapest: **{platforms_list[cheapest_idx]}** (₹{all_prices[cheapest_idx]:.2f})")
-                    with col2:
-                        expensive_idx = np.argmax(all_prices)
-                        st.warning(f"📈 Most Expensive: **{platforms_list[expensive_idx]}** (₹{all_prices[expensive_idx]:.2f})")
-                else:
-                    st.info("No price data available for forecasting")
-        else:
-            st.info("Price data not available in the dataset")
-    
-    # Tab 3: Fake Reviews Detection
-    with tab3:
-        st.markdown("#### Fake Reviews Analysis")
-        
-        # Check if detector is trained and has a valid model
-        if st.session_state.detector_trained and st.session_state.fake_detector.model is not None:
-            try:
-                # Get reviews
-                text_cols = [col for col in product_reviews.columns 
-                           if col.lower() in ['review_text', 'text', 'review', 'content']]
+                st.line_chart(
+                    data=chart_data.set_index('Date')[['Predicted Sales']],
+                    use_container_width=True
+                )
                 
-                if text_cols:
-                    text_col = text_cols[0]
-                    
-                    # Detect fake reviews
-                    fake_pct, fake_count, total_count, probs = detector.get_fake_percentage(
-                        product_reviews[text_col],
-                        threshold=0.5
-                    )
-                    
-                    # Overall statistics
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Total Reviews", total_count)
-                    with col2:
-                        st.metric("Fake Reviews", fake_count)
-                    with col3:
-                        if fake_pct < 20:
-                            st.metric("Fake %", f"{fake_pct:.1f}%", delta="✅ Low")
-                        elif fake_pct < 50:
-                            st.metric("Fake %", f"{fake_pct:.1f}%", delta="⚠️ Medium")
-                        else:
-                            st.metric("Fake %", f"{fake_pct:.1f}%", delta="❌ High")
-                    
-                    # Platform-wise analysis
-                    st.divider()
-                    st.markdown("#### Platform-wise Analysis")
-                    
-                    if platform_col in product_reviews.columns:
-                        platforms = product_reviews[platform_col].unique()
-                        
-                        for platform in platforms:
-                            platform_reviews = product_reviews[product_reviews[platform_col] == platform][text_col]
-                            
-                            if len(platform_reviews) > 0:
-                                p_fake_pct, p_fake_count, p_total_count, _ = detector.get_fake_percentage(
-                                    platform_reviews,
-                                    threshold=0.5
-                                )
-                                
-                                col1, col2 = st.columns([3, 1])
-                                with col1:
-                                    st.write(f"**{platform}**: {p_fake_count}/{p_total_count} fake ({p_fake_pct:.1f}%)")
-                                with col2:
-                                    if p_fake_pct < 30:
-                                        st.success("✅")
-                                    elif p_fake_pct < 60:
-                                        st.warning("⚠️")
-                                    else:
-                                        st.error("❌")
-                    
-                    # Example fake reviews
-                    st.divider()
-                    st.markdown("#### Examples of Suspicious Reviews")
-                    
-                    # Get reviews with high fake probability
-                    suspicious_indices = np.where(probs > 0.7)[0]
-                    
-                    if len(suspicious_indices) > 0:
-                        num_examples = min(3, len(suspicious_indices))
-                        for i in range(num_examples):
-                            idx = suspicious_indices[i]
-                            confidence = probs[idx] * 100
-                            
-                            st.warning(f"🚨 Review #{i+1} (Confidence: {confidence:.1f}%)")
-                            st.text(product_reviews.iloc[idx][text_col][:200] + "...")
-                    else:
-                        st.success("No highly suspicious reviews detected!")
-                else:
-                    st.info("No review text column found in data")
-            except Exception as e:
-                st.error(f"Error analyzing fake reviews: {str(e)}")
+                # Statistics
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Average Sales", f"{summary[platform]['average']:.2f}")
+                with col2:
+                    st.metric("Max Sales", f"{summary[platform]['max']:.2f}")
+                with col3:
+                    trend = "📈 Growing" if summary[platform]['growing'] else "📉 Declining"
+                    st.metric("Trend", trend)
         else:
-            st.info("Fake review detector is being trained...")
+            st.info("No sales data available for forecasting")
+    else:
+        st.info("Sales forecasting data not available in the dataset")
+
+
+def render_price_section(analysis, user_pin):
+    """Price forecast and platform comparison section"""
+    st.markdown("#### Price Analysis (Next 90 Days)")
     
-    # Tab 4: Eco-Friendliness
-    with tab4:
-        st.markdown("#### 🌱 Eco-Friendliness Rating")
-        
-        user_pin = st.session_state.user_pincode
-        
-        try:
-            # Extract platforms from product data
-            available_platforms = None
-            if platform_col and platform_col in product_reviews.columns:
-                available_platforms = list(product_reviews[platform_col].unique())
-            
-            # Get platform eco ratings (only for available platforms)
-            eco_ratings = carbon_calc.get_all_platform_ratings(
-                user_pin,
-                platforms=available_platforms,
-                product_weight=1.0
-            )
-            
-            st.markdown(f"Based on shipping from warehouse to PIN code: **{user_pin}**")
-            st.divider()
+    forecasts = analysis.price_forecasts()
+    
+    if forecasts is not None:
+        if forecasts:
+            st.success("✅ Price forecast generated successfully!")
             
-            # Display eco ratings for each platform
-            eco_colors = {
-                'green': 'eco-green',
-                'yellow': 'eco-yellow',
-                'orange': 'eco-orange',
-                'red': 'eco-red'
-            }
+            summary = analysis.forecast_summary('price')
+            all_prices = []
             
-            for platform, rating in eco_ratings.items():
-                color_class = eco_colors.get(rating['color'], 'eco-yellow')
+            for platform, forecast in forecasts.items():
+                st.subheader(f"{platform} - Price Forecast")
+                
+                chart_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+                chart_data.columns = ['Date', 'Predicted Price', 'Lower Bound', 'Upper Bound']
+                
+                st.line_chart(
+                    data=chart_data.set_index('Date')[['Predicted Price']],
+                    use_container_width=True
+                )
+                
+                # Price statistics
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Current Price", f"₹{summary[platform]['current']:.2f}")
+                with col2:
+                    st.metric("Average Price", f"₹{summary[platform]['average']:.2f}")
+                with col3:
+                    st.metric("Price Stability", f"{summary[platform]['score']:.1f}%")
                 
-                st.markdown(f"""
-                <div class="{color_class}">
-                    <h4>{platform}</h4>
-                    <p><strong>Distance:</strong> {rating['distance']:.0f} km</p>
-                    <p><strong>Rating:</strong> {rating['rating']}</p>
-                    <p><strong>CO₂ Emissions:</strong> {rating['emissions']:.3f} kg</p>
-                    <p>{rating['description']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                all_prices.append(summary[platform]['average'])
             
-            # Best platform for eco-friendliness
+            # Platform comparison
             st.divider()
-            if eco_ratings:
-                best_platform = min(eco_ratings.items(), key=lambda x: x[1]['emissions'])
-                st.success(f"🏆 **Most Eco-Friendly:** {best_platform[0]} with {best_platform[1]['emissions']:.3f} kg CO₂")
-            else:
-                st.info("Unable to calculate eco-friendliness ratings")
+            st.markdown("#### 📊 Platform Comparison")
             
-        except Exception as e:
-            st.error(f"Error calculating eco-friendliness: {str(e)}")
+            col1, col2 = st.columns(2)
+            with col1:
+                cheapest_idx = np.argmin(all_prices)
+                platforms_list = list(forecasts.keys())
+                st.info(f"💰 Cheapest: **{platforms_list[cheapest_idx]}** (₹{all_prices[cheapest_idx]:.2f})")
+            with col2:
+                expensive_idx = np.argmax(all_prices)
+                st.warning(f"📈 Most Expensive: **{platforms_list[expensive_idx]}** (₹{all_prices[expensive_idx]:.2f})")
+        else:
+            st.info("No price data available for forecasting")
+    else:
+        st.info("Price data not available in the dataset")
+
+
+def render_fake_reviews_section(analysis, user_pin):
+    """Fake review detection section"""
+    st.markdown("#### Fake Reviews Analysis")
     
-    # Tab 5: Overall Product Score
-    with tab5:
-        st.markdown("#### ⭐ Overall Product Score")
+    # Check if detector is trained and has a valid model
+    if analysis.detector is None:
+        st.info("Fake review detector is not available (no training data or saved model)")
+        return
+    
+    try:
+        # Detect fake reviews (scored once per product, broken down by platform)
+        review_scores = analysis.fake_reviews()
         
-        try:
-            # Gather all metrics
-            user_pin = st.session_state.user_pincode
-            
-            # Fake review score
-            fake_pct = 0
-            if st.session_state.detector_trained:
-                text_cols = [col for col in product_reviews.columns 
-                           if col.lower() in ['review_text', 'text', 'review', 'content']]
-                if text_cols:
-                    text_col = text_cols[0]
-                    fake_pct, _, _, _ = detector.get_fake_percentage(product_reviews[text_col])
-            
-            # Get forecasts for scores
-            price_col = data_loader.extract_price_column(product_reviews)
-            sales_col = data_loader.extract_sales_column(product_reviews)
-            date_col = data_loader.extract_date_column(product_reviews)
-            platform_col_actual = [col for col in product_reviews.columns 
-                                  if col.lower() in ['platform', 'marketplace', 'seller', 'store']]
-            platform_col = platform_col_actual[0] if platform_col_actual else 'Platform'
-            
-            price_forecast_data = None
-            sales_forecast_data = None
-            
-            if price_col and date_col:
-                prepared = price_forecaster.prepare_data(product_reviews, platform_col, date_col, price_col)
-                if prepared:
-                    price_forecaster.forecast(prepared, periods=90)
-                    first_platform = list(prepared.keys())[0] if prepared else None
-                    if first_platform:
-                        price_forecast_data = price_forecaster.get_forecast_dataframe(first_platform)
-            
-            if sales_col and date_col:
-                prepared = sales_forecaster.prepare_data(product_reviews, platform_col, date_col, sales_col)
-                if prepared:
-                    sales_forecaster.forecast(prepared, periods=90)
-                    first_platform = list(prepared.keys())[0] if prepared else None
-                    if first_platform:
-                        sales_forecast_data = sales_forecaster.get_forecast_dataframe(first_platform)
-            
-            # Get eco score
-            # Extract platforms from product data
-            available_platforms = None
-            if platform_col and platform_col in product_reviews.columns:
-                available_platforms = list(product_reviews[platform_col].unique())
-            
-            eco_ratings = carbon_calc.get_all_platform_ratings(user_pin, platforms=available_platforms, product_weight=1.0)
-            first_platform = list(eco_ratings.keys())[0] if eco_ratings else 'Amazon'
-            eco_color = eco_ratings.get(first_platform, {}).get('color', 'yellow')
-            
-            # Calculate overall score
-            overall_score, scores = score_calc.calculate_overall_score(
-                fake_pct,
-                price_forecast_data,
-                sales_forecast_data,
-                eco_color,
-                first_platform
-            )
-            
-            # Display overall score
-            st.markdown(f"## {overall_score:.1f}/100")
-            
-            rating, recommendation = score_calc.get_score_interpretation(overall_score)
-            
-            if overall_score >= 80:
-                st.success(f"### ✅ {rating}")
-            elif overall_score >= 60:
-                st.info(f"### ℹ️ {rating}")
+        if review_scores is None:
+            st.info("No review text column found in data")
+            return
+        
+        fake_pct = review_scores['fake_percentage']
+        fake_count = review_scores['fake_count']
+        total_count = review_scores['total_count']
+        
+        # Overall statistics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Reviews", total_count)
+        with col2:
+            st.metric("Fake Reviews", fake_count)
+        with col3:
+            if fake_pct < 20:
+                st.metric("Fake %", f"{fake_pct:.1f}%", delta="✅ Low")
+            elif fake_pct < 50:
+                st.metric("Fake %", f"{fake_pct:.1f}%", delta="⚠️ Medium")
             else:
-                st.error(f"### ❌ {rating}")
-            
-            st.markdown(f"**Recommendation:** {recommendation}")
-            
-            # Detailed score breakdown
-            st.divider()
-            st.markdown("#### Score Breakdown")
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Fake Reviews", f"{scores['fake_reviews']:.1f}", "Quality")
-                st.metric("Price Stability", f"{scores['price_stability']:.1f}", "Reliability")
-            
-            with col2:
-                st.metric("Sales Trend", f"{scores['sales_trend']:.1f}", "Popularity")
-                st.metric("Eco-Friendliness", f"{scores['eco_friendliness']:.1f}", "Environment")
-            
-            with col3:
-                st.metric("Platform Reliability", f"{scores['platform_reliability']:.1f}", "Trustworthiness")
-            
-            # Score visualization
-            st.divider()
-            score_df = pd.DataFrame({
-                'Category': list(scores.keys()),
-                'Score': list(scores.values())
-            })
-            
-            st.bar_chart(score_df.set_index('Category'), use_container_width=True)
+                st.metric("Fake %", f"{fake_pct:.1f}%", delta="❌ High")
+        
+        # Platform-wise analysis
+        st.divider()
+        st.markdown("#### Platform-wise Analysis")
+        
+        if review_scores['by_group'] is not None:
+            for platform, platform_stats in review_scores['by_group'].iterrows():
+                p_fake_pct = platform_stats['fake_percentage']
+                p_fake_count = int(platform_stats['fake_count'])
+                p_total_count = int(platform_stats['total_count'])
+                
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.write(f"**{platform}**: {p_fake_count}/{p_total_count} fake ({p_fake_pct:.1f}%)")
+                with col2:
+                    if p_fake_pct < 30:
+                        st.success("✅")
+                    elif p_fake_pct < 60:
+                        st.warning("⚠️")
+                    else:
+                        st.error("❌")
+        
+        # Example fake reviews
+        st.divider()
+        st.markdown("#### Examples of Suspicious Reviews")
+        
+        # Get reviews with high fake probability
+        suspicious = analysis.suspicious_reviews(min_probability=0.7, limit=3)
+        
+        if suspicious:
+            for i, (probability, text) in enumerate(suspicious):
+                st.warning(f"🚨 Review #{i+1} (Confidence: {probability * 100:.1f}%)")
+                st.text(text[:200] + "...")
+        else:
+            st.success("No highly suspicious reviews detected!")
+    except Exception as e:
+        st.error(f"Error analyzing fake reviews: {str(e)}")
+
+
+def render_eco_section(analysis, user_pin):
+    """Eco-friendliness section"""
+    st.markdown("#### 🌱 Eco-Friendliness Rating")
+    
+    try:
+        # Get platform eco ratings (only for platforms the product is sold on)
+        eco_ratings = analysis.eco_ratings(user_pin)
+        
+        st.markdown(f"Based on shipping from warehouse to PIN code: **{user_pin}**")
+        st.divider()
+        
+        # Display eco ratings for each platform
+        eco_colors = {
+            'green': 'eco-green',
+            'yellow': 'eco-yellow',
+            'orange': 'eco-orange',
+            'red': 'eco-red'
+        }
+        
+        for platform, rating in eco_ratings.items():
+            color_class = eco_colors.get(rating['color'], 'eco-yellow')
             
-        except Exception as e:
-            st.error(f"Error calculating product score: {str(e)}")
-            print(f"Error details: {e}")
+            st.markdown(f"""
+            <div class="{color_class}">
+                <h4>{platform}</h4>
+                <p><strong>Ships from:</strong> {rating['warehouse_pin']}</p>
+                <p><strong>Distance:</strong> {rating['distance']:.0f} km</p>
+                <p><strong>Rating:</strong> {rating['rating']}</p>
+                <p><strong>CO₂ Emissions:</strong> {rating['emissions']:.3f} kg</p>
+                <p>{rating['description']}</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        # Best platform for eco-friendliness
+        st.divider()
+        if eco_ratings:
+            best_platform = min(eco_ratings.items(), key=lambda x: x[1]['emissions'])
+            st.success(f"🏆 **Most Eco-Friendly:** {best_platform[0]} with {best_platform[1]['emissions']:.3f} kg CO₂")
+        else:
+            st.info("Unable to calculate eco-friendliness ratings")
+        
+    except Exception as e:
+        st.error(f"Error calculating eco-friendliness: {str(e)}")
+
+
+def render_score_section(analysis, user_pin):
+    """Overall product score section"""
+    st.markdown("#### ⭐ Overall Product Score")
+    
+    try:
+        # Reuses whatever the other sections already computed
+        result = analysis.overall_score(user_pin)
+        overall_score = result['overall']
+        scores = result['scores']
+        
+        # Display overall score
+        st.markdown(f"## {overall_score:.1f}/100")
+        
+        rating, recommendation = result['rating'], result['recommendation']
+        
+        if overall_score >= 80:
+            st.success(f"### ✅ {rating}")
+        elif overall_score >= 60:
+            st.info(f"### ℹ️ {rating}")
+        else:
+            st.error(f"### ❌ {rating}")
+        
+        st.markdown(f"**Recommendation:** {recommendation}")
+        
+        # Detailed score breakdown
+        st.divider()
+        st.markdown("#### Score Breakdown")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Fake Reviews", f"{scores['fake_reviews']:.1f}", "Quality")
+            st.metric("Price Stability", f"{scores['price_stability']:.1f}", "Reliability")
+        
+        with col2:
+            st.metric("Sales Trend", f"{scores['sales_trend']:.1f}", "Popularity")
+            st.metric("Eco-Friendliness", f"{scores['eco_friendliness']:.1f}", "Environment")
+        
+        with col3:
+            st.metric("Platform Reliability", f"{scores['platform_reliability']:.1f}", "Trustworthiness")
+        
+        # Score visualization
+        st.divider()
+        score_df = pd.DataFrame({
+            'Category': list(scores.keys()),
+            'Score': list(scores.values())
+        })
+        
+        st.bar_chart(score_df.set_index('Category'), use_container_width=True)
+        
+        # Every platform the product is sold on, scored in one batch
+        st.divider()
+        st.markdown("#### 🏁 Platform Ranking")
+        
+        platform_scores = analysis.platform_scores(user_pin, weights=config.SCORE_WEIGHTS)
+        if len(platform_scores) > 0:
+            ranking = platform_scores[['rank', 'platform', 'overall', 'fake_reviews', 'price_stability',
+                                       'sales_trend', 'eco_friendliness', 'platform_reliability']]
+            st.dataframe(ranking.set_index('rank').round(1), use_container_width=True)
+        
+    except Exception as e:
+        st.error(f"Error calculating product score: {str(e)}")
+        record_error(f"Error calculating product score: {str(e)}", exc_info=True)
+
+
+SECTION_RENDERERS = {
+    "📈 Sales Forecast": render_sales_section,
+    "💰 Price Analysis": render_price_section,
+    "⚠️ Fake Reviews": render_fake_reviews_section,
+    "🌱 Eco-Friendliness": render_eco_section,
+    "⭐ Overall Score": render_score_section
+}
 
 
 def show_about_page():
@@ -797,7 +785,7 @@ def show_about_page():
     ### 📍 How It Works
     
     1. **Enter Your Location** - Provide your PIN code for personalized analysis
-    2. **Select a Product** - Choose from 5 featured products
+    2. **Select a Product** - Search the catalog by name and browse the results page by page
     3. **View Analytics** - Get detailed insights on:
        - Sales trends
        - Price predictions
@@ -821,13 +809,44 @@ def show_about_page():
     """)
 
 
-# Main app logic
-if page == "Home":
-    show_home_page()
-elif page == "Product Details":
-    show_product_details()
-else:
-    show_about_page()
+def show_trace_overlay(trace):
+    """Developer overlay: where the time of this render went, stage by stage"""
+    with st.expander(f"🛠️ Render trace ({trace.duration_ms:.0f} ms)"):
+        rows = []
+        for depth, stage in trace.flatten():
+            rows.append({
+                'Stage': '\u2003' * depth + stage.name,
+                'ms': round(stage.duration_ms, 1),
+                'Rows': stage.rows,
+                'Cache hits': sum(counts['hit'] for counts in stage.cache.values()),
+                'Cache misses': sum(counts['miss'] for counts in stage.cache.values()),
+                'Errors': '; '.join(stage.errors)
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        
+        cache_totals = {}
+        for _, stage in trace.flatten():
+            for name, counts in stage.cache.items():
+                totals = cache_totals.setdefault(name, {'hit': 0, 'miss': 0})
+                totals['hit'] += counts['hit']
+                totals['miss'] += counts['miss']
+        if cache_totals:
+            st.caption(' · '.join(f"{name}: {counts['hit']} hit / {counts['miss']} miss"
+                                  for name, counts in sorted(cache_totals.items())))
+
+
+# Main app logic, traced as one render
+get_tracer()
+with span('render', page=page, product=st.session_state.selected_product) as render_trace:
+    if page == "Home":
+        show_home_page()
+    elif page == "Product Details":
+        show_product_details()
+    else:
+        show_about_page()
+
+if config.TRACE_OVERLAY:
+    show_trace_overlay(render_trace)
 
 # Footer
 st.divider()
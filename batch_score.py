@@ -0,0 +1,66 @@
+"""
+Batch fake review scoring for large review exports
+
+Streams a review CSV through the trained fake review detector in chunks
+and writes per-review probabilities to an output CSV, reporting
+throughput as it goes.
+
+    python batch_score.py reviews.csv scores.csv --keep-cols review_id --workers 4
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import config
+from modules.batch_scoring import score_csv
+from modules.fake_review_detector import get_detector_registry
+
+
+if __name__ == "__main__":
+    app_dir = Path(__file__).parent
+    
+    parser = argparse.ArgumentParser(description="Score a review CSV with the fake review detector")
+    parser.add_argument('input', type=str, help='Review CSV to score')
+    parser.add_argument('output', type=str, help='Output CSV for probabilities')
+    parser.add_argument('--model', type=str, default=str(app_dir / config.DETECTOR_MODEL_PATH),
+                        help='Saved detector artifact (trained from --training-data if missing or stale)')
+    parser.add_argument('--training-data', type=str, default=str(app_dir / 'data' / 'model training.csv'),
+                        help='Training CSV used when the artifact needs (re)building')
+    parser.add_argument('--text-col', type=str, help='Review text column (detected if omitted)')
+    parser.add_argument('--keep-cols', type=str, nargs='*', default=[], help='Input columns copied to the output')
+    parser.add_argument('--chunksize', type=int, default=50000, help='Rows per chunk')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes (1 = in-process)')
+    parser.add_argument('--threshold', type=float, default=config.FAKE_REVIEW_THRESHOLD,
+                        help='Probability threshold for is_fake')
+    
+    args = parser.parse_args()
+    
+    # Make sure an up-to-date artifact exists for the workers to load
+    detector = get_detector_registry(args.training_data, args.model).get()
+    if detector is None:
+        print("❌ No detector available: provide --model or --training-data")
+        sys.exit(1)
+    
+    print(f"🔍 Scoring {args.input} in chunks of {args.chunksize:,} rows...\n")
+    stats = score_csv(
+        args.input,
+        args.output,
+        args.model,
+        text_col=args.text_col,
+        keep_cols=args.keep_cols,
+        chunksize=args.chunksize,
+        n_jobs=args.workers,
+        threshold=args.threshold
+    )
+    
+    fake_pct = stats['fake_count'] / stats['rows'] * 100 if stats['rows'] else 0
+    print("\n" + "="*50)
+    print(f"Rows scored:  {stats['rows']:,}")
+    print(f"Fake reviews: {stats['fake_count']:,} ({fake_pct:.1f}%)")
+    print(f"Elapsed:      {stats['seconds']:.1f}s")
+    print(f"Throughput:   {stats['rows_per_second']:,.0f} rows/s")
+    print("="*50)
+    print(f"\n✅ Results written to {args.output}")
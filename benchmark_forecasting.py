@@ -0,0 +1,170 @@
+"""
+Accuracy/latency benchmark for the forecasting backends
+
+Fits every backend on the first part of each product's price and sales
+series, forecasts the held-out tail, and reports MAE/MAPE on the holdout
+together with fit+predict latency.
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from modules.data_loader import DataLoader
+from modules.forecasting import FORECAST_BACKENDS, PriceForecastor, SalesForecastor
+
+
+def split_holdout(prepared_data, holdout_fraction):
+    """
+    Hold out the last rows of each date-sorted platform series for scoring
+    
+    The split is by row count: the final `holdout_fraction` of the rows (at
+    least one) becomes the test part. Platforms left with fewer than two
+    training rows are skipped.
+    """
+    train, test = {}, {}
+    
+    for platform, data in prepared_data.items():
+        n_test = max(1, int(len(data) * holdout_fraction))
+        if len(data) - n_test < 2:
+            continue
+        train[platform] = data.iloc[:-n_test].reset_index(drop=True)
+        test[platform] = data.iloc[-n_test:].reset_index(drop=True)
+    
+    return train, test
+
+
+def score_forecasts(forecasts, test):
+    """Compute MAE and MAPE of forecasts against held-out observations"""
+    errors = []
+    pct_errors = []
+    
+    for platform, actual in test.items():
+        if platform not in forecasts:
+            continue
+        forecast = forecasts[platform][['ds', 'yhat']].copy()
+        forecast['ds'] = pd.to_datetime(forecast['ds']).dt.normalize()
+        actual = actual.assign(ds=pd.to_datetime(actual['ds']).dt.normalize())
+        merged = actual.merge(forecast, on='ds', how='inner')
+        
+        abs_error = (merged['y'] - merged['yhat']).abs().to_numpy()
+        errors.append(abs_error)
+        nonzero = merged['y'].to_numpy() != 0
+        pct_errors.append(abs_error[nonzero] / np.abs(merged['y'].to_numpy()[nonzero]))
+    
+    if not errors:
+        return None, None
+    
+    mae = float(np.concatenate(errors).mean())
+    pct = np.concatenate(pct_errors)
+    mape = float(pct.mean() * 100) if len(pct) else None
+    return mae, mape
+
+
+def run_benchmark(data_dir, holdout_fraction=0.2, repeats=3):
+    """
+    Benchmark all registered backends on every product series
+    
+    Args:
+        data_dir: directory with the product CSV files
+        holdout_fraction: share of each series held out for scoring
+        repeats: timing repetitions (best time is reported)
+    
+    Returns:
+        list of result dicts
+    """
+    data_loader = DataLoader(str(data_dir))
+    results = []
+    
+    for product in data_loader.get_available_products():
+        product_reviews = data_loader.load_product_reviews(product)
+        if product_reviews is None:
+            continue
+        
+        platform_col = data_loader.extract_platform_column(product_reviews) or 'Platform'
+        date_col = data_loader.extract_date_column(product_reviews)
+        
+        series_sets = [
+            ('price', PriceForecastor, data_loader.extract_price_column(product_reviews)),
+            ('sales', SalesForecastor, data_loader.extract_sales_column(product_reviews))
+        ]
+        
+        for metric, forecaster_cls, value_col in series_sets:
+            if not (date_col and value_col):
+                continue
+            
+            prepared = forecaster_cls(product).prepare_data(product_reviews, platform_col, date_col, value_col)
+            train, test = split_holdout(prepared, holdout_fraction)
+            if not train:
+                continue
+            
+            last_train = max(data['ds'].max() for data in train.values())
+            last_test = max(data['ds'].max() for data in test.values())
+            periods = max(1, (pd.Timestamp(last_test) - pd.Timestamp(last_train)).days)
+            
+            for backend in FORECAST_BACKENDS:
+                timings = []
+                forecasts = {}
+                for _ in range(repeats):
+                    forecaster = forecaster_cls(product, cache=None, backend=backend)
+                    start = time.perf_counter()
+                    forecasts = forecaster.forecast(train, periods=periods)
+                    timings.append(time.perf_counter() - start)
+                
+                mae, mape = score_forecasts(forecasts, test)
+                results.append({
+                    'product': product,
+                    'metric': metric,
+                    'backend': backend,
+                    'platforms': len(train),
+                    'seconds': min(timings),
+                    'mae': mae,
+                    'mape': mape
+                })
+    
+    return results
+
+
+def print_summary(results):
+    """Print per-series results and per-backend averages"""
+    df = pd.DataFrame(results)
+    if df.empty:
+        print("No series available for benchmarking")
+        return
+    
+    print(df.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    print("\n" + "="*50)
+    summary = df.groupby('backend').agg(
+        seconds=('seconds', 'mean'),
+        mae=('mae', 'mean'),
+        mape=('mape', 'mean')
+    )
+    print(summary.to_string(float_format=lambda x: f"{x:.4f}"))
+    print("="*50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark forecasting backends")
+    parser.add_argument('--data-dir', type=str, default=str(Path(__file__).parent / 'data'),
+                        help='Path to data directory')
+    parser.add_argument('--holdout', type=float, default=0.2, help='Fraction of each series held out')
+    parser.add_argument('--repeats', type=int, default=3, help='Timing repetitions per backend')
+    parser.add_argument('--json', type=str, help='Write results as JSON to this path')
+    
+    args = parser.parse_args()
+    
+    print("⏱️  Benchmarking forecasting backends...\n")
+    results = run_benchmark(args.data_dir, args.holdout, args.repeats)
+    print_summary(results)
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
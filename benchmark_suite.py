@@ -0,0 +1,373 @@
+"""
+Latency and memory benchmarks for every analytics module
+
+Generates synthetic datasets shaped like test_utils.generate_sample_data at
+several multiples of the sample size, then times and memory-profiles
+DataLoader loading, FakeReviewDetector train/predict, the price and sales
+forecasters, the CarbonEmissionsCalculator batch paths and
+ProductScoreCalculator. Results are written as JSON and can be compared
+against a stored baseline to catch regressions.
+"""
+
+import sys
+import json
+import functools
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import config
+from modules.carbon_emissions import CarbonEmissionsCalculator
+from modules.data_loader import PRODUCT_CACHE, DataLoader
+from modules.data_store import DataStore
+from modules.fake_review_detector import FakeReviewDetector
+from modules.forecasting import PriceForecastor, SalesForecastor
+from modules.product_score import ProductScoreCalculator
+
+# Rows per product file, training file and warehouse file at scale 1 (as in generate_sample_data)
+SAMPLE_REVIEWS = 100
+SAMPLE_TRAINING = 90
+SAMPLE_WAREHOUSES = 24
+
+BENCHMARK_PRODUCT = 'Apple iPhone'
+
+PRODUCT_FILES = {
+    'apple_iphone.csv': (40000, 60000),
+    'nike_revolution.csv': (2000, 4000),
+    'cricket bat.csv': (1000, 5000),
+    'prestige_induction.csv': (3000, 6000),
+    'levis_mens_cotton_tshirt.csv': (500, 2000)
+}
+
+PLATFORMS = ['Amazon', 'Flipkart', 'eBay']
+WAREHOUSE_PINS = ['110001', '560001', '400001']
+
+REVIEW_TEXTS = [
+    'Excellent product, highly recommended!',
+    'Great quality and fast delivery',
+    'Not as described in the listing',
+    'Buy now! Limited time offer!!!',
+    'Amazing value for money',
+    'Disappointed with the quality',
+    'BEST DEAL EVER!!!',
+    'Good product, average service',
+    'Worth every penny',
+    'Cheap quality product'
+]
+FAKE_TEXTS = {'Buy now! Limited time offer!!!', 'BEST DEAL EVER!!!'}
+
+
+def generate_scaled_data(output_dir, scale, seed=42):
+    """
+    Write generate_sample_data-style CSVs with `scale` times as many rows
+    
+    Review dates cover at most two years, so forecast series stay bounded
+    while review volume grows. Structured review signals are included so
+    the detector trains its numeric features too.
+    
+    Returns:
+        Path of the data directory
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    
+    n_reviews = SAMPLE_REVIEWS * scale
+    n_days = min(n_reviews, 730)
+    for filename, (low, high) in PRODUCT_FILES.items():
+        texts = rng.choice(REVIEW_TEXTS, n_reviews)
+        pd.DataFrame({
+            'review_text': texts,
+            'platform': rng.choice(PLATFORMS, n_reviews),
+            'date': pd.Timestamp('2023-06-01') + pd.to_timedelta(np.sort(rng.integers(0, n_days, n_reviews)), unit='D'),
+            'price': rng.integers(low, high, n_reviews),
+            'rating': rng.integers(1, 6, n_reviews),
+            'sales': rng.integers(10, 100, n_reviews),
+            'verified_purchase': rng.integers(0, 2, n_reviews),
+            'duplicate_phrase_score': rng.random(n_reviews).round(2),
+            'reviewer_history': rng.integers(0, 200, n_reviews),
+            'review_post_gap': rng.integers(0, 90, n_reviews)
+        }).to_csv(output_dir / filename, index=False)
+    
+    n_training = SAMPLE_TRAINING * scale
+    texts = rng.choice(REVIEW_TEXTS, n_training)
+    pd.DataFrame({
+        'review_text': texts,
+        'label': np.isin(texts, list(FAKE_TEXTS)).astype(int),
+        'verified_purchase': rng.integers(0, 2, n_training),
+        'duplicate_phrase_score': rng.random(n_training).round(2)
+    }).to_csv(output_dir / 'model training.csv', index=False)
+    
+    n_warehouses = SAMPLE_WAREHOUSES * scale
+    pd.DataFrame({
+        'product': rng.choice(['Apple iPhone', 'Nike Revolution'], n_warehouses),
+        'platform': rng.choice(PLATFORMS, n_warehouses),
+        'date': pd.Timestamp('2023-06-01') + pd.to_timedelta(rng.integers(0, 365, n_warehouses), unit='D'),
+        'price': rng.integers(2000, 60000, n_warehouses),
+        'sales': rng.integers(10, 200, n_warehouses),
+        'warehouse_pin': rng.choice(WAREHOUSE_PINS, n_warehouses)
+    }).to_csv(output_dir / 'cross_platform_products.csv', index=False)
+    
+    return output_dir
+
+
+def measure(setup, run, repeats):
+    """
+    Time run(setup()) and record its peak traced memory
+    
+    The best of `repeats` untraced runs is reported as the latency; one more
+    run under tracemalloc gives the peak Python/NumPy allocation, since
+    tracing slows the code down. Setup is excluded from both.
+    
+    Returns:
+        tuple: (seconds, peak bytes)
+    """
+    timings = []
+    for _ in range(repeats):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+    
+    state = setup()
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return min(timings), peak
+
+
+def build_benchmarks(data_dir, scale, work_dir):
+    """
+    Benchmarks for one generated dataset
+    
+    Returns:
+        list of (name, rows, setup, run)
+    """
+    data_dir = Path(data_dir)
+    n_reviews = SAMPLE_REVIEWS * scale
+    rng = np.random.default_rng(scale)
+    
+    # Cold: CSVs compiled into an empty store; warm: store already compiled on disk
+    def cold_store():
+        PRODUCT_CACHE.clear()
+        return Path(tempfile.mkdtemp(dir=work_dir))
+    
+    warm_store_dir = cold_store()
+    
+    def warm_store():
+        PRODUCT_CACHE.clear()
+        return warm_store_dir
+    
+    def load(store_dir):
+        loader = DataLoader(str(data_dir), store=DataStore(data_dir, store_dir=store_dir))
+        return loader.load_product_reviews(BENCHMARK_PRODUCT)
+    
+    load(warm_store_dir)
+    loader = DataLoader(str(data_dir), store=DataStore(data_dir, store_dir=warm_store_dir))
+    reviews = loader.load_product_reviews(BENCHMARK_PRODUCT)
+    date_col = loader.extract_date_column(reviews)
+    platform_col = loader.extract_platform_column(reviews) or 'platform'
+    
+    # Trained on first use, so filtered runs skip it
+    @functools.lru_cache(maxsize=None)
+    def trained_detector():
+        detector = FakeReviewDetector()
+        detector.train(str(data_dir / 'model training.csv'))
+        return detector
+    
+    carbon_calc = CarbonEmissionsCalculator(cache=None)
+    carbon_calc.load_warehouse_data(str(data_dir / 'cross_platform_products.csv'))
+    user_pins = rng.integers(110001, 855118, n_reviews).astype(str)
+    warehouse_pins = rng.choice(WAREHOUSE_PINS, n_reviews)
+    
+    score_calc = ProductScoreCalculator()
+    n_forecasts = min(n_reviews, 10000)
+    forecasts = [pd.DataFrame({'yhat': 100 + rng.normal(0, 5, 90).cumsum()}) for _ in range(n_forecasts)]
+    cv, slope = score_calc.forecast_metrics(forecasts)
+    metrics = pd.DataFrame({
+        'platform': rng.choice(PLATFORMS, n_reviews),
+        'fake_review_pct': rng.uniform(0, 100, n_reviews),
+        'price_cv': np.resize(cv, n_reviews),
+        'sales_slope_pct': np.resize(slope, n_reviews),
+        'eco_color': rng.choice(['green', 'yellow', 'orange', 'red'], n_reviews)
+    })
+    
+    benchmarks = [
+        ('data_loader.load_cold', n_reviews, cold_store, load),
+        ('data_loader.load_warm', n_reviews, warm_store, load),
+        ('fake_review_detector.train', SAMPLE_TRAINING * scale, FakeReviewDetector,
+         lambda state: state.train(str(data_dir / 'model training.csv'))),
+        ('fake_review_detector.predict', n_reviews, trained_detector,
+         lambda state: state.predict(reviews, text_col='review_text')),
+        ('carbon_emissions.calculate_batch', n_reviews, lambda: carbon_calc,
+         lambda state: state.calculate_batch(warehouse_pins=warehouse_pins, user_pins=user_pins)),
+        ('carbon_emissions.get_rating_table', n_reviews * len(PLATFORMS), lambda: carbon_calc,
+         lambda state: state.get_rating_table(user_pins, platforms=PLATFORMS)),
+        ('product_score.forecast_metrics', n_forecasts, lambda: score_calc,
+         lambda state: state.forecast_metrics(forecasts)),
+        ('product_score.calculate_batch_scores', n_reviews, lambda: score_calc,
+         lambda state: state.calculate_batch_scores(metrics, weights=config.SCORE_WEIGHTS))
+    ]
+    
+    for backend in ('prophet', 'numpy'):
+        for metric, forecaster_cls, value_col in (('price', PriceForecastor, loader.extract_price_column(reviews)),
+                                                  ('sales', SalesForecastor, loader.extract_sales_column(reviews))):
+            benchmarks.append((
+                f'forecasting.{metric}.{backend}', n_reviews,
+                lambda cls=forecaster_cls, backend=backend: cls(BENCHMARK_PRODUCT, cache=None, backend=backend),
+                lambda state, value_col=value_col: state.forecast(
+                    state.prepare_data(reviews, platform_col, date_col, value_col), periods=config.FORECAST_PERIODS
+                )
+            ))
+    
+    return benchmarks
+
+
+def warm_imports():
+    """Import the lazily imported ML packages up front, so their import cost (tracked by startup_profile.py) is not timed"""
+    import prophet
+    import scipy.sparse
+    import sklearn.feature_extraction.text
+    import sklearn.neighbors
+    import sklearn.preprocessing
+    import xgboost
+
+
+def run_suite(scales, repeats=3, only=None, work_dir=None):
+    """
+    Generate each scaled dataset and run every benchmark on it
+    
+    Args:
+        scales: multiples of the sample size (e.g. [1, 100, 10000])
+        repeats: timing repetitions (best time is reported)
+        only: optional substring selecting benchmarks by name
+        work_dir: directory for generated data (temporary if None)
+    
+    Returns:
+        dict with 'meta' and a 'results' list
+    """
+    cleanup = work_dir is None
+    work_dir = Path(work_dir or tempfile.mkdtemp(prefix='benchmark-'))
+    results = []
+    warm_imports()
+    
+    try:
+        for scale in scales:
+            print(f"📊 Scale {scale}x: generating data...")
+            data_dir = generate_scaled_data(work_dir / f'scale-{scale}', scale)
+            
+            for name, rows, setup, run in build_benchmarks(data_dir, scale, work_dir):
+                if only and only not in name:
+                    continue
+                seconds, peak = measure(setup, run, repeats)
+                results.append({
+                    'benchmark': name,
+                    'scale': scale,
+                    'rows': rows,
+                    'seconds': seconds,
+                    'peak_mb': peak / (1024 * 1024)
+                })
+                print(f"  {name:<40} {seconds * 1000:10.1f} ms  {peak / (1024 * 1024):8.1f} MB")
+    finally:
+        if cleanup:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeats': repeats,
+            'scales': list(scales)
+        },
+        'results': results
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Find benchmarks slower or hungrier than the baseline by more than tolerance
+    
+    Returns:
+        list of regression dicts (benchmark, scale, field, baseline, current, ratio)
+    """
+    reference = {(row['benchmark'], row['scale']): row for row in baseline['results']}
+    regressions = []
+    
+    for row in report['results']:
+        base = reference.get((row['benchmark'], row['scale']))
+        if base is None:
+            continue
+        for field in ('seconds', 'peak_mb'):
+            if base[field] > 0 and row[field] > base[field] * (1 + tolerance):
+                regressions.append({
+                    'benchmark': row['benchmark'],
+                    'scale': row['scale'],
+                    'field': field,
+                    'baseline': base[field],
+                    'current': row[field],
+                    'ratio': row[field] / base[field]
+                })
+    
+    return regressions
+
+
+if __name__ == "__main__":
+    app_dir = Path(__file__).parent
+    
+    parser = argparse.ArgumentParser(description="Benchmark latency and memory of the analytics modules")
+    parser.add_argument('--scales', type=str, default=','.join(map(str, config.BENCHMARK_SCALES)),
+                        help='Comma-separated multiples of the sample data size')
+    parser.add_argument('--repeats', type=int, default=3, help='Timing repetitions per benchmark')
+    parser.add_argument('--only', type=str, help='Run only benchmarks whose name contains this')
+    parser.add_argument('--work-dir', type=str, help='Keep generated data in this directory')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+    parser.add_argument('--baseline', type=str, default=str(app_dir / config.BENCHMARK_BASELINE_PATH),
+                        help='Baseline results to compare against (skipped if missing)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=config.BENCHMARK_TOLERANCE,
+                        help='Allowed relative slowdown or memory growth before failing')
+    
+    args = parser.parse_args()
+    
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+    report = run_suite(scales, args.repeats, args.only, args.work_dir)
+    
+    baseline_path = Path(args.baseline)
+    if not args.save_baseline and baseline_path.exists():
+        with open(baseline_path) as f:
+            report['regressions'] = compare_to_baseline(report, json.load(f), args.tolerance)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {baseline_path}")
+    
+    regressions = report.get('regressions', [])
+    for regression in regressions:
+        print(f"❌ {regression['benchmark']} @ {regression['scale']}x: {regression['field']} "
+              f"{regression['baseline']:.4g} → {regression['current']:.4g} ({regression['ratio']:.2f}x)")
+    if 'regressions' in report and not regressions:
+        print(f"\n✅ No regressions against {baseline_path}")
+    
+    sys.exit(1 if regressions else 0)
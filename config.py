@@ -1,5 +1,7 @@
 # Configuration settings for Unified E-Commerce System
 
+import os
+
 # Products available in the system
 PRODUCTS = {
     'Apple iPhone': {
@@ -83,5 +85,57 @@ ECO_THRESHOLDS = {
 # Default forecast periods (days)
 FORECAST_PERIODS = 90
 
+# Forecasting engine: 'prophet' or 'numpy' (vectorized damped linear trend)
+FORECAST_BACKEND = 'prophet'
+
+# Worker processes for fitting platforms in parallel (1 = fit in-process)
+FORECAST_WORKERS = min(8, os.cpu_count() or 1)
+
+# Per-platform fit timeout in seconds for parallel fitting
+FORECAST_TIMEOUT = 120
+
+# Incremental updates: refit only platforms whose series changed since their last fit,
+# warm-starting Prophet from that fit's parameters, and reuse the others' stored forecasts
+FORECAST_INCREMENTAL = True
+
 # Fake review probability threshold
 FAKE_REVIEW_THRESHOLD = 0.5
+
+# Saved fake review detector (relative to the app directory), shared by all sessions
+DETECTOR_MODEL_PATH = 'artifacts/fake_review_detector.pkl'
+
+# On-disk forecast store (relative to the app directory), warmed by precompute_forecasts.py
+FORECAST_STORE_DIR = 'artifacts/forecasts'
+
+# Published per-product analytics snapshots (relative to the app directory), written by analytics_scheduler.py
+ANALYTICS_SNAPSHOT_DIR = 'artifacts/analytics'
+
+# Scheduler: seconds between full rebuilds, and between checks for changed data or models
+ANALYTICS_INTERVAL = 3600
+ANALYTICS_POLL_INTERVAL = 30
+
+# Headless analytics API (analytics_api.py): listen address and threads computing analyses
+ANALYTICS_API_HOST = '0.0.0.0'
+ANALYTICS_API_PORT = 8600
+ANALYTICS_API_THREADS = 4
+# Largest page of products accepted by /products and /rankings (limit=)
+ANALYTICS_API_MAX_LIMIT = 100
+# Seconds a client may take to send its request line and headers, and their size cap
+ANALYTICS_API_READ_TIMEOUT = 10
+ANALYTICS_API_MAX_HEADER_BYTES = 16384
+
+# Cold-start budgets checked by startup_profile.py (milliseconds)
+STARTUP_IMPORT_BUDGET_MS = 3000
+STARTUP_RENDER_BUDGET_MS = 10000
+
+# Benchmark suite (benchmark_suite.py): data scales, stored baseline and allowed regression
+BENCHMARK_SCALES = [1, 100, 10000]
+BENCHMARK_BASELINE_PATH = 'artifacts/benchmarks/baseline.json'
+BENCHMARK_TOLERANCE = 0.25
+
+# Tracing (modules/tracing.py): JSON-lines trace log (None = no log file) and recent traces kept in memory
+TRACE_LOG_PATH = os.environ.get('TRACE_LOG_PATH')
+TRACE_HISTORY = 50
+
+# Developer overlay with the per-render timing breakdown in the app (TRACE_OVERLAY=1 to enable)
+TRACE_OVERLAY = os.environ.get('TRACE_OVERLAY', '0') == '1'
@@ -0,0 +1,655 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from modules.cache import LRUCache, hash_dataframe
+from modules.forecasting import PriceForecastor, SalesForecastor
+from modules.product_score import ProductScoreCalculator
+from modules.tracing import record_cache, record_error, span
+
+
+TEXT_COLUMNS = ['review_text', 'text', 'review', 'content']
+
+# Snapshot entries that ProductAnalysis can be seeded from
+SNAPSHOT_RESULTS = ['sales_forecasts', 'price_forecasts', 'fake_reviews']
+
+# ProductAnalysis results and the results each one is computed from
+ANALYSIS_GRAPH = {
+    'sales_forecasts': (),
+    'price_forecasts': (),
+    'fake_reviews': (),
+    'eco_ratings': (),
+    'overall_score': ('fake_reviews', 'price_forecasts', 'sales_forecasts', 'eco_ratings')
+}
+
+# Results that depend on the user's pin code, memoized per pin for the most recent pins
+USER_RESULTS = {'eco_ratings', 'overall_score'}
+MAX_USER_PINS = 32
+
+
+class ProductAnalysis:
+    """
+    Every analysis shown on a product page, for one product
+    
+    Each result in ANALYSIS_GRAPH (forecasts, fake review statistics, eco
+    ratings, overall score) is computed only when first requested, pulling
+    in the results it depends on, and is memoized on the instance. The
+    Streamlit page, the analytics API and the scheduler share one pipeline
+    and one set of results. Concurrent requests for the same result wait
+    for a single computation; different results compute independently.
+    Results are shared; treat them as read-only.
+    """
+    
+    def __init__(self, product, data_loader, detector=None, carbon_calc=None, forecast_store=None,
+                 backend='prophet', n_jobs=1, timeout=None, periods=90, product_reviews=None, incremental=False,
+                 fake_threshold=0.5):
+        """
+        Args:
+            product: product name
+            data_loader: DataLoader serving the product's reviews
+            detector: trained FakeReviewDetector (None disables review scoring)
+            carbon_calc: CarbonEmissionsCalculator (None disables eco ratings)
+            forecast_store: optional ForecastStore shared across processes
+            backend: forecasting backend name
+            n_jobs: worker processes for forecast fitting
+            timeout: per-platform fit timeout in seconds
+            periods: forecast horizon in days
+            product_reviews: already loaded reviews (loaded via data_loader if omitted)
+            incremental: refit only platforms whose series changed since their last fit, warm-started
+            fake_threshold: probability at which a review counts as fake
+        """
+        self.product = product
+        self.data_loader = data_loader
+        self.detector = detector if detector is not None and detector.model is not None else None
+        self.carbon_calc = carbon_calc
+        self.forecast_store = forecast_store
+        self.backend = backend
+        self.n_jobs = n_jobs
+        self.timeout = timeout
+        self.periods = periods
+        self.incremental = incremental
+        self.fake_threshold = fake_threshold
+        self.score_calc = ProductScoreCalculator()
+        self._results = {}
+        self._user_results = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        
+        self.reviews = product_reviews if product_reviews is not None else data_loader.load_product_reviews(product)
+        if self.reviews is None:
+            self.platform_col = self.date_col = self.text_col = None
+            return
+        
+        self.platform_col = data_loader.extract_platform_column(self.reviews) or 'Platform'
+        self.date_col = data_loader.extract_date_column(self.reviews)
+        text_cols = [col for col in self.reviews.columns if col.lower() in TEXT_COLUMNS]
+        self.text_col = text_cols[0] if text_cols else None
+    
+    @property
+    def model_version(self):
+        return self.detector.version if self.detector is not None else None
+    
+    @property
+    def data_hash(self):
+        return self._memo('data_hash', lambda: hash_dataframe(self.reviews) if self.reviews is not None else None)
+    
+    def _memo(self, key, compute, user_pin=None):
+        if user_pin is not None:
+            key = (key, str(user_pin))
+        results = self._user_results if isinstance(key, tuple) else self._results
+        
+        name = key[0] if isinstance(key, tuple) else key
+        with self._lock:
+            if key in results:
+                return self._hit(results, key)
+            pending = self._pending.setdefault(key, threading.Lock())
+        
+        # One computation per result; waiters pick up its value
+        with pending:
+            with self._lock:
+                if key in results:
+                    return self._hit(results, key)
+            record_cache('analysis', False)
+            with span(f'analysis.{name}', product=self.product):
+                value = compute()
+            with self._lock:
+                results[key] = value
+                if results is self._user_results:
+                    while len(results) > MAX_USER_PINS * len(USER_RESULTS):
+                        results.popitem(last=False)
+                self._pending.pop(key, None)
+            return value
+    
+    def _hit(self, results, key):
+        """Return a memoized result, marking per-user ones recently used so eviction drops the least recently used"""
+        record_cache('analysis', True)
+        if results is self._user_results:
+            results.move_to_end(key)
+        return results[key]
+    
+    def is_computed(self, name, user_pin=None):
+        """Check whether a result of ANALYSIS_GRAPH is already available"""
+        key = (name, str(user_pin)) if name in USER_RESULTS else name
+        with self._lock:
+            return key in self._results or key in self._user_results
+    
+    def invalidate(self, name):
+        """Drop a result and every result computed from it, so they are recomputed on next request"""
+        stale = {name}
+        changed = True
+        while changed:
+            dependents = {node for node, deps in ANALYSIS_GRAPH.items() if stale.intersection(deps)}
+            changed = not dependents <= stale
+            stale |= dependents
+        
+        with self._lock:
+            for node in stale:
+                self._results.pop(node, None)
+            for key in [key for key in self._user_results if key[0] in stale]:
+                del self._user_results[key]
+    
+    def _forecasts(self, forecaster_cls, value_col):
+        if self.reviews is None or not (self.date_col and value_col):
+            return None
+        
+        forecaster = forecaster_cls(self.product, store=self.forecast_store, backend=self.backend,
+                                    n_jobs=self.n_jobs, timeout=self.timeout, incremental=self.incremental)
+        prepared_data = forecaster.prepare_data(self.reviews, self.platform_col, self.date_col, value_col)
+        if not prepared_data:
+            return {}
+        return forecaster.forecast(prepared_data, periods=self.periods)
+    
+    def sales_forecasts(self):
+        """
+        Returns:
+            dict {platform: forecast DataFrame}, or None if the data has no sales history
+        """
+        return self._memo('sales_forecasts', lambda: self._forecasts(
+            SalesForecastor, self.data_loader.extract_sales_column(self.reviews) if self.reviews is not None else None
+        ))
+    
+    def price_forecasts(self):
+        """
+        Returns:
+            dict {platform: forecast DataFrame}, or None if the data has no price history
+        """
+        return self._memo('price_forecasts', lambda: self._forecasts(
+            PriceForecastor, self.data_loader.extract_price_column(self.reviews) if self.reviews is not None else None
+        ))
+    
+    def forecast_summary(self, metric):
+        """
+        Headline statistics of each platform's forecast
+        
+        Args:
+            metric: 'sales' or 'price'
+        
+        Returns:
+            dict {platform: {current, average, max, growing, score}} where score is the
+            price stability or sales trend score, or None if there is no forecast
+        """
+        forecasts = self.sales_forecasts() if metric == 'sales' else self.price_forecasts()
+        if forecasts is None:
+            return None
+        
+        summary = {}
+        for platform, forecast in forecasts.items():
+            yhat = forecast['yhat']
+            if metric == 'price':
+                score = self.score_calc.calculate_price_stability_score(forecast)
+            else:
+                score = self.score_calc.calculate_sales_trend_score(forecast)
+            summary[platform] = {
+                'current': float(yhat.iloc[0]),
+                'average': float(yhat.mean()),
+                'max': float(yhat.max()),
+                'growing': bool(yhat.iloc[-1] > yhat.iloc[0]),
+                'score': float(score)
+            }
+        return summary
+    
+    def fake_reviews(self):
+        """
+        Returns:
+            dict from FakeReviewDetector.score_product_reviews (with per-platform
+            'by_group'), or None if there is no detector or review text
+        """
+        def compute():
+            if self.detector is None or self.text_col is None:
+                return None
+            group_col = self.platform_col if self.platform_col in self.reviews.columns else None
+            return self.detector.score_product_reviews(self.product, self.reviews, self.text_col, group_col=group_col,
+                                                       threshold=self.fake_threshold)
+        return self._memo('fake_reviews', compute)
+    
+    def suspicious_reviews(self, min_probability=0.7, limit=3):
+        """
+        Reviews the detector is most confident are fake, in data order
+        
+        Returns:
+            list of (fake probability, review text) tuples
+        """
+        review_scores = self.fake_reviews()
+        if review_scores is None:
+            return []
+        
+        indices = np.flatnonzero(review_scores['probabilities'] > min_probability)[:limit]
+        return [(float(review_scores['probabilities'][i]), str(self.reviews.iloc[i][self.text_col]))
+                for i in indices]
+    
+    def available_platforms(self):
+        """Platforms the product's reviews come from, or None if the data has no platform column"""
+        if self.reviews is None or self.platform_col not in self.reviews.columns:
+            return None
+        return list(self.reviews[self.platform_col].unique())
+    
+    def eco_ratings(self, user_pin):
+        """
+        Returns:
+            dict {platform: rating dict} from CarbonEmissionsCalculator.get_all_platform_ratings
+        """
+        if self.carbon_calc is None:
+            return {}
+        return self._memo('eco_ratings', lambda: self.carbon_calc.get_all_platform_ratings(
+            user_pin, platforms=self.available_platforms(), product_weight=1.0, product_name=self.product
+        ), user_pin=user_pin)
+    
+    def overall_score(self, user_pin):
+        """
+        Weighted product score for one platform: the first platform in data
+        order that has an eco rating
+        
+        The price and sales forecasts and the eco rating all come from that
+        platform. Reuses the forecasts, fake review scores and eco ratings
+        already computed for this product, computing only the missing ones.
+        
+        Returns:
+            dict with 'overall', 'scores' (per component), 'platform', 'rating' and 'recommendation'
+        """
+        def compute():
+            review_scores = self.fake_reviews()
+            fake_pct = review_scores['fake_percentage'] if review_scores is not None else 0
+            eco_ratings = self.eco_ratings(user_pin)
+            candidates = self.available_platforms() or list(eco_ratings)
+            platform = next((p for p in candidates if p in eco_ratings), candidates[0] if candidates else 'Amazon')
+            eco_color = eco_ratings.get(platform, {}).get('color', 'yellow')
+            price_forecast = (self.price_forecasts() or {}).get(platform)
+            sales_forecast = (self.sales_forecasts() or {}).get(platform)
+            
+            overall, scores = self.score_calc.calculate_overall_score(
+                fake_pct,
+                price_forecast,
+                sales_forecast,
+                eco_color,
+                platform
+            )
+            rating, recommendation = self.score_calc.get_score_interpretation(overall)
+            return {
+                'overall': float(overall),
+                'scores': {key: float(value) for key, value in scores.items()},
+                'platform': platform,
+                'rating': rating,
+                'recommendation': recommendation
+            }
+        return self._memo('overall_score', compute, user_pin=user_pin)
+    
+    def score_metrics(self, user_pin):
+        """
+        Score inputs for every platform the product is sold on
+        
+        Returns:
+            DataFrame with one row per platform in the columns expected by
+            ProductScoreCalculator.calculate_batch_scores, plus 'product'
+        """
+        eco_ratings = self.eco_ratings(user_pin)
+        platforms = list(eco_ratings.keys())
+        price_forecasts = self.price_forecasts() or {}
+        sales_forecasts = self.sales_forecasts() or {}
+        price_cv, _ = self.score_calc.forecast_metrics([price_forecasts.get(p) for p in platforms])
+        _, sales_slope = self.score_calc.forecast_metrics([sales_forecasts.get(p) for p in platforms])
+        
+        # Platform-level fake review share where available, the product-level one otherwise
+        review_scores = self.fake_reviews()
+        fake_pct = pd.Series(review_scores['fake_percentage'] if review_scores is not None else 0, index=platforms,
+                             dtype=float)
+        if review_scores is not None and review_scores['by_group'] is not None:
+            by_platform = review_scores['by_group']['fake_percentage']
+            fake_pct.update(by_platform[by_platform.index.isin(platforms)])
+        
+        return pd.DataFrame({
+            'product': self.product,
+            'platform': platforms,
+            'fake_review_pct': fake_pct.to_numpy(),
+            'price_cv': price_cv,
+            'sales_slope_pct': sales_slope,
+            'eco_color': [eco_ratings[p]['color'] for p in platforms]
+        })
+    
+    def platform_scores(self, user_pin, weights=None):
+        """
+        Overall score of every platform the product is sold on
+        
+        Returns:
+            DataFrame from ProductScoreCalculator.calculate_batch_scores, best first
+        """
+        scores = self.score_calc.calculate_batch_scores(self.score_metrics(user_pin), weights=weights)
+        return scores.sort_values('rank', kind='stable').reset_index(drop=True)
+    
+    def matches_snapshot(self, snapshot):
+        """Check whether a snapshot was built from this data, detector, settings and forecast backend"""
+        return (snapshot is not None and snapshot.get('data_hash') == self.data_hash
+                and snapshot.get('model_version') == self.model_version
+                and snapshot.get('periods') == self.periods
+                and snapshot.get('backend') == self.backend
+                and snapshot.get('fake_threshold') == self.fake_threshold)
+    
+    def seed_from_snapshot(self, snapshot):
+        """
+        Reuse a matching snapshot's results instead of recomputing them
+        
+        Returns:
+            bool: whether the snapshot was used
+        """
+        if not self.matches_snapshot(snapshot):
+            return False
+        with self._lock:
+            for key in SNAPSHOT_RESULTS:
+                self._results.setdefault(key, snapshot[key])
+        return True
+    
+    def to_snapshot(self):
+        """
+        Compute every user-independent result
+        
+        Eco ratings and the overall score depend on the user's pin code and
+        are not included.
+        
+        Returns:
+            dict snapshot, or None if the product's data cannot be loaded
+        """
+        if self.reviews is None:
+            return None
+        
+        snapshot = {
+            'product': self.product,
+            'data_hash': self.data_hash,
+            'model_version': self.model_version,
+            'periods': self.periods,
+            'backend': self.backend,
+            'fake_threshold': self.fake_threshold,
+            'platform_col': self.platform_col,
+            'created_at': datetime.now().isoformat(timespec='seconds')
+        }
+        for key in SNAPSHOT_RESULTS:
+            snapshot[key] = getattr(self, key)()
+        return snapshot
+
+
+def build_product_snapshot(product, data_loader, detector=None, forecast_store=None, backend='prophet',
+                           n_jobs=1, timeout=None, periods=90, incremental=False, fake_threshold=0.5):
+    """
+    Compute every user-independent analysis for one product
+    
+    Returns:
+        dict snapshot (see ProductAnalysis.to_snapshot), or None if the product's data cannot be loaded
+    """
+    analysis = ProductAnalysis(product, data_loader, detector, forecast_store=forecast_store, backend=backend,
+                               n_jobs=n_jobs, timeout=timeout, periods=periods, incremental=incremental,
+                               fake_threshold=fake_threshold)
+    return analysis.to_snapshot()
+
+
+class SnapshotStore:
+    """
+    Versioned store of published product analytics snapshots
+    
+    Each publish writes a new pickled snapshot file and then atomically
+    points the JSON manifest at it, so readers always see a complete
+    version. Older versions beyond `keep_versions` are pruned. Readers
+    reload the manifest when another process has rewritten it and keep
+    decoded snapshots in an LRU.
+    """
+    
+    MANIFEST_NAME = 'manifest.json'
+    
+    def __init__(self, snapshot_dir, keep_versions=3):
+        self.snapshot_dir = str(snapshot_dir)
+        self.manifest_path = os.path.join(self.snapshot_dir, self.MANIFEST_NAME)
+        self.keep_versions = keep_versions
+        self.cache = LRUCache(max_entries=64, name='snapshots')
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._manifest_mtime = None
+        self._reload_manifest()
+    
+    @staticmethod
+    def product_id(product):
+        return hashlib.sha1(str(product).encode('utf-8')).hexdigest()[:16]
+    
+    def _reload_manifest(self):
+        """Re-read the manifest if another process has rewritten it"""
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            return
+        
+        if mtime == self._manifest_mtime:
+            return
+        
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f).get('products', {})
+            self._manifest_mtime = mtime
+        except Exception as e:
+            record_error(f"Error reading snapshot manifest: {str(e)}")
+    
+    def _write_manifest(self):
+        """Atomically replace the manifest on disk"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'products': self._entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_mtime = os.path.getmtime(self.manifest_path)
+    
+    def get_entry(self, product):
+        """Get the manifest entry of a product's latest snapshot, or None"""
+        with self._lock:
+            self._reload_manifest()
+            entry = self._entries.get(product)
+            return dict(entry) if entry else None
+    
+    def latest(self, product):
+        """
+        Load the latest published snapshot of a product
+        
+        Returns:
+            snapshot dict (shared; treat as read-only), or None
+        """
+        entry = self.get_entry(product)
+        if entry is None:
+            return None
+        
+        cache_key = (product, entry['version'])
+        snapshot = self.cache.get(cache_key)
+        if snapshot is not None:
+            return snapshot
+        
+        try:
+            with open(os.path.join(self.snapshot_dir, entry['file']), 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            record_error(f"Error loading snapshot for {product}: {str(e)}")
+            return None
+        
+        snapshot['version'] = entry['version']
+        self.cache.put(cache_key, snapshot)
+        return snapshot
+    
+    def publish(self, product, snapshot):
+        """
+        Publish a new snapshot version for a product
+        
+        Returns:
+            int: the published version number
+        """
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        product_id = self.product_id(product)
+        
+        with self._lock:
+            self._reload_manifest()
+            previous = self._entries.get(product, {})
+            version = int(previous.get('version', 0)) + 1
+            filename = f'{product_id}-v{version}.pkl'
+            
+            fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, os.path.join(self.snapshot_dir, filename))
+            
+            self._entries[product] = {
+                'version': version,
+                'file': filename,
+                'data_hash': snapshot.get('data_hash'),
+                'model_version': snapshot.get('model_version'),
+                'periods': snapshot.get('periods'),
+                'backend': snapshot.get('backend'),
+                'fake_threshold': snapshot.get('fake_threshold'),
+                'created_at': snapshot.get('created_at')
+            }
+            self._write_manifest()
+        
+        # Drop versions that readers can no longer be pointed at
+        for old_version in range(max(1, version - 10), version - self.keep_versions + 1):
+            try:
+                os.remove(os.path.join(self.snapshot_dir, f'{product_id}-v{old_version}.pkl'))
+            except OSError:
+                pass
+        
+        return version
+    
+    def __len__(self):
+        with self._lock:
+            self._reload_manifest()
+            return len(self._entries)
+
+
+class AnalyticsScheduler:
+    """
+    Recompute product snapshots when inputs change or on a schedule
+    
+    Each cycle compares every product's data hash, the detector version,
+    the horizon, the forecast backend and the fake review threshold with
+    the published manifest and rebuilds only stale snapshots; every
+    `interval` seconds all products are rebuilt regardless. A product's
+    reviews are only reloaded and hashed when the mtime or size of its
+    source files changed.
+    """
+    
+    def __init__(self, data_loader, snapshot_store, detector_registry=None, forecast_store=None,
+                 backend='prophet', n_jobs=1, timeout=None, periods=90, interval=3600, poll_interval=30,
+                 incremental=False, fake_threshold=0.5):
+        self.data_loader = data_loader
+        self.snapshot_store = snapshot_store
+        self.detector_registry = detector_registry
+        self.forecast_store = forecast_store
+        self.backend = backend
+        self.n_jobs = n_jobs
+        self.timeout = timeout
+        self.periods = periods
+        self.incremental = incremental
+        self.fake_threshold = fake_threshold
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self._last_full_run = None
+        # {product: (catalog source signature, data hash)} from the last time its reviews were hashed
+        self._data_hashes = {}
+    
+    def _data_hash(self, product):
+        signature = self.data_loader.catalog.product_signature(product)
+        known = self._data_hashes.get(product)
+        if known is not None and known[0] == signature:
+            return known[1]
+        
+        product_reviews = self.data_loader.load_product_reviews(product)
+        data_hash = hash_dataframe(product_reviews) if product_reviews is not None else None
+        self._data_hashes[product] = (signature, data_hash)
+        return data_hash
+    
+    def _is_stale(self, product, detector):
+        entry = self.snapshot_store.get_entry(product)
+        if (entry is None or entry.get('model_version') != getattr(detector, 'version', None)
+                or entry.get('periods') != self.periods or entry.get('backend') != self.backend
+                or entry.get('fake_threshold') != self.fake_threshold):
+            return True
+        
+        data_hash = self._data_hash(product)
+        return data_hash is None or entry.get('data_hash') != data_hash
+    
+    def run_once(self, force=False):
+        """
+        Rebuild stale (or, with force, all) product snapshots
+        
+        Returns:
+            list of products that were republished
+        """
+        detector = self.detector_registry.get() if self.detector_registry is not None else None
+        self.data_loader.catalog.refresh()
+        published = []
+        
+        for product in self.data_loader.get_available_products():
+            if not force and not self._is_stale(product, detector):
+                continue
+            
+            start = time.time()
+            signature = self.data_loader.catalog.product_signature(product)
+            with span('scheduler.snapshot', product=product):
+                try:
+                    snapshot = build_product_snapshot(
+                        product, self.data_loader, detector, self.forecast_store, self.backend,
+                        self.n_jobs, self.timeout, self.periods, self.incremental, self.fake_threshold
+                    )
+                except Exception as e:
+                    record_error(f"Error building snapshot for {product}: {str(e)}")
+                    continue
+            
+            if snapshot is None:
+                continue
+            version = self.snapshot_store.publish(product, snapshot)
+            self._data_hashes[product] = (signature, snapshot['data_hash'])
+            published.append(product)
+            print(f"✅ {product} v{version} ({time.time() - start:.1f}s)")
+        
+        return published
+    
+    def run_forever(self):
+        """Poll for changes every poll_interval seconds and rebuild everything every interval seconds"""
+        while True:
+            now = time.monotonic()
+            force = self._last_full_run is None or now - self._last_full_run >= self.interval
+            self.run_once(force=force)
+            if force:
+                self._last_full_run = now
+            time.sleep(self.poll_interval)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(snapshot_dir):
+    """Get the process-wide SnapshotStore for a directory"""
+    key = os.path.abspath(str(snapshot_dir))
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = SnapshotStore(snapshot_dir)
+        return _stores[key]
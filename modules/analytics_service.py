@@ -0,0 +1,259 @@
+"""
+Headless analytics service shared by the HTTP API and other callers
+
+Wraps ProductAnalysis with per-product reuse across requests and turns its
+results into JSON-ready dicts. Async callers go through RequestCoalescer so
+that concurrent identical requests share one computation.
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules.analytics import ProductAnalysis
+from modules.cache import LRUCache
+from modules.product_score import ProductScoreCalculator
+from modules.tracing import traced
+
+
+def to_jsonable(value):
+    """Convert analysis results (DataFrames, NumPy values, timestamps) to JSON-ready values"""
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, pd.DataFrame):
+        frame = value.reset_index() if value.index.name is not None else value
+        return to_jsonable(frame.to_dict(orient='records'))
+    if isinstance(value, (pd.Series, np.ndarray)):
+        return to_jsonable(list(value))
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class RequestCoalescer:
+    """
+    Share one in-flight computation between concurrent identical requests
+    
+    The first request for a key runs the blocking function in the executor;
+    requests for the same key that arrive before it finishes await the same
+    future instead of starting their own. Finished results are not kept, so
+    the next request after completion recomputes (or hits lower-level caches).
+    """
+    
+    def __init__(self, executor=None):
+        self.executor = executor
+        self._inflight = {}
+        self.started = 0
+        self.coalesced = 0
+    
+    async def run(self, key, func, *args):
+        """
+        Run func(*args) once per key among concurrent callers
+        
+        Returns:
+            func's result (shared between coalesced callers; treat as read-only)
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, func, *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.started += 1
+        
+        # A cancelled caller must not cancel the computation others are waiting on
+        return await asyncio.shield(future)
+    
+    def stats(self):
+        """Get coalescing statistics"""
+        return {'inflight': len(self._inflight), 'started': self.started, 'coalesced': self.coalesced}
+
+
+class AnalyticsService:
+    """
+    Programmatic access to the analytics shown on product pages
+    
+    One ProductAnalysis is kept per product, data hash and detector version,
+    so forecasts and review scores are computed once and reused across
+    requests until the product's data or the model changes. Published
+    scheduler snapshots are used when they match.
+    """
+    
+    def __init__(self, data_loader, detector_registry=None, carbon_calc=None, snapshot_store=None,
+                 forecast_store=None, backend='prophet', n_jobs=1, timeout=None, periods=90, max_products=32,
+                 score_weights=None, incremental=False, fake_threshold=0.5):
+        self.data_loader = data_loader
+        self.detector_registry = detector_registry
+        self.carbon_calc = carbon_calc
+        self.snapshot_store = snapshot_store
+        self.forecast_store = forecast_store
+        self.backend = backend
+        self.n_jobs = n_jobs
+        self.timeout = timeout
+        self.periods = periods
+        self.score_weights = score_weights
+        self.incremental = incremental
+        self.fake_threshold = fake_threshold
+        self.analyses = LRUCache(max_entries=max_products, max_bytes=None)
+        self._lock = threading.Lock()
+    
+    def get_analysis(self, product):
+        """
+        Get the shared analysis of a product's current data
+        
+        Returns:
+            ProductAnalysis, or None if the product's data cannot be loaded
+        """
+        product_reviews = self.data_loader.load_product_reviews(product)
+        if product_reviews is None:
+            return None
+        
+        detector = self.detector_registry.get() if self.detector_registry is not None else None
+        analysis = ProductAnalysis(product, self.data_loader, detector, carbon_calc=self.carbon_calc,
+                                   forecast_store=self.forecast_store, backend=self.backend, n_jobs=self.n_jobs,
+                                   timeout=self.timeout, periods=self.periods, product_reviews=product_reviews,
+                                   incremental=self.incremental, fake_threshold=self.fake_threshold)
+        key = (product, analysis.data_hash, analysis.model_version)
+        
+        with self._lock:
+            cached = self.analyses.get(key)
+            if cached is not None:
+                return cached
+            if self.snapshot_store is not None:
+                analysis.seed_from_snapshot(self.snapshot_store.latest(product))
+            self.analyses.put(key, analysis)
+            return analysis
+    
+    @traced('service.list_products')
+    def list_products(self, query='', offset=0, limit=50):
+        """Get a page of product names matching a search query, with the total number of matches"""
+        products, total = self.data_loader.search_products(query, offset=offset, limit=limit)
+        return {'products': products, 'total': total, 'offset': offset, 'limit': limit}
+    
+    @traced('service.forecasts')
+    def forecasts(self, product, metric):
+        """
+        Per-platform forecasts and their headline statistics
+        
+        Args:
+            product: product name
+            metric: 'sales' or 'price'
+        
+        Returns:
+            dict, or None if the product's data cannot be loaded
+        """
+        if metric not in ('sales', 'price'):
+            raise ValueError(f"Unknown forecast metric: {metric}")
+        
+        analysis = self.get_analysis(product)
+        if analysis is None:
+            return None
+        
+        forecasts = analysis.sales_forecasts() if metric == 'sales' else analysis.price_forecasts()
+        platforms = {}
+        summary = analysis.forecast_summary(metric) or {}
+        for platform, forecast in (forecasts or {}).items():
+            platforms[platform] = dict(summary[platform])
+            platforms[platform]['forecast'] = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        
+        return to_jsonable({'product': product, 'metric': metric, 'available': forecasts is not None,
+                            'periods': analysis.periods, 'platforms': platforms})
+    
+    @traced('service.fake_reviews')
+    def fake_reviews(self, product):
+        """
+        Fake review statistics, overall and by platform
+        
+        Returns:
+            dict, or None if the product's data cannot be loaded
+        """
+        analysis = self.get_analysis(product)
+        if analysis is None:
+            return None
+        
+        review_scores = analysis.fake_reviews()
+        result = {'product': product, 'available': review_scores is not None,
+                  'model_version': analysis.model_version}
+        if review_scores is not None:
+            result.update({
+                'total_count': review_scores['total_count'],
+                'fake_count': review_scores['fake_count'],
+                'fake_percentage': review_scores['fake_percentage'],
+                'by_platform': ({platform: stats.to_dict() for platform, stats in review_scores['by_group'].iterrows()}
+                                if review_scores['by_group'] is not None else None),
+                'suspicious': [{'probability': probability, 'text': text}
+                               for probability, text in analysis.suspicious_reviews()]
+            })
+        return to_jsonable(result)
+    
+    @traced('service.eco_ratings')
+    def eco_ratings(self, product, user_pin):
+        """
+        Eco-friendliness rating of each platform for shipping to a pin code
+        
+        Returns:
+            dict, or None if the product's data cannot be loaded
+        """
+        analysis = self.get_analysis(product)
+        if analysis is None:
+            return None
+        return to_jsonable({'product': product, 'user_pin': str(user_pin),
+                            'platforms': analysis.eco_ratings(user_pin)})
+    
+    @traced('service.overall_score')
+    def overall_score(self, product, user_pin):
+        """
+        Weighted overall product score for a pin code
+        
+        Returns:
+            dict, or None if the product's data cannot be loaded
+        """
+        analysis = self.get_analysis(product)
+        if analysis is None:
+            return None
+        result = {'product': product, 'user_pin': str(user_pin)}
+        result.update(analysis.overall_score(user_pin))
+        return to_jsonable(result)
+    
+    @traced('service.rankings')
+    def rankings(self, user_pin, query='', limit=50, weights=None):
+        """
+        Rank the product x platform combinations for a pin code in one scoring pass
+        
+        Args:
+            user_pin: user's pin code
+            query: optional catalog search restricting the products
+            limit: number of products to rank (the first matches in catalog order)
+            weights: component weights (defaults to the service's score_weights)
+        
+        Returns:
+            dict with 'rankings': rows of component scores, 'overall' and 'rank', best first
+        """
+        metrics = []
+        for product in self.data_loader.get_available_products(query, limit=limit):
+            analysis = self.get_analysis(product)
+            if analysis is not None:
+                metrics.append(analysis.score_metrics(user_pin))
+        
+        if not metrics:
+            return {'user_pin': str(user_pin), 'rankings': []}
+        
+        weights = weights if weights is not None else self.score_weights
+        scores = ProductScoreCalculator().calculate_batch_scores(pd.concat(metrics, ignore_index=True),
+                                                                 weights=weights)
+        scores = scores.sort_values('rank', kind='stable')
+        return to_jsonable({'user_pin': str(user_pin), 'rankings': scores.to_dict(orient='records')})
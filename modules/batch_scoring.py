@@ -0,0 +1,122 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from modules.fake_review_detector import FakeReviewDetector, TEXT_COLUMNS, STRUCTURED_FEATURES
+
+# Detector loaded once per worker process by _init_worker
+_worker_detector = None
+
+
+def _init_worker(model_path):
+    global _worker_detector
+    _worker_detector = FakeReviewDetector()
+    _worker_detector.load(model_path)
+
+
+def _score_chunk_in_worker(features, text_col):
+    return _worker_detector.predict(features, text_col=text_col)
+
+
+def detect_text_column(csv_path):
+    """Find the review text column from the CSV header"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    for col in header:
+        if col.lower() in TEXT_COLUMNS:
+            return col
+    raise ValueError(f"Could not identify text column. Columns: {header.tolist()}")
+
+
+def _format_output(chunk, probs, keep_cols, threshold):
+    """Build the output rows for one scored chunk"""
+    output = chunk[keep_cols].copy() if keep_cols else pd.DataFrame(index=chunk.index)
+    output['fake_probability'] = np.round(probs, 6)
+    output['is_fake'] = (probs >= threshold).astype(np.int8)
+    return output
+
+
+def score_csv(input_path, output_path, model_path, text_col=None, keep_cols=None,
+              chunksize=50000, n_jobs=1, threshold=0.5, verbose=True):
+    """
+    Stream a review CSV through the fake review detector
+    
+    The input is read in chunks of `chunksize` rows, each chunk is
+    vectorized and scored independently (optionally in worker processes),
+    and results are appended to the output CSV in input order. Memory
+    stays bounded by the chunk size times the number of chunks in flight.
+    
+    Args:
+        input_path: CSV with a review text column (structured signal columns are used when present)
+        output_path: CSV to write (keep_cols + fake_probability + is_fake)
+        model_path: saved FakeReviewDetector artifact
+        text_col: review text column (detected from the header if None)
+        keep_cols: input columns copied to the output (e.g. review_id)
+        chunksize: rows per chunk
+        n_jobs: worker processes (1 = score in-process)
+        threshold: probability threshold for is_fake
+        verbose: print progress and throughput
+    
+    Returns:
+        dict: {'rows', 'fake_count', 'seconds', 'rows_per_second'}
+    """
+    text_col = text_col or detect_text_column(input_path)
+    keep_cols = [col for col in (keep_cols or []) if col != text_col]
+    
+    # Structured review signals are read alongside the text when the export has them
+    header = pd.read_csv(input_path, nrows=0).columns
+    signal_cols = [col for col in STRUCTURED_FEATURES if col in header]
+    feature_cols = [text_col] + signal_cols
+    usecols = list(dict.fromkeys(feature_cols + keep_cols))
+    
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    
+    start = time.perf_counter()
+    stats = {'rows': 0, 'fake_count': 0}
+    
+    def write(chunk, probs):
+        output = _format_output(chunk, probs, keep_cols, threshold)
+        output.to_csv(output_path, mode='a', header=stats['rows'] == 0, index=False)
+        stats['rows'] += len(output)
+        stats['fake_count'] += int(output['is_fake'].sum())
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"  {stats['rows']:,} rows scored ({stats['rows'] / elapsed:,.0f} rows/s)")
+    
+    chunks = pd.read_csv(input_path, usecols=usecols, chunksize=chunksize)
+    
+    if n_jobs and n_jobs > 1:
+        # Keep a bounded window of chunks in flight and write them in order
+        max_in_flight = n_jobs * 2
+        in_flight = deque()
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(str(model_path),)
+        ) as executor:
+            for chunk in chunks:
+                chunk[text_col] = chunk[text_col].fillna('').astype(str)
+                in_flight.append((chunk, executor.submit(_score_chunk_in_worker, chunk[feature_cols], text_col)))
+                if len(in_flight) >= max_in_flight:
+                    done_chunk, future = in_flight.popleft()
+                    write(done_chunk, future.result())
+            while in_flight:
+                done_chunk, future = in_flight.popleft()
+                write(done_chunk, future.result())
+    else:
+        detector = FakeReviewDetector()
+        detector.load(str(model_path))
+        for chunk in chunks:
+            chunk[text_col] = chunk[text_col].fillna('').astype(str)
+            write(chunk, detector.predict(chunk[feature_cols], text_col=text_col))
+    
+    seconds = time.perf_counter() - start
+    stats['seconds'] = seconds
+    stats['rows_per_second'] = stats['rows'] / seconds if seconds > 0 else 0.0
+    return stats
@@ -0,0 +1,128 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modules.tracing import TRACER, record_cache
+
+
+def hash_dataframe(df):
+    """
+    Compute a stable content hash for a DataFrame
+    
+    The hash depends only on column names and values (not on the index
+    or on object identity), so the same series prepared in two different
+    sessions or processes produces the same key.
+    
+    Args:
+        df: DataFrame to hash
+    
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update(','.join(map(str, df.columns)).encode('utf-8'))
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    digest.update(np.ascontiguousarray(row_hashes).tobytes())
+    return digest.hexdigest()
+
+
+def estimate_size(value):
+    """Approximate in-memory size of a cached value in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and approximate memory
+    
+    Named caches report their lookups to the tracer and export their stats
+    as metrics.
+    """
+    
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024, name=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.name = name
+        if name is not None:
+            TRACER.register_cache(name, self)
+    
+    def get(self, key, default=None):
+        """Return cached value for key and mark it as recently used"""
+        with self._lock:
+            hit = key in self._entries
+            if hit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = self._entries[key][0]
+            else:
+                self.misses += 1
+                value = default
+        if self.name is not None:
+            record_cache(self.name, hit)
+        return value
+    
+    def put(self, key, value):
+        """Store value under key, evicting least recently used entries as needed"""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            
+            # Values larger than the whole budget are never cached
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            
+            while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+    
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def clear(self):
+        """Remove all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -1,21 +1,20 @@
 import pandas as pd
 import numpy as np
-import math
+
+from modules.cache import LRUCache, hash_dataframe
+from modules.geo import get_pincode_index, haversine
+from modules.tracing import add_rows, record_error, traced
+from modules.data_loader import normalize_product_name
+from modules.warehouse_network import WarehouseNetwork
+
+
+# Platform ratings per (warehouses, user pin, platforms, weight, product), shared by every session
+RATINGS_CACHE = LRUCache(max_entries=4096, max_bytes=16 * 1024 * 1024, name='eco_ratings')
 
 
 class CarbonEmissionsCalculator:
     """Calculate carbon emissions based on warehouse and user pin codes"""
     
-    # Approximate coordinates for Indian pin codes (latitude, longitude)
-    PIN_CODE_COORDINATES = {
-        # Major metro areas - these are examples
-        '110001': (28.6139, 77.2090),  # Delhi
-        '400001': (19.0760, 72.8777),  # Mumbai
-        '560001': (12.9716, 77.5946),  # Bangalore
-        '700001': (22.5726, 88.3639),  # Kolkata
-        '600001': (13.0827, 80.2707),  # Chennai
-    }
-    
     # Carbon emissions per km per kg of product
     # Different for different modes of transport
     EMISSION_FACTORS = {
@@ -25,70 +24,73 @@ class CarbonEmissionsCalculator:
         'ship': 0.010      # kg CO2 per ton-km → 0.010 g CO2 per kg-km
     }
     
-    def __init__(self):
+    # Upper emission bounds (kg CO2) for each eco-friendliness rating
+    RATING_THRESHOLDS = np.array([0.5, 1.0, 1.5, 2.5])
+    RATING_LABELS = np.array(['Excellent', 'Good', 'Moderate', 'High', 'Very High'])
+    RATING_COLORS = np.array(['green', 'green', 'yellow', 'orange', 'red'])
+    
+    # Warehouse assumed for platforms without warehouse data
+    DEFAULT_WAREHOUSE_PIN = '110001'
+    
+    def __init__(self, pincode_index=None, cache=RATINGS_CACHE):
+        """
+        Args:
+            pincode_index: PincodeIndex for geocoding (defaults to the shared bundled index)
+            cache: LRUCache memoizing get_all_platform_ratings (None disables caching)
+        """
         self.warehouse_data = {}
+        self.network = None
+        self.warehouse_version = None
+        self.cache = cache
+        # Region x warehouse emissions per product weight, rebuilt when warehouses load
+        self.region_matrices = LRUCache(max_entries=16)
+        self._region_distance = None
+        self.pincode_index = pincode_index if pincode_index is not None else get_pincode_index()
     
     def load_warehouse_data(self, csv_path):
-        """Load warehouse locations from CSV"""
+        """Load warehouse locations from CSV and precompute the region emissions matrix"""
+        self.region_matrices.clear()
+        self._region_distance = None
         try:
-            df = pd.read_csv(csv_path)
-            
-            # Try to identify relevant columns
-            pin_col = None
-            platform_col = None
-            
-            for col in df.columns:
-                if col.lower() in ['pin', 'pincode', 'pin_code', 'warehouse_pin', 'warehouse_zip_code', 'warehouse_zipcode']:
-                    pin_col = col
-                if col.lower() in ['platform', 'marketplace', 'seller']:
-                    platform_col = col
+            self.network = WarehouseNetwork.from_csv(csv_path, self.pincode_index)
+            self.warehouse_version = hash_dataframe(self.network.get_warehouses()[['pin', 'platform', 'product']])
+            self.get_region_emissions_matrix()
             
-            if pin_col:
-                if platform_col and platform_col in df.columns:
-                    for _, row in df.iterrows():
-                        platform = str(row[platform_col]).strip()
-                        self.warehouse_data[platform] = str(row[pin_col]).strip()
-                else:
-                    # Default platforms if not specified
-                    if len(df) >= 1:
-                        self.warehouse_data['Amazon'] = str(df[pin_col].iloc[0]).strip()
-                    if len(df) >= 2:
-                        self.warehouse_data['Flipkart'] = str(df[pin_col].iloc[1]).strip()
-                    if len(df) >= 3:
-                        self.warehouse_data['eBay'] = str(df[pin_col].iloc[2]).strip()
+            # First listed warehouse per platform, for callers that need a single pin
+            for pin, platform in zip(self.network.pins, self.network.platforms):
+                self.warehouse_data.setdefault(platform, pin)
         except Exception as e:
-            print(f"Error loading warehouse data: {str(e)}")
+            record_error(f"Error loading warehouse data: {str(e)}")
     
     def get_coordinates(self, pin_code):
         """Get approximate coordinates for a pin code"""
-        pin_str = str(pin_code).strip()
-        
-        if pin_str in self.PIN_CODE_COORDINATES:
-            return self.PIN_CODE_COORDINATES[pin_str]
-        
-        # Generate approximate coordinates based on pin code
-        # This is a simplified approach - in production, use geolocation API
-        lat = 10 + (hash(pin_str) % 30)
-        lon = 65 + (hash(pin_str) % 40)
+        return self.pincode_index.get(pin_code)
+    
+    def get_coordinates_array(self, pin_codes):
+        """
+        Get coordinates for an array of pin codes
         
-        return lat, lon
+        Returns:
+            tuple: (latitudes, longitudes) as float arrays shaped like pin_codes
+        """
+        return self.pincode_index.lookup(pin_codes)
+    
+    @staticmethod
+    def haversine(lat1, lon1, lat2, lon2):
+        """Great-circle distance in km between (broadcastable) coordinate arrays"""
+        return haversine(lat1, lon1, lat2, lon2)
     
     def calculate_distance(self, pin1, pin2):
         """Calculate distance between two pin codes using Haversine formula"""
         lat1, lon1 = self.get_coordinates(pin1)
         lat2, lon2 = self.get_coordinates(pin2)
         
-        R = 6371  # Earth's radius in km
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-        
-        a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        return R * c
+        return float(self.haversine(lat1, lon1, lat2, lon2))
+    
+    @staticmethod
+    def select_transport_mode(distance):
+        """Pick the transport mode for each distance (rail beyond 2000 km, road otherwise)"""
+        return np.where(np.asarray(distance) > 2000, 'rail', 'road')
     
     def calculate_emissions(self, warehouse_pin, user_pin, product_weight=1.0, transport_mode='road'):
         """
@@ -111,46 +113,122 @@ class CarbonEmissionsCalculator:
         
         return emissions
     
-    def get_platform_emissions(self, user_pin, platforms=None, product_weight=1.0):
+    def calculate_batch(self, warehouse_pins=None, user_pins=None, product_weight=1.0, transport_mode=None,
+                        warehouse_coords=None, user_coords=None):
         """
-        Calculate emissions for multiple platforms
+        Calculate distances, emissions and ratings for many shipments at once
+        
+        Warehouses and users are given either as pin codes or as (lat, lon)
+        coordinate arrays; all inputs broadcast together, so e.g. user pins of
+        shape (n, 1) against warehouse pins of shape (m,) give an n x m grid.
         
         Args:
-            user_pin: user's pin code
-            platforms: list of platform names (if None, use all available)
-            product_weight: weight of product in kg
+            warehouse_pins: array of warehouse pin codes
+            user_pins: array of user pin codes
+            product_weight: weight of product in kg (scalar or array)
+            transport_mode: fixed mode or array of modes (None picks by distance)
+            warehouse_coords: (lat, lon) arrays used instead of warehouse_pins
+            user_coords: (lat, lon) arrays used instead of user_pins
             
         Returns:
-            dict: {platform: emissions in kg}
+            dict of NumPy arrays: {'distance', 'mode', 'emissions', 'rating', 'color'}
+        """
+        if warehouse_coords is None:
+            warehouse_coords = self.get_coordinates_array(warehouse_pins)
+        if user_coords is None:
+            user_coords = self.get_coordinates_array(user_pins)
+        
+        distance = self.haversine(warehouse_coords[0], warehouse_coords[1], user_coords[0], user_coords[1])
+        return self._emissions_from_distance(distance, product_weight, transport_mode)
+    
+    def _emissions_from_distance(self, distance, product_weight=1.0, transport_mode=None):
+        """Turn a distance array into the mode/emissions/rating arrays of calculate_batch"""
+        if transport_mode is None:
+            modes = self.select_transport_mode(distance)
+        else:
+            modes = np.broadcast_to(np.asarray(transport_mode, dtype=str), distance.shape)
+        
+        emission_factor = np.full(distance.shape, self.EMISSION_FACTORS['road'])
+        for mode, factor in self.EMISSION_FACTORS.items():
+            emission_factor[modes == mode] = factor
+        
+        emissions = (distance * emission_factor * product_weight) / 1000  # Convert grams to kg
+        
+        rating_index = np.digitize(emissions, self.RATING_THRESHOLDS)
+        
+        return {
+            'distance': distance,
+            'mode': np.asarray(modes),
+            'emissions': emissions,
+            'rating': self.RATING_LABELS[rating_index],
+            'color': self.RATING_COLORS[rating_index]
+        }
+    
+    def _resolve_warehouses(self, platforms, user_lat, user_lon, product_name=None):
+        """
+        Pick the shipping warehouse for each user and platform
+        
+        With a warehouse network loaded, each user is routed to the nearest
+        warehouse that fulfils product_name on the platform; platforms without
+        warehouses ship from the default warehouse.
+        
+        Returns:
+            tuple: (platforms, warehouse pins, warehouse lats, warehouse lons, known mask);
+                   pins and coordinates have shape (n_users, n_platforms)
         """
         if platforms is None:
-            platforms = list(self.warehouse_data.keys())
+            platforms = self.network.get_platforms() if self.network is not None else list(self.warehouse_data.keys())
         
         # If no warehouse data is loaded, use default platforms
         if not platforms:
             platforms = ['Amazon', 'Flipkart', 'eBay', 'Myntra', 'Ajio']
+        platforms = list(platforms)
         
-        emissions = {}
-        
-        for platform in platforms:
-            if platform in self.warehouse_data:
-                warehouse_pin = self.warehouse_data[platform]
-                # Determine transport mode based on distance (simplified)
-                distance = self.calculate_distance(warehouse_pin, user_pin)
-                
-                if distance > 2000:
-                    mode = 'rail'
-                elif distance > 500:
-                    mode = 'road'
-                else:
-                    mode = 'road'
-                
-                emissions[platform] = self.calculate_emissions(warehouse_pin, user_pin, product_weight, mode)
-            else:
-                # Default calculation for unknown platforms
-                emissions[platform] = self.calculate_emissions('110001', user_pin, product_weight, 'road')
+        n_users = len(user_lat)
+        default_lat, default_lon = self.get_coordinates(self.DEFAULT_WAREHOUSE_PIN)
+        pins = np.full((n_users, len(platforms)), self.DEFAULT_WAREHOUSE_PIN, dtype=object)
+        lat = np.full((n_users, len(platforms)), default_lat)
+        lon = np.full((n_users, len(platforms)), default_lon)
+        known = np.zeros(len(platforms), dtype=bool)
         
-        return emissions
+        for j, platform in enumerate(platforms):
+            rows = None
+            if self.network is not None:
+                rows, _ = self.network.nearest(platform, user_lat, user_lon, product_name)
+            if rows is not None:
+                pins[:, j] = self.network.pins[rows]
+                lat[:, j] = self.network.lat[rows]
+                lon[:, j] = self.network.lon[rows]
+                known[j] = True
+            elif platform in self.warehouse_data:
+                lat[:, j], lon[:, j] = self.get_coordinates(self.warehouse_data[platform])
+                pins[:, j] = self.warehouse_data[platform]
+                known[j] = True
+        
+        return platforms, pins, lat, lon, known
+    
+    def get_platform_emissions(self, user_pin, platforms=None, product_weight=1.0, product_name=None):
+        """
+        Calculate emissions for multiple platforms
+        
+        Args:
+            user_pin: user's pin code
+            platforms: list of platform names (if None, use all available)
+            product_weight: weight of product in kg
+            product_name: optional product, to ship from warehouses that stock it
+            
+        Returns:
+            dict: {platform: emissions in kg}
+        """
+        user_lat, user_lon = self.get_coordinates_array([user_pin])
+        platforms, _, lat, lon, known = self._resolve_warehouses(platforms, user_lat, user_lon, product_name)
+        distance = self.haversine(lat[0], lon[0], user_lat, user_lon)
+        
+        # Unknown platforms ship from the default warehouse by road
+        modes = np.where(known, self.select_transport_mode(distance), 'road')
+        result = self._emissions_from_distance(distance, product_weight, modes)
+        
+        return dict(zip(platforms, result['emissions'].tolist()))
     
     def get_eco_friendliness_rating(self, emissions):
         """
@@ -173,7 +251,8 @@ class CarbonEmissionsCalculator:
         else:
             return 'Very High', 'red', f'{emissions:.3f} kg CO2 - Very High Impact'
     
-    def get_all_platform_ratings(self, user_pin, platforms=None, product_weight=1.0):
+    @traced('eco.ratings')
+    def get_all_platform_ratings(self, user_pin, platforms=None, product_weight=1.0, product_name=None):
         """
         Get eco-friendliness ratings for all platforms
         
@@ -181,46 +260,113 @@ class CarbonEmissionsCalculator:
             user_pin: user's pin code
             platforms: list of platform names
             product_weight: weight of product in kg
+            product_name: optional product, to ship from the nearest warehouse that stocks it
             
         Returns:
-            dict: {platform: {'emissions': float, 'distance': float, 'rating': str, 'color': str, 'description': str}}
+            dict: {platform: {'emissions': float, 'distance': float, 'rating': str, 'color': str,
+                              'description': str, 'warehouse_pin': str}}
         """
-        if platforms is None:
-            platforms = list(self.warehouse_data.keys())
+        cache_key = None
+        if self.cache is not None:
+            cache_key = (
+                self.warehouse_version,
+                str(user_pin).strip(),
+                tuple(platforms) if platforms is not None else None,
+                float(product_weight),
+                normalize_product_name(product_name) if product_name else None
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return {platform: dict(rating) for platform, rating in cached.items()}
         
-        # If no warehouse data is loaded, use default platforms
-        if not platforms:
-            platforms = ['Amazon', 'Flipkart', 'eBay', 'Myntra', 'Ajio']
+        user_coords = self.get_coordinates_array([user_pin])
+        platforms, pins, lat, lon, _ = self._resolve_warehouses(platforms, *user_coords, product_name)
+        result = self.calculate_batch(product_weight=product_weight, warehouse_coords=(lat[0], lon[0]),
+                                      user_coords=user_coords)
+        add_rows(len(platforms))
         
         ratings = {}
-        for platform in platforms:
-            if platform in self.warehouse_data:
-                warehouse_pin = self.warehouse_data[platform]
-            else:
-                # Use default warehouse for unknown platforms
-                warehouse_pin = '110001'
-            
-            # Calculate distance
-            distance = self.calculate_distance(warehouse_pin, user_pin)
-            
-            # Calculate emissions
-            if distance > 2000:
-                mode = 'rail'
-            elif distance > 500:
-                mode = 'road'
-            else:
-                mode = 'road'
-            
-            emissions = self.calculate_emissions(warehouse_pin, user_pin, product_weight, mode)
-            
-            # Get rating
+        for i, platform in enumerate(platforms):
+            emissions = float(result['emissions'][i])
             rating, color, description = self.get_eco_friendliness_rating(emissions)
             ratings[platform] = {
                 'emissions': emissions,
-                'distance': distance,
+                'distance': float(result['distance'][i]),
                 'rating': rating,
                 'color': color,
-                'description': description
+                'description': description,
+                'warehouse_pin': pins[0, i]
             }
         
+        if cache_key is not None:
+            self.cache.put(cache_key, {platform: dict(rating) for platform, rating in ratings.items()})
+        
         return ratings
+    
+    @traced('eco.rating_table')
+    def get_rating_table(self, user_pins, platforms=None, product_weight=1.0, product_name=None):
+        """
+        Precompute eco ratings for every user pin x platform pair
+        
+        Args:
+            user_pins: iterable of user pin codes
+            platforms: list of platform names (if None, use all available)
+            product_weight: weight of product in kg
+            product_name: optional product, to ship from warehouses that stock it
+            
+        Returns:
+            DataFrame with user_pin, platform, warehouse_pin, distance, mode, emissions,
+            rating, color columns
+        """
+        user_pins = np.asarray(list(user_pins)).astype(str)
+        user_lat, user_lon = self.get_coordinates_array(user_pins)
+        platforms, pins, lat, lon, _ = self._resolve_warehouses(platforms, user_lat, user_lon, product_name)
+        
+        result = self.calculate_batch(product_weight=product_weight, warehouse_coords=(lat, lon),
+                                      user_coords=(user_lat[:, np.newaxis], user_lon[:, np.newaxis]))
+        add_rows(len(user_pins) * len(platforms))
+        
+        table = pd.DataFrame({
+            'user_pin': np.repeat(user_pins, len(platforms)),
+            'platform': np.tile(np.asarray(platforms, dtype=object), len(user_pins)),
+            'warehouse_pin': pins.ravel()
+        })
+        for column in ['distance', 'mode', 'emissions', 'rating', 'color']:
+            table[column] = result[column].ravel()
+        
+        return table
+    
+    def get_region_emissions_matrix(self, product_weight=1.0):
+        """
+        Emissions from every warehouse to every indexed pin-code region
+        
+        The matrix is built once per product weight and reused until
+        warehouses are reloaded, so callers must treat it as read-only.
+        
+        Args:
+            product_weight: weight of product in kg
+            
+        Returns:
+            dict: {'regions', 'warehouse_pins', 'platforms', 'products'} labels plus the
+                  calculate_batch arrays, each of shape (n_regions, n_warehouses)
+        """
+        if self.network is None:
+            return None
+        
+        key = float(product_weight)
+        result = self.region_matrices.get(key)
+        if result is not None:
+            return result
+        
+        if self._region_distance is None:
+            self._region_distance = self.network.region_distance_matrix()
+        regions, distance = self._region_distance
+        result = self._emissions_from_distance(distance, product_weight)
+        result.update({
+            'regions': regions,
+            'warehouse_pins': self.network.pins,
+            'platforms': self.network.platforms,
+            'products': self.network.products
+        })
+        self.region_matrices.put(key, result)
+        return result
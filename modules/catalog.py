@@ -0,0 +1,195 @@
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modules.data_store import get_data_store
+
+
+TEXT_COLUMNS = ['review_text', 'text', 'review', 'content']
+
+
+class _CatalogSnapshot:
+    """One build of the index; never modified, so readers see it whole while the next build runs"""
+    
+    def __init__(self, ranges, signature):
+        names = sorted(ranges, key=str.lower)
+        self.ranges = ranges
+        self.names = np.array(names, dtype=object)
+        self.search_keys = np.array([name.lower() for name in names], dtype=str)
+        self.signature = signature
+        self.sources = {filename: tuple(rest) for filename, *rest in signature or ()}
+
+
+class CatalogIndex:
+    """
+    Index of every product in the data directory
+    
+    Review tables are discovered by scanning the data store, and each product
+    is mapped to the (file, start row, stop row) ranges holding its reviews,
+    read from the memory-mapped product_name codes without loading the tables.
+    Product names are kept in a sorted array for search and pagination, and
+    reviews are only loaded when a product is opened. build() swaps in a whole
+    new snapshot of the index, so concurrent readers never mix two builds.
+    """
+    
+    def __init__(self, store, aliases=None):
+        """
+        Args:
+            store: DataStore holding the data directory
+            aliases: optional {display name: file name} for single-product files
+        """
+        self.store = store
+        self.aliases = {filename: name for name, filename in (aliases or {}).items()}
+        self._snapshot = _CatalogSnapshot({}, None)
+        self.build()
+    
+    @property
+    def names(self):
+        """Sorted array of product names"""
+        return self._snapshot.names
+    
+    @property
+    def signature(self):
+        """(file, mtime, size) of every table as of the last build"""
+        return self._snapshot.signature
+    
+    def _table_signature(self):
+        signature = []
+        for filename in self.store.list_tables():
+            try:
+                signature.append((filename,) + tuple(self.store.source_signature(filename).values()))
+            except OSError:
+                continue
+        return tuple(signature)
+    
+    def build(self):
+        """Scan the data store and rebuild the product -> row range index"""
+        ranges = {}
+        signature = self._table_signature()
+        
+        for filename, *_ in signature:
+            schema = self.store.get_schema(filename)
+            if schema is None:
+                continue
+            columns = [entry['name'] for entry in schema['columns']]
+            if not any(col.lower() in TEXT_COLUMNS for col in columns):
+                continue
+            
+            names = self.store.load_column(filename, 'product_name') if 'product_name' in columns else None
+            alias = self.aliases.get(filename)
+            
+            if names is not None:
+                if isinstance(names, pd.Categorical):
+                    codes, categories = np.asarray(names.codes), names.categories
+                else:
+                    codes, categories = pd.factorize(np.asarray(names, dtype=object))
+            
+            if names is None and not alias:
+                # Review text without products (e.g. model training data)
+                continue
+            
+            if names is None or (alias and len(categories) <= 1):
+                # Whole file is one product
+                ranges.setdefault(alias, []).append((filename, 0, schema['rows']))
+                continue
+            
+            # Runs of consecutive rows with the same product
+            boundaries = np.flatnonzero(np.diff(codes)) + 1
+            starts = np.concatenate([[0], boundaries])
+            stops = np.concatenate([boundaries, [len(codes)]])
+            for start, stop in zip(starts, stops):
+                if codes[start] < 0:
+                    continue
+                ranges.setdefault(str(categories[codes[start]]), []).append((filename, int(start), int(stop)))
+        
+        self._snapshot = _CatalogSnapshot(ranges, signature)
+    
+    def refresh(self):
+        """Rebuild the index if files were added, removed or changed"""
+        if self._table_signature() != self.signature:
+            self.build()
+    
+    def __len__(self):
+        return len(self._snapshot.names)
+    
+    def __contains__(self, product_name):
+        return product_name in self._snapshot.ranges
+    
+    def search(self, query='', offset=0, limit=50):
+        """
+        Find products whose name contains every word of the query
+        
+        Args:
+            query: search text (empty matches all products)
+            offset: index of the first result to return
+            limit: page size (None returns all remaining results)
+        
+        Returns:
+            tuple: (list of product names, total number of matches)
+        """
+        snapshot = self._snapshot
+        mask = np.ones(len(snapshot.search_keys), dtype=bool)
+        for token in str(query or '').lower().split():
+            mask &= np.char.find(snapshot.search_keys, token) >= 0
+        
+        matches = snapshot.names[mask]
+        stop = None if limit is None else offset + limit
+        return matches[offset:stop].tolist(), int(len(matches))
+    
+    def locate(self, product_name):
+        """Get the (file, start row, stop row) ranges holding a product's reviews"""
+        return list(self._snapshot.ranges.get(product_name, []))
+    
+    def product_signature(self, product_name):
+        """
+        Cheap change check for one product's reviews, without loading them
+        
+        Returns:
+            tuple of (file, start row, stop row, file mtime, file size) per range,
+            as of the last build()/refresh()
+        """
+        snapshot = self._snapshot
+        return tuple((filename, start, stop) + snapshot.sources.get(filename, ())
+                     for filename, start, stop in snapshot.ranges.get(product_name, ()))
+    
+    def load_product(self, product_name):
+        """
+        Load the reviews of one product
+        
+        Returns:
+            DataFrame (a fresh copy, safe to modify) or None if the product is unknown
+        """
+        parts = []
+        for filename, start, stop in self.locate(product_name):
+            table = self.store.load_table(filename)
+            if table is not None:
+                parts.append(table.iloc[start:stop])
+        
+        if not parts:
+            return None
+        return pd.concat(parts, ignore_index=True)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(data_dir, aliases=None, check_interval=30.0):
+    """
+    Get the process-wide catalog for a data directory
+    
+    The data directory is re-scanned for changes at most every check_interval seconds.
+    """
+    key = str(Path(data_dir).resolve())
+    with _catalogs_lock:
+        entry = _catalogs.get(key)
+        if entry is None:
+            entry = [CatalogIndex(get_data_store(data_dir), aliases), time.monotonic()]
+            _catalogs[key] = entry
+        elif time.monotonic() - entry[1] >= check_interval:
+            entry[0].refresh()
+            entry[1] = time.monotonic()
+        return entry[0]
@@ -1,12 +1,28 @@
 import pandas as pd
 import os
 import numpy as np
-from datetime import datetime, timedelta
+import re
+import zlib
+
+from modules.cache import LRUCache
+from modules.catalog import CatalogIndex, get_catalog
+from modules.data_store import get_data_store
+from modules.tracing import add_rows, record_error, traced
+
+
+def normalize_product_name(name):
+    """Normalize a product name for matching (lowercase alphanumerics only)"""
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+# Enriched product reviews shared by every session in the process (enrichment is seeded)
+PRODUCT_CACHE = LRUCache(max_entries=128, name='products')
 
 
 class DataLoader:
     """Load and manage data from CSV files"""
     
+    # Display names for the bundled single-product files; other products are discovered by the catalog
     PRODUCT_MAPPING = {
         'Apple iPhone': 'apple_iphone.csv',
         'Nike Revolution': 'nike_revolution.csv',
@@ -15,6 +31,18 @@ class DataLoader:
         'Levis Mens Cotton T-Shirt': 'levis_mens_cotton_tshirt.csv'
     }
     
+    # Price ranges for different products, used for synthetic prices
+    PRODUCT_PRICE_RANGES = {
+        'iphone': (50000, 150000),
+        'nike': (3000, 10000),
+        'cricket': (500, 3000),
+        'prestige': (3000, 15000),
+        'levis': (1000, 5000),
+    }
+    
+    # Base seed for synthetic enrichment; combined with a CRC32 of the product name
+    ENRICHMENT_SEED = 42
+    
     PLATFORM_COLORS = {
         'amazon': '#FF9900',
         'flipkart': '#0A66C2',
@@ -23,31 +51,59 @@ class DataLoader:
         'ajio': '#0066CC'
     }
     
-    def __init__(self, data_dir):
+    def __init__(self, data_dir, store=None, seed=ENRICHMENT_SEED, reference_date=None):
+        """
+        Args:
+            data_dir: directory with the CSV files
+            store: DataStore for typed, shared tables (defaults to the process-wide store)
+            seed: base seed for synthetic enrichment
+            reference_date: fixed end date for synthetic review dates (defaults to the day
+                            the product's data files were last modified)
+        """
         self.data_dir = data_dir
-        self.product_data_cache = {}
+        self.seed = seed
+        self.reference_date = pd.Timestamp(reference_date).normalize() if reference_date is not None else None
+        if store is None:
+            self.store = get_data_store(data_dir)
+            self.catalog = get_catalog(data_dir, self.PRODUCT_MAPPING)
+        else:
+            self.store = store
+            self.catalog = CatalogIndex(store, self.PRODUCT_MAPPING)
         self.cross_platform_data = None
         self.training_data = None
         
+    @traced('data.load_product')
     def load_product_reviews(self, product_name):
-        """Load reviews for a specific product"""
-        if product_name in self.product_data_cache:
-            return self.product_data_cache[product_name]
+        """
+        Load reviews for a specific product
         
-        filename = self.PRODUCT_MAPPING.get(product_name)
-        if not filename:
+        The enriched frame is shared through PRODUCT_CACHE by every session
+        in the process; treat it as read-only.
+        """
+        if product_name not in self.catalog:
             return None
         
-        filepath = os.path.join(self.data_dir, filename)
+        end_date = self.synthetic_end_date(product_name)
+        cache_key = (os.path.abspath(str(self.data_dir)), product_name, self.catalog.signature, self.seed, end_date)
+        df = PRODUCT_CACHE.get(cache_key)
+        if df is not None:
+            add_rows(len(df))
+            return df
+        
+        df = self.catalog.load_product(product_name)
+        if df is None:
+            record_error(f"Error loading {product_name}: data not available")
+            return None
         
         try:
-            df = pd.read_csv(filepath)
             # Add synthetic date and sales columns if they don't exist
-            df = self._enrich_with_time_series_data(df)
-            self.product_data_cache[product_name] = df
+            rng = np.random.default_rng([self.seed, zlib.crc32(product_name.encode('utf-8'))])
+            df = self._enrich_with_time_series_data(df, rng, end_date)
+            PRODUCT_CACHE.put(cache_key, df)
+            add_rows(len(df))
             return df
         except Exception as e:
-            print(f"Error loading {product_name}: {str(e)}")
+            record_error(f"Error loading {product_name}: {str(e)}")
             return None
     
     def load_cross_platform_data(self):
@@ -55,15 +111,13 @@ class DataLoader:
         if self.cross_platform_data is not None:
             return self.cross_platform_data
         
-        filepath = os.path.join(self.data_dir, 'cross_platform_products.csv')
-        
-        try:
-            df = pd.read_csv(filepath)
-            self.cross_platform_data = df
-            return df
-        except Exception as e:
-            print(f"Error loading cross-platform data: {str(e)}")
+        df = self.store.load_table('cross_platform_products.csv')
+        if df is None:
+            record_error("Error loading cross-platform data")
             return None
+        
+        self.cross_platform_data = df
+        return df
     
     def load_training_data(self):
         """Load training data for ML models"""
@@ -77,18 +131,33 @@ class DataLoader:
             filepath = os.path.join(self.data_dir, filename)
             try:
                 if os.path.exists(filepath):
-                    df = pd.read_csv(filepath)
-                    self.training_data = df
-                    return df
+                    df = self.store.load_table(filename)
+                    if df is not None:
+                        self.training_data = df
+                        return df
             except Exception as e:
                 continue
         
-        print("Error loading training data")
+        record_error("Error loading training data")
         return None
     
-    def get_available_products(self):
-        """Get list of available products"""
-        return list(self.PRODUCT_MAPPING.keys())
+    def get_available_products(self, query='', offset=0, limit=None):
+        """Get list of available products, optionally filtered and paginated"""
+        return self.catalog.search(query, offset, limit)[0]
+    
+    def search_products(self, query='', offset=0, limit=50):
+        """
+        Search the product catalog
+        
+        Args:
+            query: words that must all appear in the product name
+            offset: index of the first result
+            limit: page size
+            
+        Returns:
+            tuple: (list of product names, total number of matches)
+        """
+        return self.catalog.search(query, offset, limit)
     
     def get_platform_color(self, platform_name):
         """Get color for a platform"""
@@ -141,57 +210,79 @@ class DataLoader:
                 return col
         return None
     
-    def _enrich_with_time_series_data(self, df):
-        """Add synthetic date, price and sales columns if not present"""
+    def synthetic_end_date(self, product_name):
+        """
+        Date that a product's synthetic review dates run up to
+        
+        Taken from the modification time of the product's data files, so
+        the generated history is the same from one day to the next and only
+        moves forward when the data itself is updated.
+        """
+        if self.reference_date is not None:
+            return self.reference_date
+        mtimes = [part[3] for part in self.catalog.product_signature(product_name) if len(part) > 3]
+        if not mtimes:
+            return pd.Timestamp.now().normalize()
+        return pd.Timestamp.fromtimestamp(max(mtimes)).normalize()
+    
+    def _enrich_with_time_series_data(self, df, rng=None, end_date=None):
+        """
+        Add synthetic date, price and sales columns if not present
+        
+        All columns are generated in vectorized form from one seeded
+        generator, so the same product gets the same synthetic history in
+        every session, process and day.
+        
+        Args:
+            df: DataFrame to enrich in place
+            rng: numpy.random.Generator (defaults to one seeded with ENRICHMENT_SEED)
+            end_date: day after the last synthetic date (defaults to today)
+        """
+        if rng is None:
+            rng = np.random.default_rng(self.seed)
+        n_rows = len(df)
+        
         # Add date column if missing
         if not self.extract_date_column(df):
-            # Generate dates spread over the last 365 days
-            n_rows = len(df)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365)
-            # Convert numpy int to Python int
-            dates = [start_date + timedelta(days=int(x)) for x in sorted(np.random.randint(0, 365, n_rows))]
-            df['date'] = pd.to_datetime(dates).strftime('%Y-%m-%d')
+            # Generate dates spread over the 365 days before the end date
+            end_date = pd.Timestamp.now().normalize() if end_date is None else pd.Timestamp(end_date)
+            start_date = end_date - pd.Timedelta(days=365)
+            offsets = np.sort(rng.integers(0, 365, n_rows))
+            df['date'] = (start_date + pd.to_timedelta(offsets, unit='D')).strftime('%Y-%m-%d')
         
         # Add price column if missing
         if not self.extract_price_column(df):
             # Generate realistic prices based on product name
             if 'product_name' in df.columns:
-                # Price ranges for different products
-                product_prices = {
-                    'iphone': (50000, 150000),
-                    'nike': (3000, 10000),
-                    'cricket': (500, 3000),
-                    'prestige': (3000, 15000),
-                    'levis': (1000, 5000),
-                }
-                
-                def get_price_range(product_name):
-                    product_name_lower = str(product_name).lower()
-                    for keyword, (min_p, max_p) in product_prices.items():
-                        if keyword in product_name_lower:
-                            return (min_p, max_p)
-                    return (1000, 10000)  # Default range
-                
-                prices = []
-                for idx, row in df.iterrows():
-                    min_p, max_p = get_price_range(row.get('product_name', ''))
-                    prices.append(np.random.uniform(min_p, max_p))
-                df['price'] = prices
+                # Map keywords once per distinct product name
+                codes, names = pd.factorize(df['product_name'].astype(str))
+                ranges = np.array([self._price_range(name) for name in names], dtype=np.float64).reshape(-1, 2)
+                low = ranges[codes, 0]
+                high = ranges[codes, 1]
+                df['price'] = rng.uniform(low, high)
             else:
-                df['price'] = np.random.uniform(1000, 50000, len(df))
+                df['price'] = rng.uniform(1000, 50000, n_rows)
         
         # Add sales column if missing
         if not self.extract_sales_column(df):
             # Generate realistic sales based on rating (higher rating = more likely to sell)
             if 'rating' in df.columns:
-                df['sales'] = df['rating'].apply(lambda x: int(np.random.normal(50 + (x * 10), 15)))
+                mean = 50 + pd.to_numeric(df['rating'], errors='coerce').fillna(0).to_numpy(dtype=np.float64) * 10
+                df['sales'] = rng.normal(mean, 15).astype(np.int64)
             else:
-                df['sales'] = np.random.randint(20, 100, len(df))
+                df['sales'] = rng.integers(20, 100, n_rows)
             df['sales'] = df['sales'].clip(lower=0)  # No negative sales
         
         return df
     
+    def _price_range(self, product_name):
+        """Synthetic (min, max) price for a product name"""
+        product_name_lower = str(product_name).lower()
+        for keyword, price_range in self.PRODUCT_PRICE_RANGES.items():
+            if keyword in product_name_lower:
+                return price_range
+        return (1000, 10000)  # Default range
+    
     def get_cross_platform_timeseries(self, product_name):
         """
         Extract monthly time-series data from cross-platform file
@@ -202,45 +293,90 @@ class DataLoader:
         Returns:
             DataFrame with columns: date, platform, price, sales
         """
-        cross_platform_df = self.load_cross_platform_data()
+        timeseries = self._load_cross_platform_timeseries()
+        if timeseries is None:
+            return None
         
-        if cross_platform_df is None:
+        # The long table is sorted by product key, so this is a binary-search slice
+        key = normalize_product_name(product_name)
+        start = timeseries.index.searchsorted(key, side='left')
+        stop = timeseries.index.searchsorted(key, side='right')
+        if start == stop:
             return None
         
-        # Filter for the product
-        product_matches = cross_platform_df[
-            cross_platform_df['product_name'].str.lower() == product_name.lower()
-        ]
+        return timeseries.iloc[start:stop].reset_index(drop=True)
+    
+    def _load_cross_platform_timeseries(self):
+        """Get the long-format cross-platform table, shared by every session in the process"""
+        cache_key = ('cross_platform_timeseries', os.path.abspath(str(self.data_dir)), self.catalog.signature,
+                     pd.Timestamp.now().normalize())
+        timeseries = PRODUCT_CACHE.get(cache_key)
+        if timeseries is not None:
+            return timeseries
         
-        if product_matches.empty:
+        cross_platform_df = self.load_cross_platform_data()
+        if cross_platform_df is None:
             return None
         
-        timeseries_data = []
+        timeseries = self.reshape_cross_platform_timeseries(cross_platform_df)
+        if timeseries is not None:
+            PRODUCT_CACHE.put(cache_key, timeseries)
+        return timeseries
+    
+    @staticmethod
+    def reshape_cross_platform_timeseries(cross_platform_df, now=None):
+        """
+        Convert the wide cross-platform table into one long monthly table
+        
+        Every month N with both price_month_N and sales_month_N columns is
+        used; month N is dated (last month - N) months before now. The result
+        is indexed by normalized product name and sorted by product and date.
         
-        for _, row in product_matches.iterrows():
-            platform = row.get('platform', 'Unknown')
+        Args:
+            cross_platform_df: wide table with product_name, platform and monthly columns
+            now: reference timestamp (defaults to today's midnight)
             
-            # Extract monthly data
-            for month in range(1, 9):  # 8 months of data
-                price_col = f'price_month_{month}'
-                sales_col = f'sales_month_{month}'
-                
-                if price_col in cross_platform_df.columns and sales_col in cross_platform_df.columns:
-                    # Create date (assume start from current date - months back)
-                    date = pd.Timestamp.now() - pd.DateOffset(months=8-month)
-                    
-                    timeseries_data.append({
-                        'date': date,
-                        'platform': platform,
-                        'price': float(row[price_col]) if pd.notna(row[price_col]) else None,
-                        'sales': int(row[sales_col]) if pd.notna(row[sales_col]) else None
-                    })
-        
-        if not timeseries_data:
+        Returns:
+            DataFrame with columns: date, platform, price, sales, or None
+        """
+        if 'product_name' not in cross_platform_df.columns:
             return None
         
-        result_df = pd.DataFrame(timeseries_data)
-        result_df = result_df.sort_values('date')
+        month_columns = {}
+        for col in cross_platform_df.columns:
+            match = re.fullmatch(r'(price|sales)_month_(\d+)', str(col))
+            if match:
+                month_columns.setdefault(int(match.group(2)), {})[match.group(1)] = col
+        months = sorted(month for month, cols in month_columns.items() if len(cols) == 2)
         
-        return result_df
-
+        if not months or cross_platform_df.empty:
+            return None
+        
+        n_rows = len(cross_platform_df)
+        n_months = len(months)
+        now = pd.Timestamp.now().normalize() if now is None else pd.Timestamp(now)
+        
+        # Row-major reshape: each product/platform row becomes n_months consecutive rows
+        prices = cross_platform_df[[month_columns[m]['price'] for m in months]].to_numpy(dtype=np.float64)
+        sales = cross_platform_df[[month_columns[m]['sales'] for m in months]].to_numpy(dtype=np.float64)
+        dates = pd.DatetimeIndex([now - pd.DateOffset(months=months[-1] - m) for m in months])
+        
+        if 'platform' in cross_platform_df.columns:
+            platforms = cross_platform_df['platform'].astype(object).to_numpy()
+        else:
+            platforms = np.full(n_rows, 'Unknown', dtype=object)
+        keys = np.array([normalize_product_name(name) for name in cross_platform_df['product_name'].astype(str)],
+                        dtype=object)
+        
+        timeseries = pd.DataFrame({
+            'date': np.tile(dates.values, n_rows),
+            'platform': np.repeat(platforms, n_months),
+            'price': prices.ravel(),
+            'sales': sales.ravel()
+        }, index=pd.Index(np.repeat(keys, n_months), name='product_key'))
+        
+        if not np.isnan(sales).any():
+            timeseries['sales'] = timeseries['sales'].astype(np.int64)
+        
+        order = np.lexsort((timeseries['date'].values, timeseries.index.values.astype(str)))
+        return timeseries.iloc[order]
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modules.cache import LRUCache
+from modules.tracing import add_rows, record_error, span
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Compiled columnar tables, one subdirectory per data directory
+DEFAULT_STORE_DIR = APP_DIR / 'artifacts' / 'data_store'
+
+# Low-cardinality string columns always stored as categoricals
+CATEGORICAL_COLUMNS = ['platform', 'product_name', 'category', 'brand', 'warehouse_area', 'marketplace', 'seller',
+                       'store']
+
+# Other string columns become categoricals when at most this share of values is distinct
+CATEGORY_RATIO = 0.5
+
+SCHEMA_NAME = 'schema.json'
+
+
+def _save_array(path, array):
+    """Write an array via a temporary file so existing memory maps stay valid"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _smallest_int_dtype(max_value):
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class DataStore:
+    """
+    Columnar, typed copy of the data directory's CSV files
+
+    Each CSV is converted once into a directory of .npy column files plus a
+    JSON schema: numeric columns are downcast to the smallest lossless dtype,
+    low-cardinality strings (platform, product name, ...) are stored as
+    categorical codes, and free text as one UTF-8 byte buffer with offsets.
+    Column files are opened with mmap_mode='r', and decoded tables are kept
+    in a process-wide LRU so every session shares one copy. A table is
+    rebuilt automatically when its CSV changes.
+    """
+
+    def __init__(self, data_dir, store_dir=DEFAULT_STORE_DIR, cache_entries=64):
+        self.data_dir = str(data_dir)
+        data_key = hashlib.sha1(os.path.abspath(self.data_dir).encode('utf-8')).hexdigest()[:12]
+        self.store_dir = os.path.join(str(store_dir), data_key)
+        self.tables = LRUCache(max_entries=cache_entries, name='tables')
+        self._build_lock = threading.Lock()
+
+    def list_tables(self):
+        """CSV file names available in the data directory"""
+        try:
+            return sorted(name for name in os.listdir(self.data_dir) if name.lower().endswith('.csv'))
+        except OSError:
+            return []
+
+    def _table_dir(self, filename):
+        return os.path.join(self.store_dir, Path(filename).stem.replace(' ', '_'))
+
+    def source_signature(self, filename):
+        stat = os.stat(os.path.join(self.data_dir, filename))
+        return {'mtime': stat.st_mtime, 'size': stat.st_size}
+
+    def _read_schema(self, filename):
+        try:
+            with open(os.path.join(self._table_dir(filename), SCHEMA_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_current(self, filename, schema):
+        return schema is not None and schema.get('source') == self.source_signature(filename)
+
+    def load_table(self, filename):
+        """
+        Load a data file as a typed DataFrame
+
+        Args:
+            filename: CSV file name inside the data directory
+
+        Returns:
+            DataFrame shared by all callers (copy before modifying), or None
+        """
+        try:
+            signature = self.source_signature(filename)
+        except OSError:
+            return None
+
+        cache_key = (filename, signature['mtime'], signature['size'])
+        df = self.tables.get(cache_key)
+        if df is not None:
+            return df
+
+        with span('data.load_table', table=filename):
+            schema = self.get_schema(filename)
+            if schema is None:
+                return None
+            
+            try:
+                df = self._read_table(filename, schema)
+            except Exception as e:
+                record_error(f"Error loading {filename} from data store: {str(e)}")
+                return None
+            add_rows(len(df))
+
+        self.tables.put(cache_key, df)
+        return df
+
+    def compile(self, filename):
+        """
+        Convert one CSV into typed column files
+
+        Returns:
+            dict: the table schema
+        """
+        signature = self.source_signature(filename)
+        df = pd.read_csv(os.path.join(self.data_dir, filename))
+        table_dir = self._table_dir(filename)
+        os.makedirs(table_dir, exist_ok=True)
+
+        columns = []
+        for i, name in enumerate(df.columns):
+            column = df[name]
+            entry = {'name': str(name), 'file': f'c{i}'}
+
+            if pd.api.types.is_bool_dtype(column):
+                entry['kind'] = 'numeric'
+                _save_array(os.path.join(table_dir, f'c{i}.npy'), column.to_numpy(dtype=bool))
+            elif pd.api.types.is_integer_dtype(column):
+                entry['kind'] = 'numeric'
+                values = pd.to_numeric(column, downcast='integer').to_numpy()
+                _save_array(os.path.join(table_dir, f'c{i}.npy'), values)
+            elif pd.api.types.is_float_dtype(column):
+                entry['kind'] = 'numeric'
+                values = column.to_numpy(dtype=np.float64)
+                compact = values.astype(np.float32)
+                if np.array_equal(compact.astype(np.float64), values, equal_nan=True):
+                    values = compact
+                _save_array(os.path.join(table_dir, f'c{i}.npy'), values)
+            else:
+                text = column.astype(object).where(column.notna(), None)
+                n_unique = text.nunique(dropna=True)
+                if str(name).lower() in CATEGORICAL_COLUMNS or n_unique <= max(1, len(text) * CATEGORY_RATIO):
+                    entry['kind'] = 'category'
+                    categorical = pd.Categorical(text.map(lambda value: None if value is None else str(value)))
+                    entry['categories'] = categorical.categories.tolist()
+                    codes = categorical.codes.astype(_smallest_int_dtype(len(entry['categories'])))
+                    _save_array(os.path.join(table_dir, f'c{i}.npy'), codes)
+                else:
+                    entry['kind'] = 'text'
+                    encoded = [b'' if value is None else str(value).encode('utf-8') for value in text]
+                    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                    offsets[1:] = np.cumsum([len(value) for value in encoded])
+                    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+                    _save_array(os.path.join(table_dir, f'c{i}.bytes.npy'), buffer)
+                    _save_array(os.path.join(table_dir, f'c{i}.offsets.npy'), offsets)
+                    _save_array(os.path.join(table_dir, f'c{i}.null.npy'), text.isna().to_numpy())
+
+            columns.append(entry)
+
+        schema = {'version': 1, 'source': signature, 'rows': int(len(df)), 'columns': columns}
+
+        # The schema is written last, so a table is only visible once complete
+        fd, tmp_path = tempfile.mkstemp(dir=table_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(schema, f, indent=2)
+        os.replace(tmp_path, os.path.join(table_dir, SCHEMA_NAME))
+        return schema
+
+    def get_schema(self, filename):
+        """
+        Get a table's schema, compiling the CSV first if needed
+        
+        Returns:
+            dict with 'rows' and 'columns' entries, or None
+        """
+        try:
+            with self._build_lock:
+                schema = self._read_schema(filename)
+                if not self._is_current(filename, schema):
+                    schema = self.compile(filename)
+            return schema
+        except Exception as e:
+            record_error(f"Error loading {filename} from data store: {str(e)}")
+            return None
+    
+    def load_column(self, filename, column):
+        """
+        Load a single column without decoding the rest of the table
+        
+        Categorical columns come back as a Categorical over memory-mapped
+        codes, which makes scanning e.g. product names cheap.
+        
+        Returns:
+            Categorical, ndarray or list of strings, or None if the column is missing
+        """
+        schema = self.get_schema(filename)
+        if schema is None:
+            return None
+        
+        for entry in schema['columns']:
+            if entry['name'] == column:
+                return self._read_column(self._table_dir(filename), entry, schema['rows'])
+        return None
+    
+    @staticmethod
+    def _read_column(table_dir, entry, rows):
+        """Read one column from its memory-mapped files"""
+        path = os.path.join(table_dir, entry['file'])
+        if entry['kind'] == 'numeric':
+            return np.load(path + '.npy', mmap_mode='r')
+        if entry['kind'] == 'category':
+            codes = np.load(path + '.npy', mmap_mode='r')
+            return pd.Categorical.from_codes(codes, categories=entry['categories'])
+        
+        buffer = np.load(path + '.bytes.npy', mmap_mode='r')
+        offsets = np.load(path + '.offsets.npy', mmap_mode='r')
+        nulls = np.load(path + '.null.npy', mmap_mode='r')
+        raw = buffer.tobytes()
+        return [None if nulls[i] else raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(rows)]
+    
+    def _read_table(self, filename, schema):
+        """Assemble a DataFrame from memory-mapped column files"""
+        table_dir = self._table_dir(filename)
+        data = {entry['name']: self._read_column(table_dir, entry, schema['rows']) for entry in schema['columns']}
+        return pd.DataFrame(data, columns=[entry['name'] for entry in schema['columns']])
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_data_store(data_dir, store_dir=DEFAULT_STORE_DIR):
+    """Get the process-wide DataStore for a data directory"""
+    key = (os.path.abspath(str(data_dir)), str(store_dir))
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = DataStore(data_dir, store_dir)
+        return _stores[key]
@@ -1,29 +1,75 @@
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import StandardScaler
-import xgboost as xgb
+import hashlib
 import pickle
 import os
+import tempfile
+import threading
+import time
+from modules.cache import LRUCache, hash_dataframe
+from modules.tracing import add_rows, record_error, span, traced
+
+
+TEXT_COLUMNS = ['review_text', 'text', 'review', 'content']
+
+# Precomputed review signals carried by the product CSVs, used as features when present
+STRUCTURED_FEATURES = [
+    'verified_purchase',
+    'duplicate_phrase_score',
+    'reviewer_history',
+    'review_post_gap',
+    'review_length'
+]
+
+# Layout of the matrix built by _build_features, saved with the model. Bump it
+# whenever the columns or their encoding change so saved models get retrained.
+# 1: dense TF-IDF + length/word count, 2: CSR TF-IDF + scaled numeric block
+# with structured signals
+FEATURE_FORMAT = 2
+
+# Per-product review probabilities, shared by every session in the process
+SCORE_CACHE = LRUCache(max_entries=256, max_bytes=64 * 1024 * 1024, name='review_scores')
 
 
 class FakeReviewDetector:
     """XGBoost model for fake review detection"""
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, max_features=100, use_text=True):
+        """
+        Args:
+            model_path: optional path of the saved model
+            max_features: TF-IDF vocabulary size
+            use_text: include TF-IDF text features; False trains a numeric-only
+                      model on length and structured review signals for fast bulk screening
+        """
         self.model = None
         self.vectorizer = None
         self.scaler = None
         self.model_path = model_path
+        self.max_features = max_features
+        self.use_text = use_text
+        self.numeric_features = []
+        self.feature_format = FEATURE_FORMAT
+        self.version = None
         
+    @traced('reviews.train')
     def train(self, training_data_path):
         """
         Train the XGBoost model on fake reviews
         
+        scikit-learn and XGBoost are imported here rather than at module
+        level, so importing the detector stays cheap; loading a saved model
+        imports them through unpickling.
+        
         Expected columns in training data:
         - review_text or text
         - label (0 = real, 1 = fake)
+        - optionally any of STRUCTURED_FEATURES (e.g. verified_purchase)
         """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import StandardScaler
+        import xgboost as xgb
+        
         df = pd.read_csv(training_data_path)
         
         # Identify text and label columns
@@ -31,7 +77,7 @@ class FakeReviewDetector:
         label_col = None
         
         for col in df.columns:
-            if col.lower() in ['review_text', 'text', 'review', 'content']:
+            if col.lower() in TEXT_COLUMNS:
                 text_col = col
             if col.lower() in ['label', 'is_fake', 'fake']:
                 label_col = col
@@ -41,24 +87,20 @@ class FakeReviewDetector:
         
         # Clean data
         df = df.dropna(subset=[text_col, label_col])
+        add_rows(len(df))
         
-        # Extract text features
-        self.vectorizer = TfidfVectorizer(max_features=100, stop_words='english', ngram_range=(1, 2))
-        X_text = self.vectorizer.fit_transform(df[text_col].astype(str))
+        # Structured review signals available in the training data become model features
+        self.numeric_features = [col for col in STRUCTURED_FEATURES if col in df.columns]
         
-        # Create additional features
-        X_text_dense = X_text.toarray()
-        
-        # Calculate text features
-        review_length = df[text_col].astype(str).str.len().values.reshape(-1, 1)
-        word_count = df[text_col].astype(str).str.split().str.len().values.reshape(-1, 1)
-        
-        # Combine features
-        additional_features = np.hstack([review_length, word_count])
+        # Extract text features
+        if self.use_text:
+            self.vectorizer = TfidfVectorizer(max_features=self.max_features, stop_words='english',
+                                              ngram_range=(1, 2), dtype=np.float32)
+        else:
+            self.vectorizer = None
         self.scaler = StandardScaler()
-        additional_features = self.scaler.fit_transform(additional_features)
         
-        X = np.hstack([X_text_dense, additional_features])
+        X = self._build_features(df[text_col].astype(str), df, fit=True)
         y = df[label_col].values
         
         # Train XGBoost
@@ -70,15 +112,19 @@ class FakeReviewDetector:
             eval_metric='logloss'
         )
         self.model.fit(X, y)
+        self.version = hashlib.sha1(pickle.dumps(self._model_data())).hexdigest()[:16]
         
         return self.model
     
-    def predict(self, reviews):
+    @traced('reviews.predict')
+    def predict(self, reviews, text_col=None):
         """
         Predict if reviews are fake
         
         Args:
-            reviews: list of review texts or DataFrame with text column
+            reviews: list of review texts, or DataFrame with a text column and
+                     optionally the structured signal columns
+            text_col: text column of a DataFrame input (detected if None)
             
         Returns:
             array of probabilities (probability of being fake)
@@ -86,31 +132,89 @@ class FakeReviewDetector:
         if self.model is None:
             raise ValueError("Model not trained. Call train() first.")
         
+        frame = None
         if isinstance(reviews, pd.DataFrame):
-            text_col = [col for col in reviews.columns if col.lower() in 
-                       ['review_text', 'text', 'review', 'content']][0]
-            reviews = reviews[text_col].astype(str).tolist()
+            frame = reviews
+            text_cols = [text_col] if text_col in reviews.columns else \
+                [col for col in reviews.columns if col.lower() in TEXT_COLUMNS]
+            if text_cols:
+                texts = reviews[text_cols[0]]
+            elif not self.use_text:
+                texts = pd.Series(np.nan, index=reviews.index, dtype=object)
+            else:
+                raise ValueError(f"Could not identify text column. Columns: {reviews.columns.tolist()}")
         elif isinstance(reviews, str):
-            reviews = [reviews]
-        
-        # Transform text
-        X_text = self.vectorizer.transform(reviews)
-        X_text_dense = X_text.toarray()
+            texts = [reviews]
+        else:
+            texts = reviews
         
-        # Calculate features
-        review_length = np.array([len(r) for r in reviews]).reshape(-1, 1)
-        word_count = np.array([len(r.split()) for r in reviews]).reshape(-1, 1)
-        
-        additional_features = np.hstack([review_length, word_count])
-        additional_features = self.scaler.transform(additional_features)
-        
-        X = np.hstack([X_text_dense, additional_features])
+        texts = pd.Series(texts, dtype=object)
+        texts = texts.where(texts.isna(), texts.astype(str))
+        X = self._build_features(texts, frame)
+        add_rows(len(texts))
         
         # Get probability of being fake (class 1)
         probabilities = self.model.predict_proba(X)[:, 1]
         
         return probabilities
     
+    def _numeric_features(self, texts, frame):
+        """
+        Build the dense numeric block: text length, word count and the
+        structured signals the model was trained with
+        
+        Structured columns missing from the input are left as NaN, which
+        XGBoost treats as missing values.
+        """
+        columns = [
+            texts.str.len().to_numpy(dtype=np.float64),
+            texts.str.count(r'\S+').to_numpy(dtype=np.float64)
+        ]
+        for col in self.numeric_features:
+            if frame is not None and col in frame.columns:
+                columns.append(pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=np.float64))
+            else:
+                columns.append(np.full(len(texts), np.nan))
+        return np.column_stack(columns)
+    
+    def _build_features(self, texts, frame=None, fit=False):
+        """
+        Build the sparse feature matrix for a batch of reviews
+        
+        TF-IDF stays in CSR form and the scaled numeric features are
+        appended as extra sparse columns, so memory grows with the number of
+        non-zero terms rather than rows x vocabulary. XGBoost consumes the
+        CSR matrix directly. Numeric-only models skip TF-IDF entirely.
+        
+        Args:
+            texts: Series of review texts (may be NaN for numeric-only models)
+            frame: optional DataFrame with structured signal columns, aligned with texts
+            fit: fit the vectorizer and scaler on this batch (training only)
+            
+        Returns:
+            scipy.sparse.csr_matrix
+        """
+        from scipy import sparse
+        
+        additional_features = self._numeric_features(texts, frame)
+        
+        if fit:
+            additional_features = self.scaler.fit_transform(additional_features)
+        else:
+            additional_features = self.scaler.transform(additional_features)
+        
+        blocks = [sparse.csr_matrix(additional_features.astype(np.float32))]
+        
+        if self.vectorizer is not None:
+            texts = texts.fillna('')
+            if fit:
+                X_text = self.vectorizer.fit_transform(texts)
+            else:
+                X_text = self.vectorizer.transform(texts)
+            blocks.insert(0, X_text)
+        
+        return sparse.hstack(blocks, format='csr')
+    
     def get_fake_percentage(self, reviews, threshold=0.5):
         """
         Get percentage of fake reviews
@@ -129,21 +233,201 @@ class FakeReviewDetector:
         
         return fake_percentage, fake_count, total_count, probs
     
-    def save(self, path):
-        """Save model and vectorizer"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        model_data = {
+    @staticmethod
+    def summarize_scores(probs, groups=None, threshold=0.5):
+        """
+        Aggregate per-review probabilities overall and per group
+        
+        Args:
+            probs: array of fake probabilities
+            groups: optional array-like of group labels (e.g. platform) aligned with probs
+            threshold: probability threshold for considering a review fake
+            
+        Returns:
+            dict: {'fake_percentage', 'fake_count', 'total_count', 'by_group'}
+            where by_group is a DataFrame indexed by group (None without groups)
+        """
+        is_fake = np.asarray(probs) >= threshold
+        total_count = len(is_fake)
+        fake_count = int(is_fake.sum())
+        
+        by_group = None
+        if groups is not None:
+            by_group = pd.DataFrame({'group': np.asarray(groups), 'is_fake': is_fake}).groupby(
+                'group', sort=False
+            )['is_fake'].agg(fake_count='sum', total_count='size')
+            by_group['fake_percentage'] = by_group['fake_count'] / by_group['total_count'] * 100
+            by_group.index.name = getattr(groups, 'name', None) or 'group'
+        
+        return {
+            'fake_percentage': (fake_count / total_count) * 100 if total_count > 0 else 0,
+            'fake_count': fake_count,
+            'total_count': total_count,
+            'by_group': by_group
+        }
+    
+    def score_product_reviews(self, product_name, reviews, text_col, group_col=None,
+                              threshold=0.5, cache=SCORE_CACHE):
+        """
+        Score every review of a product once and aggregate by platform
+        
+        Probabilities are cached per product under the model version and a
+        hash of the review texts and signals, so repeated calls from different tabs,
+        reruns and sessions only pay for the aggregation.
+        
+        Args:
+            product_name: product the reviews belong to
+            reviews: DataFrame of reviews
+            text_col: review text column
+            group_col: optional column to aggregate by (e.g. platform)
+            threshold: probability threshold for considering a review fake
+            cache: LRUCache for probabilities (None disables caching)
+            
+        Returns:
+            dict: summarize_scores() result plus 'probabilities'
+        """
+        feature_cols = [text_col] + [col for col in self.numeric_features if col in reviews.columns]
+        
+        probs = None
+        cache_key = None
+        if cache is not None and self.version is not None:
+            cache_key = (str(product_name), self.version, hash_dataframe(reviews[feature_cols]))
+            probs = cache.get(cache_key)
+        
+        if probs is None:
+            probs = self.predict(reviews[feature_cols], text_col=text_col)
+            if cache_key is not None:
+                cache.put(cache_key, probs)
+        
+        groups = reviews[group_col] if group_col is not None and group_col in reviews.columns else None
+        summary = self.summarize_scores(probs, groups, threshold)
+        summary['probabilities'] = probs
+        return summary
+    
+    def _model_data(self):
+        return {
             'model': self.model,
             'vectorizer': self.vectorizer,
-            'scaler': self.scaler
+            'scaler': self.scaler,
+            'numeric_features': self.numeric_features,
+            'feature_format': self.feature_format
         }
-        with open(path, 'wb') as f:
-            pickle.dump(model_data, f)
+    
+    def save(self, path):
+        """Save model and vectorizer"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        payload = pickle.dumps(self._model_data())
+        # Write to a temporary file first so readers never see a partial artifact
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self.version = hashlib.sha1(payload).hexdigest()[:16]
     
     def load(self, path):
         """Load model and vectorizer"""
         with open(path, 'rb') as f:
-            model_data = pickle.load(f)
+            payload = f.read()
+        model_data = pickle.loads(payload)
+        self.version = hashlib.sha1(payload).hexdigest()[:16]
         self.model = model_data['model']
         self.vectorizer = model_data['vectorizer']
         self.scaler = model_data['scaler']
+        self.numeric_features = model_data.get('numeric_features', [])
+        # Artifacts saved before the format was recorded used the dense layout
+        self.feature_format = model_data.get('feature_format', 1)
+        self.use_text = self.vectorizer is not None
+        if self.vectorizer is not None:
+            self.max_features = self.vectorizer.max_features
+
+
+class DetectorRegistry:
+    """
+    Process-wide owner of a trained FakeReviewDetector
+    
+    The detector is loaded from the saved artifact when it is at least as
+    new as the training file and was built with the current FEATURE_FORMAT,
+    otherwise it is trained once and saved. Every
+    caller gets the same instance, which must be treated as read-only.
+    When the training file or the artifact changes on disk, the next get()
+    builds a fresh detector and swaps it in; sessions still holding the old
+    instance keep working with it.
+    """
+    
+    def __init__(self, training_data_path, model_path, check_interval=5.0):
+        self.training_data_path = str(training_data_path)
+        self.model_path = str(model_path)
+        self.check_interval = check_interval
+        self.detector = None
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+    
+    def _current_signature(self):
+        return (self._mtime(self.training_data_path), self._mtime(self.model_path))
+    
+    def is_ready(self):
+        """Check whether a detector has already been built in this process"""
+        return self.detector is not None
+    
+    def get(self):
+        """
+        Get the shared detector, training or reloading it if needed
+        
+        Returns:
+            FakeReviewDetector, or None if neither an artifact nor training data is available
+        """
+        now = time.monotonic()
+        if self.detector is not None and now - self._last_check < self.check_interval:
+            return self.detector
+        
+        with self._lock:
+            self._last_check = now
+            signature = self._current_signature()
+            # Unchanged files: keep the current detector (or the last failure)
+            if signature == self._signature:
+                return self.detector
+            self._signature = signature
+            
+            training_mtime, model_mtime = signature
+            if training_mtime is None and model_mtime is None:
+                return self.detector
+            
+            detector = FakeReviewDetector(model_path=self.model_path)
+            try:
+                if model_mtime is not None and (training_mtime is None or model_mtime >= training_mtime):
+                    with span('reviews.load_model'):
+                        detector.load(self.model_path)
+                # Retrain artifacts from an older feature layout when the training data is available
+                if detector.model is None or (detector.feature_format != FEATURE_FORMAT and training_mtime is not None):
+                    detector = FakeReviewDetector(model_path=self.model_path)
+                    detector.train(self.training_data_path)
+                    detector.save(self.model_path)
+                    self._signature = self._current_signature()
+            except Exception as e:
+                record_error(f"Error building fake review detector: {str(e)}")
+                return self.detector
+            
+            self.detector = detector
+            return self.detector
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_detector_registry(training_data_path, model_path):
+    """Get the process-global DetectorRegistry for a training file/artifact pair"""
+    key = (str(training_data_path), str(model_path))
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = DetectorRegistry(training_data_path, model_path)
+        return _registries[key]
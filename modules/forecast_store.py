@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from modules.tracing import record_cache, record_error
+
+
+def _digest(key):
+    return hashlib.sha1('|'.join(map(str, key)).encode('utf-8')).hexdigest()
+
+
+class ForecastStore:
+    """
+    Persistent on-disk store for fitted forecasts
+    
+    Each forecast is saved as two compact NumPy files (timestamps and the
+    yhat/yhat_lower/yhat_upper matrix) plus a small JSON metadata file,
+    all named after its key (product, platform, metric, horizon, input-data
+    hash and backend). Every file is written to a temporary name and renamed
+    into place, and the metadata file is written last, so the app, scheduler,
+    precompute runs and API can save to the same store concurrently without
+    losing or half-reading each other's entries. Forecasts are read back
+    memory-mapped, so a warm store lets the app serve every product without
+    refitting after a restart. Entry names start with a hash of their series
+    (the key without the data hash); each save removes all but the newest
+    `keep_versions` entries of its series, so superseded forecasts do not
+    accumulate as the data changes.
+    
+    For incremental updates it also keeps the last fit state of each series
+    (product, platform, metric, horizon, backend) as a small JSON file.
+    """
+    
+    VALUE_COLUMNS = ['yhat', 'yhat_lower', 'yhat_upper']
+    META_SUFFIX = '.meta.json'
+    
+    def __init__(self, store_dir, keep_versions=2):
+        self.store_dir = str(store_dir)
+        self.keep_versions = keep_versions
+    
+    @staticmethod
+    def entry_id(key):
+        """Get the file-name-safe identifier for a forecast cache key: '<series hash>-<key hash>'"""
+        product_name, platform, metric, periods, data_hash, backend = key
+        return f"{_digest((product_name, platform, metric, periods, backend))[:16]}-{_digest(key)}"
+    
+    def _path(self, entry_id, suffix):
+        return os.path.join(self.store_dir, f'{entry_id}{suffix}')
+    
+    def _write_atomic(self, path, write):
+        """Write a file through a temporary file in the same directory, then rename it into place"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def get_entry(self, key):
+        """
+        Returns:
+            dict of metadata for a stored forecast, or None if it is not stored
+        """
+        try:
+            with open(self._path(self.entry_id(key), self.META_SUFFIX), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except OSError:
+            return None
+    
+    def load(self, key):
+        """
+        Load a stored forecast
+        
+        Args:
+            key: forecast cache key (product, platform, metric, periods, data_hash)
+        
+        Returns:
+            forecast DataFrame with ds/yhat/yhat_lower/yhat_upper, or None
+        """
+        entry_id = self.entry_id(key)
+        
+        # The metadata file is written last, so its presence means the arrays are complete
+        if not os.path.exists(self._path(entry_id, self.META_SUFFIX)):
+            record_cache('forecast_store', False)
+            return None
+        
+        try:
+            ds = np.load(self._path(entry_id, '.ds.npy'), mmap_mode='r')
+            values = np.load(self._path(entry_id, '.values.npy'), mmap_mode='r')
+        except Exception as e:
+            record_error(f"Error loading stored forecast {entry_id}: {str(e)}")
+            return None
+        record_cache('forecast_store', True)
+        
+        forecast = pd.DataFrame(values, columns=self.VALUE_COLUMNS)
+        forecast.insert(0, 'ds', pd.to_datetime(ds))
+        return forecast
+    
+    def save(self, key, forecast):
+        """
+        Persist a forecast
+        
+        Args:
+            key: forecast cache key from ForecastCache.make_key
+            forecast: forecast DataFrame with ds/yhat/yhat_lower/yhat_upper columns
+        """
+        product_name, platform, metric, periods, data_hash, backend = key
+        entry_id = self.entry_id(key)
+        
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            ds = forecast['ds'].values.astype('datetime64[ns]')
+            values = np.ascontiguousarray(forecast[self.VALUE_COLUMNS].to_numpy(dtype=np.float64))
+            self._write_atomic(self._path(entry_id, '.ds.npy'), lambda f: np.save(f, ds))
+            self._write_atomic(self._path(entry_id, '.values.npy'), lambda f: np.save(f, values))
+            
+            meta = {
+                'product': product_name,
+                'platform': platform,
+                'metric': metric,
+                'periods': periods,
+                'data_hash': data_hash,
+                'backend': backend,
+                'rows': int(len(forecast)),
+                'created_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self._write_atomic(self._path(entry_id, self.META_SUFFIX),
+                               lambda f: f.write(json.dumps(meta, sort_keys=True).encode('utf-8')))
+            self._prune(entry_id)
+        except Exception as e:
+            record_error(f"Error saving forecast for {platform}: {str(e)}")
+    
+    def _prune(self, entry_id):
+        """
+        Remove superseded versions of entry_id's series, keeping the newest
+        keep_versions, and entries named by the old per-key scheme
+        """
+        prefix = entry_id.split('-')[0] + '-'
+        versions, stale = [], []
+        for name in os.listdir(self.store_dir):
+            if not name.endswith(self.META_SUFFIX):
+                continue
+            stem = name[:-len(self.META_SUFFIX)]
+            if '-' not in stem:
+                stale.append(stem)
+            elif stem.startswith(prefix):
+                try:
+                    versions.append((stem == entry_id, os.path.getmtime(os.path.join(self.store_dir, name)), stem))
+                except OSError:
+                    continue
+        versions.sort(reverse=True)
+        stale.extend(stem for _, _, stem in versions[self.keep_versions:])
+        
+        # Metadata first, so readers never see an entry whose arrays are gone
+        for stem in stale:
+            for suffix in (self.META_SUFFIX, '.ds.npy', '.values.npy'):
+                try:
+                    os.remove(self._path(stem, suffix))
+                except OSError:
+                    pass
+    
+    def load_state(self, series_key):
+        """
+        Load the last fit state of a series
+        
+        Args:
+            series_key: (product, platform, metric, periods, backend)
+        
+        Returns:
+            dict with 'forecast_key' and 'init', or None
+        """
+        path = os.path.join(self.store_dir, 'states', f'{_digest(series_key)}.json')
+        if not os.path.exists(path):
+            record_cache('fit_state_store', False)
+            return None
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            record_error(f"Error loading fit state for {series_key[1]}: {str(e)}")
+            return None
+        record_cache('fit_state_store', True)
+        return state
+    
+    def save_state(self, series_key, state):
+        """
+        Atomically persist the last fit state of a series
+        
+        Args:
+            series_key: (product, platform, metric, periods, backend)
+            state: JSON-ready dict from the forecaster
+        """
+        state_dir = os.path.join(self.store_dir, 'states')
+        try:
+            os.makedirs(state_dir, exist_ok=True)
+            self._write_atomic(os.path.join(state_dir, f'{_digest(series_key)}.json'),
+                               lambda f: f.write(json.dumps(state).encode('utf-8')))
+        except Exception as e:
+            record_error(f"Error saving fit state for {series_key[1]}: {str(e)}")
+    
+    def __len__(self):
+        try:
+            return sum(1 for name in os.listdir(self.store_dir) if name.endswith(self.META_SUFFIX))
+        except OSError:
+            return 0
@@ -1,18 +1,519 @@
 import pandas as pd
 import numpy as np
-from prophet import Prophet
+import multiprocessing
+import threading
+import time
 import warnings
+from statistics import NormalDist
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from modules.cache import LRUCache, hash_dataframe
+from modules.tracing import add_rows, record_error, span
 warnings.filterwarnings('ignore')
 
 
-class PriceForecastor:
-    """Prophet-based price forecasting for multiple platforms"""
+class ForecastCache(LRUCache):
+    """
+    Process-wide LRU cache of fitted forecasts
+    
+    Entries are keyed by product, platform, metric, horizon, a content hash
+    of the prepared series and the forecasting backend, so identical fits
+    are shared across tabs, reruns and user sessions. Cached forecast
+    frames are shared objects and must be treated as read-only by callers.
+    """
+    
+    def __init__(self, max_entries=512, max_bytes=256 * 1024 * 1024):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, name='forecasts')
+    
+    @staticmethod
+    def make_key(product_name, platform, metric, periods, data, backend='prophet'):
+        """Build the cache key for a prepared series"""
+        return (str(product_name), str(platform), metric, int(periods), hash_dataframe(data), backend)
+
+
+# Shared by every forecaster in the process (Streamlit sessions run as threads)
+FORECAST_CACHE = ForecastCache()
+
+# Last fit of each series for incremental updates: {series key: fit state}, backed by the ForecastStore
+FIT_STATES = LRUCache(max_entries=2048, max_bytes=64 * 1024 * 1024, name='fit_states')
+
+# How often parallel fits are checked against their timeout, in seconds
+FIT_POLL_SECONDS = 0.2
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(n_jobs):
+    """
+    Get the shared worker process pool for parallel fitting
+    
+    Pools are created once per worker count and reused across calls, so
+    the Prophet/Stan import cost in each worker is paid only once. Workers
+    are spawned rather than forked because Streamlit serves sessions from
+    threads.
+    """
+    with _executors_lock:
+        executor = _executors.get(n_jobs)
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=n_jobs,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _executors[n_jobs] = executor
+        return executor
+
+
+def _discard_executor(n_jobs):
+    """Drop a pool whose workers died so the next call starts a fresh one"""
+    with _executors_lock:
+        executor = _executors.pop(n_jobs, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def prophet_warm_start(model):
+    """
+    Get a fitted Prophet model's parameters in the form `Prophet.fit(df, init=...)` accepts
+    
+    Returns:
+        dict with float 'k', 'm', 'sigma_obs' and array 'delta', 'beta'
+        (posterior means when the model was sampled)
+    """
+    state = {name: float(np.mean(model.params[name])) for name in ('k', 'm', 'sigma_obs')}
+    for name in ('delta', 'beta'):
+        state[name] = np.atleast_1d(np.mean(model.params[name], axis=0))
+    return state
+
+
+def fit_prophet(data, periods, prophet_params, init=None):
+    """
+    Fit Prophet on a single platform series and predict the horizon
+    
+    Args:
+        data: DataFrame in Prophet format (ds, y)
+        periods: number of periods to forecast
+        prophet_params: keyword arguments for Prophet
+        init: optional parameters of a previous fit (prophet_warm_start) to
+              start the optimizer from; Prophet falls back to its default
+              initialization for parameters whose shape no longer matches
+        
+    Returns:
+        tuple: (fitted model, forecast DataFrame)
+    """
+    # Imported on first fit: Prophet/Stan take seconds to import and most
+    # processes (home page, numpy backend, API reads) never fit with it
+    from prophet import Prophet
+    
+    model = Prophet(**prophet_params)
+    if init is not None:
+        model.fit(data, init=init)
+    else:
+        model.fit(data)
     
-    def __init__(self, product_name):
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)
+    
+    return model, forecast
+
+
+def _fit_prophet_worker(data, periods, prophet_params, init=None):
+    """Worker-process entry point; only the forecast frame and warm-start parameters are sent back"""
+    model, forecast = fit_prophet(data, periods, prophet_params, init)
+    return forecast, prophet_warm_start(model)
+
+
+class ForecastBackend:
+    """
+    Interface for forecasting engines
+    
+    A backend turns a dict of prepared series ({platform: DataFrame with
+    ds, y}) into forecast frames with at least ds/yhat/yhat_lower/yhat_upper,
+    covering the history dates followed by `periods` daily dates.
+    """
+    
+    name = None
+    
+    def fit_predict(self, series, periods, params, n_jobs=1, timeout=None, init=None):
+        """
+        Fit and forecast every series
+        
+        Args:
+            series: {platform: DataFrame in Prophet format}
+            periods: number of periods to forecast
+            params: model parameters from the forecaster (PROPHET_PARAMS)
+            n_jobs: worker processes available to the backend
+            timeout: per-platform timeout in seconds, where supported
+            init: optional {platform: warm-start state} from previous fits, where supported
+            
+        Returns:
+            tuple: ({platform: forecast}, {platform: model}, {platform: error message},
+                    {platform: warm-start state for the next fit})
+        """
+        raise NotImplementedError
+
+
+class ProphetBackend(ForecastBackend):
+    """Prophet/Stan backend, fitting in-process or in the shared worker pool"""
+    
+    name = 'prophet'
+    
+    def fit_predict(self, series, periods, params, n_jobs=1, timeout=None, init=None):
+        init = init or {}
+        if n_jobs and n_jobs > 1 and len(series) > 1:
+            return self._fit_parallel(series, periods, params, n_jobs, timeout, init)
+        return self._fit_serial(series, periods, params, init)
+    
+    def _fit_serial(self, series, periods, params, init):
+        """Fit each platform in the current process"""
+        forecasts, models, errors, states = {}, {}, {}, {}
+        
+        for platform, data in series.items():
+            try:
+                models[platform], forecasts[platform] = fit_prophet(data, periods, params, init.get(platform))
+                states[platform] = prophet_warm_start(models[platform])
+            except Exception as e:
+                errors[platform] = str(e)
+        
+        return forecasts, models, errors, states
+    
+    def _fit_parallel(self, series, periods, params, n_jobs, timeout, init):
+        """
+        Fit all platforms concurrently in the shared worker pool
+        
+        Fitted models stay in the workers, so only forecasts and warm-start
+        states are returned. `timeout` applies to each fit separately and
+        counts from when the pool starts it, so time queued behind other
+        sessions' fits is not held against it. A fit that overruns is
+        reported as timed out for its platform only; it cannot be
+        interrupted, so it finishes in the background and the shared pool
+        is left running for everyone else.
+        """
+        executor = get_executor(n_jobs)
+        forecasts, models, errors, states = {}, {}, {}, {}
+        futures = {}
+        
+        try:
+            for platform, data in series.items():
+                futures[platform] = executor.submit(_fit_prophet_worker, data, periods, params, init.get(platform))
+        except BrokenProcessPool:
+            _discard_executor(n_jobs)
+            remaining = {p: d for p, d in series.items() if p not in futures}
+            forecasts, models, errors, states = self._fit_serial(remaining, periods, params, init)
+        
+        platforms = {future: platform for platform, future in futures.items()}
+        pending = set(platforms)
+        started = {}
+        while pending:
+            done, pending = wait(pending, timeout=None if timeout is None else FIT_POLL_SECONDS,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                platform = platforms[future]
+                try:
+                    forecasts[platform], states[platform] = future.result()
+                except BrokenProcessPool as e:
+                    _discard_executor(n_jobs)
+                    errors[platform] = str(e)
+                except Exception as e:
+                    errors[platform] = str(e)
+            
+            if timeout is None:
+                continue
+            now = time.monotonic()
+            for future in list(pending):
+                if future.running():
+                    started.setdefault(future, now)
+                if future in started and now - started[future] > timeout:
+                    pending.discard(future)
+                    errors[platforms[future]] = f"timed out after {timeout}s"
+        
+        return forecasts, models, errors, states
+
+
+class DampedTrendBackend(ForecastBackend):
+    """
+    Vectorized NumPy damped linear trend backend
+    
+    All platforms are fitted in one batched least-squares pass over a
+    padded (platforms x observations) array. Beyond the last observation
+    the daily trend is damped by `damping` per day, and prediction
+    intervals use the analytic OLS standard error at the requested
+    interval width. Much cheaper than Prophet for the short series the app
+    works with, at the cost of ignoring seasonality.
+    """
+    
+    name = 'numpy'
+    
+    def __init__(self, damping=0.98):
+        self.damping = damping
+    
+    def fit_predict(self, series, periods, params, n_jobs=1, timeout=None, init=None):
+        # Closed-form fit: nothing to warm-start from or carry over
+        forecasts, errors = {}, {}
+        
+        platforms = []
+        histories = []
+        for platform, data in series.items():
+            ds = pd.to_datetime(data['ds']).values.astype('datetime64[D]')
+            y = pd.to_numeric(data['y'], errors='coerce').to_numpy(dtype=np.float64)
+            valid = ~np.isnan(y)
+            if valid.sum() < 2:
+                errors[platform] = "need at least 2 numeric observations"
+                continue
+            platforms.append(platform)
+            histories.append((ds[valid], y[valid]))
+        
+        if not platforms:
+            return forecasts, {}, errors, {}
+        
+        n_series = len(platforms)
+        width = max(len(ds) for ds, _ in histories)
+        origin = min(ds[0] for ds, _ in histories)
+        
+        # Right-padded observation matrix with a validity mask
+        t = np.zeros((n_series, width))
+        y = np.zeros((n_series, width))
+        mask = np.zeros((n_series, width), dtype=bool)
+        for i, (ds, values) in enumerate(histories):
+            t[i, :len(ds)] = (ds - origin).astype(np.int64)
+            y[i, :len(ds)] = values
+            mask[i, :len(ds)] = True
+        
+        # Batched ordinary least squares: y = intercept + slope * t
+        n = mask.sum(axis=1)
+        t_mean = (t * mask).sum(axis=1) / n
+        y_mean = (y * mask).sum(axis=1) / n
+        t_centered = np.where(mask, t - t_mean[:, None], 0.0)
+        sxx = (t_centered ** 2).sum(axis=1)
+        sxy = (t_centered * np.where(mask, y - y_mean[:, None], 0.0)).sum(axis=1)
+        slope = np.divide(sxy, sxx, out=np.zeros(n_series), where=sxx > 0)
+        intercept = y_mean - slope * t_mean
+        
+        residuals = np.where(mask, y - (intercept[:, None] + slope[:, None] * t), 0.0)
+        sigma = np.sqrt((residuals ** 2).sum(axis=1) / np.maximum(n - 2, 1))
+        
+        # Evaluation grid: every history date, then `periods` daily steps
+        t_last = np.array([t[i, n[i] - 1] for i in range(n_series)])
+        steps = np.arange(1, periods + 1, dtype=np.float64)
+        t_future = t_last[:, None] + steps[None, :]
+        if self.damping < 1:
+            damped_steps = self.damping * (1 - self.damping ** steps) / (1 - self.damping)
+        else:
+            damped_steps = steps
+        t_effective = np.hstack([t, t_last[:, None] + damped_steps[None, :]])
+        t_eval = np.hstack([t, t_future])
+        
+        yhat = intercept[:, None] + slope[:, None] * t_effective
+        leverage = np.divide(
+            (t_effective - t_mean[:, None]) ** 2, sxx[:, None],
+            out=np.zeros_like(t_effective), where=sxx[:, None] > 0
+        )
+        z = NormalDist().inv_cdf(0.5 + params.get('interval_width', 0.95) / 2)
+        margin = z * sigma[:, None] * np.sqrt(1 + 1 / n[:, None] + leverage)
+        
+        for i, platform in enumerate(platforms):
+            columns = np.r_[np.arange(n[i]), np.arange(width, width + periods)]
+            forecasts[platform] = pd.DataFrame({
+                'ds': origin + t_eval[i, columns].astype('timedelta64[D]'),
+                'yhat': yhat[i, columns],
+                'yhat_lower': yhat[i, columns] - margin[i, columns],
+                'yhat_upper': yhat[i, columns] + margin[i, columns]
+            })
+            forecasts[platform]['ds'] = forecasts[platform]['ds'].astype('datetime64[ns]')
+        
+        return forecasts, {}, errors, {}
+
+
+FORECAST_BACKENDS = {
+    ProphetBackend.name: ProphetBackend,
+    DampedTrendBackend.name: DampedTrendBackend
+}
+
+
+def get_backend(backend):
+    """Resolve a backend name or instance to a ForecastBackend"""
+    if isinstance(backend, ForecastBackend):
+        return backend
+    if backend not in FORECAST_BACKENDS:
+        raise ValueError(f"Unknown forecast backend: {backend}. Available: {list(FORECAST_BACKENDS)}")
+    return FORECAST_BACKENDS[backend]()
+
+
+class BaseForecastor:
+    """Shared caching, lookup and fitting behaviour for the forecasters"""
+    
+    METRIC = None
+    PROPHET_PARAMS = {}
+    NON_NEGATIVE = False
+    ERROR_PREFIX = 'Error forecasting'
+    
+    def __init__(self, product_name, cache=FORECAST_CACHE, store=None, n_jobs=1, timeout=None,
+                 backend='prophet', incremental=False, fit_states=FIT_STATES):
+        """
+        Args:
+            product_name: name of the product being forecast
+            cache: in-memory forecast cache (None disables caching)
+            store: optional on-disk ForecastStore
+            n_jobs: worker processes used to fit platforms in parallel (1 = in-process)
+            timeout: per-platform fit timeout in seconds for parallel fitting
+            backend: forecasting engine name ('prophet', 'numpy') or ForecastBackend instance
+            incremental: warm-start the refit of platforms whose data changed from their
+                         last fit; unchanged ones are served from the cache or store as usual
+            fit_states: in-memory cache of last-fit states for incremental updates
+        """
         self.product_name = product_name
         self.models = {}
         self.forecasts = {}
+        self.cache = cache
+        self.store = store
+        self.n_jobs = n_jobs
+        self.timeout = timeout
+        self.backend = get_backend(backend)
+        self.incremental = incremental
+        self.fit_states = fit_states
+        
+    def forecast(self, prepared_data, periods=90, n_jobs=None, timeout=None):
+        """
+        Generate forecasts for given periods
+        
+        Args:
+            prepared_data: dict from prepare_data method
+            periods: number of periods to forecast (default 90 days)
+            n_jobs: override the worker count set on the forecaster
+            timeout: override the per-platform timeout set on the forecaster
+            
+        Returns:
+            dict: {platform: forecast DataFrame}, in prepared_data order
+            regardless of which platforms came from the cache
+        """
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        timeout = self.timeout if timeout is None else timeout
+        
+        pending = {}
+        cache_keys = {}
+        init = {}
+        for platform, data in prepared_data.items():
+            # The key's data hash doubles as the change check for incremental updates
+            cache_key = ForecastCache.make_key(
+                self.product_name, platform, self.METRIC, periods, data, self.backend.name
+            )
+            cached = self._load_cached(cache_key)
+            if cached is not None:
+                self.forecasts[platform] = cached
+                continue
+            
+            pending[platform] = data
+            cache_keys[platform] = cache_key
+            if self.incremental:
+                state = self._load_state(self._series_key(platform, periods))
+                if state is not None and state['init'] is not None:
+                    init[platform] = {name: np.asarray(value) if isinstance(value, list) else value
+                                      for name, value in state['init'].items()}
+        
+        if not pending:
+            return self._ordered(prepared_data)
+        
+        with span(f'forecast.{self.METRIC}.fit', product=self.product_name, backend=self.backend.name,
+                  platforms=len(pending), warm_started=len(init), n_jobs=n_jobs):
+            add_rows(sum(len(data) for data in pending.values()))
+            forecasts, models, errors, states = self.backend.fit_predict(
+                pending, periods, self.PROPHET_PARAMS, n_jobs=n_jobs, timeout=timeout, init=init
+            )
+        
+        for platform, forecast in forecasts.items():
+            if self.NON_NEGATIVE:
+                forecast['yhat'] = forecast['yhat'].clip(lower=0)
+                forecast['yhat_lower'] = forecast['yhat_lower'].clip(lower=0)
+            
+            if platform in models:
+                self.models[platform] = models[platform]
+            self.forecasts[platform] = forecast
+            self._store_cached(cache_keys[platform], forecast)
+            if self.incremental:
+                self._save_state(self._series_key(platform, periods), cache_keys[platform], states.get(platform))
+        
+        for platform, error in errors.items():
+            record_error(f"{self.ERROR_PREFIX} for {platform}: {error}")
         
+        return self._ordered(prepared_data)
+    
+    def _ordered(self, prepared_data):
+        """Put the forecasts of prepared_data's platforms first, in its order"""
+        ordered = {platform: self.forecasts[platform] for platform in prepared_data if platform in self.forecasts}
+        ordered.update((platform, forecast) for platform, forecast in self.forecasts.items() if platform not in ordered)
+        self.forecasts = ordered
+        return self.forecasts
+    
+    def _load_cached(self, cache_key):
+        """Look up a forecast in the in-memory cache, then in the on-disk store"""
+        if self.cache is not None:
+            forecast = self.cache.get(cache_key)
+            if forecast is not None:
+                return forecast
+        
+        if self.store is not None:
+            forecast = self.store.load(cache_key)
+            if forecast is not None:
+                if self.cache is not None:
+                    self.cache.put(cache_key, forecast)
+                return forecast
+        
+        return None
+    
+    def _store_cached(self, cache_key, forecast):
+        """Publish a freshly fitted forecast to the cache and the on-disk store"""
+        if self.cache is not None:
+            self.cache.put(cache_key, forecast)
+        if self.store is not None:
+            self.store.save(cache_key, forecast)
+    
+    def _series_key(self, platform, periods):
+        """Identify a platform series independently of its data, for incremental updates"""
+        return (str(self.product_name), str(platform), self.METRIC, int(periods), self.backend.name)
+    
+    def _load_state(self, series_key):
+        """Look up the last fit of a series in memory, then in the on-disk store"""
+        state = self.fit_states.get(series_key) if self.fit_states is not None else None
+        if state is None and self.store is not None:
+            state = self.store.load_state(series_key)
+            if state is not None and self.fit_states is not None:
+                self.fit_states.put(series_key, state)
+        return state
+    
+    def _save_state(self, series_key, cache_key, warm_start):
+        """
+        Record the last fit of a series: the key of its forecast and the
+        parameters to warm-start the next fit from
+        """
+        state = {
+            'forecast_key': list(cache_key),
+            'init': ({name: value.tolist() if isinstance(value, np.ndarray) else value
+                      for name, value in warm_start.items()} if warm_start is not None else None)
+        }
+        if self.fit_states is not None:
+            self.fit_states.put(series_key, state)
+        if self.store is not None:
+            self.store.save_state(series_key, state)
+    
+    def get_forecast_dataframe(self, platform):
+        """Get forecast data for a specific platform"""
+        if platform in self.forecasts:
+            forecast = self.forecasts[platform]
+            return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+        return None
+
+
+class PriceForecastor(BaseForecastor):
+    """Prophet-based price forecasting for multiple platforms"""
+    
+    METRIC = 'price'
+    PROPHET_PARAMS = {
+        'yearly_seasonality': True,
+        'weekly_seasonality': True,
+        'daily_seasonality': False,
+        'interval_width': 0.95
+    }
+    
     def prepare_data(self, df, platform_col, date_col, price_col):
         """
         Prepare data for Prophet
@@ -31,7 +532,8 @@ class PriceForecastor:
         if date_col not in df.columns or price_col not in df.columns:
             return prepared_data
         
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+        # Convert on a copy: the input frame is shared through PRODUCT_CACHE
+        df = df.assign(**{date_col: pd.to_datetime(df[date_col], errors='coerce')})
         df = df.dropna(subset=[date_col, price_col])
         
         if platform_col in df.columns:
@@ -59,54 +561,23 @@ class PriceForecastor:
                 prepared_data[str(platform)] = prophet_df
         
         return prepared_data
-    
-    def forecast(self, prepared_data, periods=90):
-        """
-        Generate price forecast for given periods
-        
-        Args:
-            prepared_data: dict from prepare_data method
-            periods: number of periods to forecast (default 90 days)
-            
-        Returns:
-            dict: {platform: forecast DataFrame}
-        """
-        for platform, data in prepared_data.items():
-            try:
-                model = Prophet(
-                    yearly_seasonality=True,
-                    weekly_seasonality=True,
-                    daily_seasonality=False,
-                    interval_width=0.95
-                )
-                model.fit(data)
-                
-                future = model.make_future_dataframe(periods=periods)
-                forecast = model.predict(future)
-                
-                self.models[platform] = model
-                self.forecasts[platform] = forecast
-            except Exception as e:
-                print(f"Error forecasting for {platform}: {str(e)}")
-        
-        return self.forecasts
-    
-    def get_forecast_dataframe(self, platform):
-        """Get forecast data for a specific platform"""
-        if platform in self.forecasts:
-            forecast = self.forecasts[platform]
-            return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-        return None
 
 
-class SalesForecastor:
+class SalesForecastor(BaseForecastor):
     """Prophet-based sales forecasting for multiple platforms"""
     
-    def __init__(self, product_name):
-        self.product_name = product_name
-        self.models = {}
-        self.forecasts = {}
-        
+    METRIC = 'sales'
+    PROPHET_PARAMS = {
+        'yearly_seasonality': True,
+        'weekly_seasonality': True,
+        'daily_seasonality': False,
+        'interval_width': 0.95,
+        'changepoint_prior_scale': 0.05
+    }
+    # Ensure non-negative forecasts for sales
+    NON_NEGATIVE = True
+    ERROR_PREFIX = 'Error forecasting sales'
+    
     def prepare_data(self, df, platform_col, date_col, sales_col):
         """
         Prepare data for Prophet
@@ -125,7 +596,8 @@ class SalesForecastor:
         if date_col not in df.columns or sales_col not in df.columns:
             return prepared_data
         
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+        # Convert on a copy: the input frame is shared through PRODUCT_CACHE
+        df = df.assign(**{date_col: pd.to_datetime(df[date_col], errors='coerce')})
         df = df.dropna(subset=[date_col, sales_col])
         
         if platform_col in df.columns:
@@ -150,46 +622,3 @@ class SalesForecastor:
                 prepared_data[str(platform)] = prophet_df
         
         return prepared_data
-    
-    def forecast(self, prepared_data, periods=90):
-        """
-        Generate sales forecast for given periods
-        
-        Args:
-            prepared_data: dict from prepare_data method
-            periods: number of periods to forecast (default 90 days)
-            
-        Returns:
-            dict: {platform: forecast DataFrame}
-        """
-        for platform, data in prepared_data.items():
-            try:
-                model = Prophet(
-                    yearly_seasonality=True,
-                    weekly_seasonality=True,
-                    daily_seasonality=False,
-                    interval_width=0.95,
-                    changepoint_prior_scale=0.05
-                )
-                model.fit(data)
-                
-                future = model.make_future_dataframe(periods=periods)
-                forecast = model.predict(future)
-                
-                # Ensure non-negative forecasts for sales
-                forecast['yhat'] = forecast['yhat'].clip(lower=0)
-                forecast['yhat_lower'] = forecast['yhat_lower'].clip(lower=0)
-                
-                self.models[platform] = model
-                self.forecasts[platform] = forecast
-            except Exception as e:
-                print(f"Error forecasting sales for {platform}: {str(e)}")
-        
-        return self.forecasts
-    
-    def get_forecast_dataframe(self, platform):
-        """Get forecast data for a specific platform"""
-        if platform in self.forecasts:
-            forecast = self.forecasts[platform]
-            return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-        return None
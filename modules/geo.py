@@ -0,0 +1,208 @@
+import os
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modules.tracing import record_error
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Bundled pin code coordinates and the directory for their compiled index
+DEFAULT_PINCODE_CSV = APP_DIR / 'data' / 'geo' / 'pincodes.csv'
+DEFAULT_INDEX_DIR = APP_DIR / 'artifacts' / 'geo'
+
+# Key layout: prefix length * 10^6 + numeric prefix, e.g. 3000560 for district 560
+PREFIX_LEVELS = [6, 3, 2, 1]
+LEVEL_SCALE = 1_000_000
+
+INDEX_DTYPE = np.dtype([('key', '<u4'), ('lat', '<f8'), ('lon', '<f8')])
+
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km between coordinate arrays
+    
+    Inputs are in degrees and broadcast against each other, so a column of
+    user coordinates against a row of warehouse coordinates yields the full
+    distance matrix.
+    """
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    delta_lat = lat2_rad - lat1_rad
+    delta_lon = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    
+    return EARTH_RADIUS_KM * c
+
+
+def _make_key(prefix):
+    return len(prefix) * LEVEL_SCALE + int(prefix)
+
+
+def fallback_coordinates(pin_code):
+    """
+    Deterministic approximate coordinates for pins outside the index
+    
+    Uses CRC32 so every process and replica maps a pin to the same point.
+    """
+    digest = zlib.crc32(str(pin_code).strip().encode('utf-8'))
+    return 10 + (digest % 30), 65 + (digest % 40)
+
+
+class PincodeIndex:
+    """
+    Pin code -> (lat, lon) lookup backed by a sorted, memory-mapped array
+    
+    The bundled CSV lists exact 6-digit pins plus 3-digit (sorting district),
+    2-digit (postal circle) and 1-digit (zone) prefix centroids; zones missing
+    from the CSV are averaged from their circles. It is compiled once into a
+    single sorted .npy file that later processes open with mmap_mode='r', so
+    startup costs one small file open and each lookup is a binary search.
+    A pin resolves to its exact entry, else to the longest matching prefix,
+    else to fallback_coordinates().
+    """
+    
+    def __init__(self, csv_path=DEFAULT_PINCODE_CSV, index_dir=DEFAULT_INDEX_DIR):
+        self.csv_path = str(csv_path)
+        self.index_path = os.path.join(str(index_dir), Path(self.csv_path).stem + '.npy')
+        self._entries = self._load()
+        self._keys = self._entries['key']
+    
+    def _load(self):
+        """Open the compiled index, rebuilding it if the CSV is newer"""
+        try:
+            if os.path.getmtime(self.index_path) >= os.path.getmtime(self.csv_path):
+                return np.load(self.index_path, mmap_mode='r')
+        except OSError:
+            pass
+        
+        entries = self.compile(self.csv_path)
+        try:
+            directory = os.path.dirname(self.index_path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, entries)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            record_error(f"Error saving pin code index: {str(e)}")
+        return entries
+    
+    @staticmethod
+    def compile(csv_path):
+        """
+        Build the sorted index array from the pin code CSV
+        
+        Returns:
+            structured array with key/lat/lon fields, sorted by key
+        """
+        if not os.path.exists(csv_path):
+            record_error(f"Error loading pin code data: {csv_path} not found")
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        
+        df = pd.read_csv(csv_path, dtype={'pincode': str})
+        df['pincode'] = df['pincode'].str.strip()
+        df = df[df['pincode'].str.fullmatch(r'\d{1,6}') & df['pincode'].str.len().isin(PREFIX_LEVELS)]
+        df = df.drop_duplicates('pincode', keep='first')
+        
+        # Derive zone centroids that the CSV does not list from its circles
+        circles = df[df['pincode'].str.len() == 2]
+        zones = circles.groupby(circles['pincode'].str[0])[['latitude', 'longitude']].mean()
+        zones = zones[~zones.index.isin(df['pincode'])].reset_index()
+        df = pd.concat([df, zones], ignore_index=True)
+        
+        entries = np.zeros(len(df), dtype=INDEX_DTYPE)
+        entries['key'] = [_make_key(pin) for pin in df['pincode']]
+        entries['lat'] = df['latitude'].to_numpy(dtype=np.float64)
+        entries['lon'] = df['longitude'].to_numpy(dtype=np.float64)
+        entries.sort(order='key')
+        return entries
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def _find(self, keys):
+        """Binary-search keys; returns (positions, found mask)"""
+        positions = np.searchsorted(self._keys, keys)
+        positions = np.minimum(positions, max(len(self._keys) - 1, 0))
+        if len(self._keys) == 0:
+            return positions, np.zeros(len(keys), dtype=bool)
+        return positions, self._keys[positions] == keys
+    
+    def lookup(self, pin_codes):
+        """
+        Resolve an array of pin codes to coordinates
+        
+        Args:
+            pin_codes: array-like of pin codes (str or int)
+        
+        Returns:
+            tuple: (latitudes, longitudes) as float arrays shaped like pin_codes
+        """
+        pins = np.char.strip(np.asarray(pin_codes).astype(str))
+        shape = pins.shape
+        pins = pins.ravel()
+        
+        lat = np.full(len(pins), np.nan)
+        lon = np.full(len(pins), np.nan)
+        
+        valid = np.char.isdigit(pins) & (np.char.str_len(pins) == 6)
+        numeric = np.zeros(len(pins), dtype=np.int64)
+        numeric[valid] = pins[valid].astype(np.int64)
+        
+        pending = valid.copy()
+        for level in PREFIX_LEVELS:
+            if not pending.any():
+                break
+            keys = level * LEVEL_SCALE + numeric[pending] // 10 ** (6 - level)
+            positions, found = self._find(keys)
+            rows = np.flatnonzero(pending)[found]
+            lat[rows] = self._entries['lat'][positions[found]]
+            lon[rows] = self._entries['lon'][positions[found]]
+            pending[rows] = False
+        
+        # Unknown or malformed pins get deterministic approximate coordinates
+        for i in np.flatnonzero(np.isnan(lat)):
+            lat[i], lon[i] = fallback_coordinates(pins[i])
+        
+        return lat.reshape(shape), lon.reshape(shape)
+    
+    def regions(self):
+        """
+        All indexed pins and prefix regions
+        
+        Returns:
+            tuple: (codes, latitudes, longitudes); codes are zero-padded prefixes
+        """
+        levels = self._keys // LEVEL_SCALE
+        values = self._keys % LEVEL_SCALE
+        codes = np.array([str(value).zfill(level) for level, value in zip(levels, values)])
+        return codes, np.asarray(self._entries['lat']), np.asarray(self._entries['lon'])
+    
+    def get(self, pin_code):
+        """Resolve a single pin code to (lat, lon)"""
+        lat, lon = self.lookup([pin_code])
+        return float(lat[0]), float(lon[0])
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_pincode_index():
+    """Get the process-wide pin code index, opening it on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PincodeIndex()
+        return _index
@@ -1,6 +1,18 @@
 import pandas as pd
 import numpy as np
 
+from modules.tracing import add_rows, traced
+
+# Component order of weight vectors passed to calculate_batch_scores
+SCORE_COMPONENTS = ['fake_reviews', 'price_stability', 'sales_trend', 'eco_friendliness', 'platform_reliability']
+
+ECO_COLOR_SCORES = {
+    'green': 95,
+    'yellow': 60,
+    'orange': 35,
+    'red': 10
+}
+
 
 class ProductScoreCalculator:
     """Calculate overall product score based on multiple factors"""
@@ -133,14 +145,7 @@ class ProductScoreCalculator:
         Returns:
             score (0-100)
         """
-        color_scores = {
-            'green': 95,
-            'yellow': 60,
-            'orange': 35,
-            'red': 10
-        }
-        
-        return color_scores.get(eco_color, 50)
+        return ECO_COLOR_SCORES.get(eco_color, 50)
     
     def calculate_platform_reliability_score(self, platform_name):
         """
@@ -206,6 +211,98 @@ class ProductScoreCalculator:
         
         return overall_score, scores
     
+    @staticmethod
+    def forecast_metrics(forecasts, lookback_days=30):
+        """
+        Price/sales trend inputs of many forecasts at once
+        
+        The first lookback_days values of every forecast are stacked into a
+        NaN-padded matrix, so the coefficient of variation and the relative
+        linear-regression slope are computed row-wise in one pass.
+        
+        Args:
+            forecasts: sequence of forecast DataFrames (yhat column) or None
+            lookback_days: number of days to analyze
+            
+        Returns:
+            tuple: (cv, slope_percent) float arrays, NaN where a forecast is missing
+            or too short, or where its mean is zero
+        """
+        values = np.full((len(forecasts), lookback_days), np.nan)
+        for i, forecast in enumerate(forecasts):
+            if forecast is not None:
+                head = forecast['yhat'].to_numpy(dtype=float)[:lookback_days]
+                values[i, :len(head)] = head
+        
+        valid = ~np.isnan(values)
+        n = valid.sum(axis=1)
+        usable = n >= 2
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(values, axis=1) / n
+            centered = np.where(valid, values - mean[:, None], 0.0)
+            std = np.sqrt((centered ** 2).sum(axis=1) / (n - 1))
+            
+            # Valid values are a prefix, so x = 0..n-1 on every row
+            x_centered = np.where(valid, np.arange(lookback_days) - (n[:, None] - 1) / 2, 0.0)
+            slope = (x_centered * centered).sum(axis=1) / (x_centered ** 2).sum(axis=1)
+            
+            usable &= mean != 0
+            cv = np.where(usable, std / mean, np.nan)
+            slope_percent = np.where(usable, slope / mean * 100, np.nan)
+        
+        return cv, slope_percent
+    
+    @traced('score.batch')
+    def calculate_batch_scores(self, metrics, weights=None):
+        """
+        Score many (product, platform) combinations with array operations
+        
+        Equivalent to calculate_overall_score row by row, with the forecast
+        inputs precomputed by forecast_metrics().
+        
+        Args:
+            metrics: DataFrame with columns 'fake_review_pct', 'price_cv',
+                'sales_slope_pct', 'eco_color' and 'platform' (NaN price/sales
+                metrics score the neutral 50); any other columns are kept
+            weights: dict of component weights (e.g. config.SCORE_WEIGHTS) or a
+                sequence in SCORE_COMPONENTS order; defaults to self.weights
+            
+        Returns:
+            DataFrame: metrics plus one column per component score, 'overall'
+            and 'rank' (1 = best)
+        """
+        if weights is None:
+            weights = self.weights
+        if isinstance(weights, dict):
+            weights = [weights[component] for component in SCORE_COMPONENTS]
+        weights = np.asarray(weights, dtype=float)
+        if weights.shape != (len(SCORE_COMPONENTS),):
+            raise ValueError(f"Expected {len(SCORE_COMPONENTS)} weights, got shape {weights.shape}")
+        
+        add_rows(len(metrics))
+        fake_pct = metrics['fake_review_pct'].to_numpy(dtype=float)
+        price_cv = metrics['price_cv'].to_numpy(dtype=float)
+        slope_percent = metrics['sales_slope_pct'].to_numpy(dtype=float)
+        
+        platform_scores = {name: self.calculate_platform_reliability_score(str(name))
+                           for name in pd.unique(metrics['platform'])}
+        
+        components = np.column_stack([
+            np.clip(100 - fake_pct, 0, 100),
+            np.where(np.isnan(price_cv), 50, np.clip(100 - price_cv * 200, 0, 100)),
+            np.where(np.isnan(slope_percent), 50, np.clip(50 + slope_percent * 3, 0, 100)),
+            metrics['eco_color'].map(ECO_COLOR_SCORES).fillna(50).to_numpy(dtype=float),
+            metrics['platform'].map(platform_scores).to_numpy(dtype=float)
+        ])
+        
+        result = metrics.copy()
+        for i, component in enumerate(SCORE_COMPONENTS):
+            result[component] = components[:, i]
+        result['overall'] = components @ weights
+        result['rank'] = result['overall'].rank(ascending=False, method='min').astype(int)
+        return result
+    
     def get_score_interpretation(self, score):
         """
         Get interpretation of overall score
@@ -0,0 +1,284 @@
+"""
+Lightweight tracing for the analytics hot paths
+
+Stages wrap their work in nested timing spans (`with span('forecast.fit'):`
+or `@traced('...')`), attach row counts with add_rows() and report cache
+lookups with record_cache(). Every finished top-level span is kept in a
+short history (shown by the app's developer overlay) and, when a trace log
+is configured, written as one JSON line. Span timings, row counts, cache
+hits/misses and errors are also aggregated into process-wide metrics that
+prometheus_text() renders in the Prometheus text exposition format.
+
+Spans nest per thread; work handed to worker processes is timed as one span
+in the calling thread.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# No handler of its own: until a trace log or the application configures
+# logging, handled errors reach stderr once through logging's last resort
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed stage, with its attributes, cache lookups and child spans"""
+    
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = dict(attrs)
+        self.started_at = datetime.now()
+        self.duration_ms = None
+        self.rows = None
+        self.cache = {}
+        self.errors = []
+        self.children = []
+    
+    def to_dict(self):
+        """JSON-ready representation of the span tree"""
+        result = {'name': self.name, 'started_at': self.started_at.isoformat(timespec='milliseconds'),
+                  'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None}
+        if self.attrs:
+            result['attrs'] = {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                               for key, value in self.attrs.items()}
+        if self.rows is not None:
+            result['rows'] = self.rows
+        if self.cache:
+            result['cache'] = {name: dict(counts) for name, counts in self.cache.items()}
+        if self.errors:
+            result['errors'] = list(self.errors)
+        if self.children:
+            result['children'] = [child.to_dict() for child in self.children]
+        return result
+    
+    def flatten(self, depth=0):
+        """
+        Returns:
+            list of (depth, span) pairs for the span and its descendants, in start order
+        """
+        rows = [(depth, self)]
+        for child in self.children:
+            rows.extend(child.flatten(depth + 1))
+        return rows
+
+
+class Tracer:
+    """Process-wide span recorder and metrics registry"""
+    
+    def __init__(self, history=50):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=history)
+        self.span_seconds = {}
+        self.counters = {}
+        self.caches = {}
+        self._log_handler = None
+    
+    def configure(self, log_path=None, history=None):
+        """
+        Args:
+            log_path: append every finished trace to this file as JSON lines (None stops file logging)
+            history: number of recent traces to keep
+        """
+        with self._lock:
+            if history is not None and history != self.recent.maxlen:
+                self.recent = deque(self.recent, maxlen=history)
+            if self._log_handler is not None:
+                logger.removeHandler(self._log_handler)
+                self._log_handler.close()
+                self._log_handler = None
+            if log_path:
+                os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+                self._log_handler = logging.FileHandler(log_path, encoding='utf-8')
+                self._log_handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(self._log_handler)
+                logger.setLevel(logging.INFO)
+    
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def current(self):
+        """Innermost open span of the calling thread, or None"""
+        stack = self._stack()
+        return stack[-1] if stack else None
+    
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the enclosed block as a span nested in the calling thread's current span"""
+        current = Span(name, attrs)
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        stack.append(current)
+        start = time.perf_counter()
+        try:
+            yield current
+        except Exception as e:
+            current.errors.append(f"{type(e).__name__}: {str(e)}")
+            raise
+        finally:
+            current.duration_ms = (time.perf_counter() - start) * 1000
+            stack.pop()
+            self._finish(current, parent)
+    
+    def _finish(self, finished, parent):
+        with self._lock:
+            count, total, slowest = self.span_seconds.get(finished.name, (0, 0.0, 0.0))
+            seconds = finished.duration_ms / 1000
+            self.span_seconds[finished.name] = (count + 1, total + seconds, max(slowest, seconds))
+            if finished.rows is not None:
+                self._increment('trace_rows_total', finished.rows, span=finished.name)
+            if parent is None:
+                self.recent.append(finished)
+        
+        if parent is not None:
+            parent.children.append(finished)
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'event': 'trace', **finished.to_dict()}))
+    
+    def _increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+    
+    def count(self, name, value=1, **labels):
+        """Add value to a labelled counter"""
+        with self._lock:
+            self._increment(name, value, **labels)
+    
+    def add_rows(self, rows):
+        """Add to the number of rows processed by the current span"""
+        current = self.current()
+        if current is not None:
+            current.rows = (current.rows or 0) + int(rows)
+    
+    def record_cache(self, cache_name, hit):
+        """Count a cache lookup, globally and on the current span"""
+        result = 'hit' if hit else 'miss'
+        self.count('trace_cache_requests_total', cache=cache_name, result=result)
+        current = self.current()
+        if current is not None:
+            counts = current.cache.setdefault(cache_name, {'hit': 0, 'miss': 0})
+            counts[result] += 1
+    
+    def record_error(self, message, exc_info=False):
+        """
+        Report a handled error: counted per span, attached to the current
+        span and logged as a structured event
+        
+        Args:
+            message: error description
+            exc_info: also log the traceback of the exception being handled
+        """
+        details = traceback.format_exc() if exc_info else None
+        current = self.current()
+        stage = current.name if current is not None else 'none'
+        self.count('trace_errors_total', span=stage)
+        if current is not None:
+            current.errors.append(message)
+        if logger.isEnabledFor(logging.WARNING):
+            event = {'event': 'error', 'span': stage, 'message': message,
+                     'at': datetime.now().isoformat(timespec='milliseconds')}
+            if details:
+                event['traceback'] = details
+            logger.warning(json.dumps(event))
+    
+    def register_cache(self, cache_name, cache):
+        """Export a cache's stats() (entries, bytes, hits, misses) as gauges"""
+        with self._lock:
+            self.caches[cache_name] = cache
+    
+    def recent_traces(self, name=None):
+        """Finished top-level spans, oldest first, optionally only those with the given name"""
+        with self._lock:
+            return [trace for trace in self.recent if name is None or trace.name == name]
+    
+    def prometheus_text(self):
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            span_seconds = dict(self.span_seconds)
+            counters = dict(self.counters)
+            caches = dict(self.caches)
+        
+        lines = [
+            '# HELP trace_span_seconds Time spent in each traced stage',
+            '# TYPE trace_span_seconds summary'
+        ]
+        for name, (count, total, _) in sorted(span_seconds.items()):
+            lines.append(f'trace_span_seconds_count{{span="{_escape(name)}"}} {count}')
+            lines.append(f'trace_span_seconds_sum{{span="{_escape(name)}"}} {total:.6f}')
+        lines.append('# HELP trace_span_max_seconds Slowest run of each traced stage')
+        lines.append('# TYPE trace_span_max_seconds gauge')
+        for name, (_, _, slowest) in sorted(span_seconds.items()):
+            lines.append(f'trace_span_max_seconds{{span="{_escape(name)}"}} {slowest:.6f}')
+        
+        for metric in sorted({name for name, _ in counters}):
+            lines.append(f'# TYPE {metric} counter')
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f'{metric}{_labels(labels)} {value}')
+        
+        cache_stats = {name: cache.stats() for name, cache in sorted(caches.items())}
+        for field in ('entries', 'bytes', 'hits', 'misses'):
+            lines.append(f'# TYPE cache_{field} gauge')
+            for name, stats in cache_stats.items():
+                lines.append(f'cache_{field}{{cache="{_escape(name)}"}} {stats[field]}')
+        
+        return '\n'.join(lines) + '\n'
+    
+    def reset(self):
+        """Drop recorded traces and metrics (registered caches are kept)"""
+        with self._lock:
+            self.recent.clear()
+            self.span_seconds.clear()
+            self.counters.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+TRACER = Tracer()
+
+
+def span(name, **attrs):
+    """Time a block as a span of the process-wide tracer"""
+    return TRACER.span(name, **attrs)
+
+
+def traced(name):
+    """Decorator timing every call of a function as a span"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_rows(rows):
+    TRACER.add_rows(rows)
+
+
+def record_cache(cache_name, hit):
+    TRACER.record_cache(cache_name, hit)
+
+
+def record_error(message, exc_info=False):
+    TRACER.record_error(message, exc_info)
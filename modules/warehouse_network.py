@@ -0,0 +1,173 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import normalize_product_name
+from modules.geo import EARTH_RADIUS_KM, get_pincode_index, haversine
+
+
+PIN_COLUMNS = ['pin', 'pincode', 'pin_code', 'warehouse_pin', 'warehouse_zip_code', 'warehouse_zipcode']
+PLATFORM_COLUMNS = ['platform', 'marketplace', 'seller']
+PRODUCT_COLUMNS = ['product_name', 'product', 'name']
+
+# Platforms assigned to the first rows of a warehouse file without a platform column
+DEFAULT_PLATFORMS = ['Amazon', 'Flipkart', 'eBay']
+
+
+class WarehouseNetwork:
+    """
+    Every warehouse that fulfils each product on each platform
+
+    Warehouses are kept as parallel arrays (pin, platform, product, lat, lon),
+    so one platform can ship a product from several locations. Nearest
+    fulfilling warehouse queries go through a haversine BallTree built lazily
+    per (platform, product) and reused for every later query.
+    """
+
+    def __init__(self, warehouses, pincode_index=None):
+        """
+        Args:
+            warehouses: DataFrame with pin, platform and optional product columns
+            pincode_index: PincodeIndex for geocoding (defaults to the shared index)
+        """
+        self.pincode_index = pincode_index if pincode_index is not None else get_pincode_index()
+        self._trees = {}
+        self._lock = threading.Lock()
+
+        frame = self._normalize(warehouses)
+        self.pins = frame['pin'].to_numpy(dtype=str)
+        self.platforms = frame['platform'].to_numpy(dtype=object)
+        self.products = frame['product'].to_numpy(dtype=object)
+        self.product_keys = np.array([normalize_product_name(name) if name else '' for name in self.products],
+                                     dtype=object)
+        self.lat, self.lon = self.pincode_index.lookup(self.pins)
+
+    @classmethod
+    def from_csv(cls, csv_path, pincode_index=None):
+        """Build the network from a warehouse or cross-platform CSV"""
+        return cls(pd.read_csv(csv_path), pincode_index)
+
+    @staticmethod
+    def _normalize(df):
+        """Reduce a warehouse table to unique pin/platform/product rows"""
+        pin_col = next((col for col in df.columns if col.lower() in PIN_COLUMNS), None)
+        platform_col = next((col for col in df.columns if col.lower() in PLATFORM_COLUMNS), None)
+        product_col = next((col for col in df.columns if col.lower() in PRODUCT_COLUMNS), None)
+
+        if pin_col is None:
+            return pd.DataFrame(columns=['pin', 'platform', 'product'])
+
+        frame = pd.DataFrame({'pin': df[pin_col].astype(str).str.strip()})
+        if platform_col is not None:
+            frame['platform'] = df[platform_col].astype(str).str.strip()
+        else:
+            # Default platforms if not specified
+            frame = frame.iloc[:len(DEFAULT_PLATFORMS)].copy()
+            frame['platform'] = DEFAULT_PLATFORMS[:len(frame)]
+        frame['product'] = df[product_col].astype(str).str.strip() if product_col is not None else ''
+
+        return frame.dropna().drop_duplicates().reset_index(drop=True)
+
+    def __len__(self):
+        return len(self.pins)
+
+    def get_platforms(self):
+        """Platforms with at least one warehouse, in file order"""
+        return list(dict.fromkeys(self.platforms))
+
+    def get_warehouses(self, platform=None, product_name=None):
+        """
+        Get the warehouses matching a platform and/or product
+
+        Returns:
+            DataFrame with pin, platform, product, lat, lon columns
+        """
+        mask = self._mask(platform, product_name)
+        return pd.DataFrame({
+            'pin': self.pins[mask],
+            'platform': self.platforms[mask],
+            'product': self.products[mask],
+            'lat': self.lat[mask],
+            'lon': self.lon[mask]
+        })
+
+    def _product_mask(self, product_name):
+        """Match a product name exactly or by containment after normalization"""
+        key = normalize_product_name(product_name)
+        exact = self.product_keys == key
+        if exact.any() or not key:
+            return exact
+        return np.array([bool(other) and (key in other or other in key) for other in self.product_keys],
+                        dtype=bool)
+
+    def _mask(self, platform=None, product_name=None):
+        mask = np.ones(len(self.pins), dtype=bool)
+        if platform is not None:
+            mask &= self.platforms == platform
+        if product_name is not None:
+            mask &= self._product_mask(product_name)
+        return mask
+
+    def _tree(self, platform, product_name=None):
+        """
+        Get the BallTree over warehouses fulfilling product_name on platform
+
+        Falls back to all of the platform's warehouses when none list the
+        product. Returns (tree, warehouse row indices) or (None, None).
+        """
+        cache_key = (platform, normalize_product_name(product_name) if product_name else None)
+
+        with self._lock:
+            if cache_key in self._trees:
+                return self._trees[cache_key]
+
+            rows = np.flatnonzero(self._mask(platform, product_name))
+            if len(rows) == 0 and product_name is not None:
+                rows = np.flatnonzero(self._mask(platform))
+
+            if len(rows) == 0:
+                entry = (None, None)
+            else:
+                # Imported on first query so that loading the network stays cheap
+                from sklearn.neighbors import BallTree
+                
+                points = np.radians(np.column_stack([self.lat[rows], self.lon[rows]]))
+                entry = (BallTree(points, metric='haversine'), rows)
+
+            self._trees[cache_key] = entry
+            return entry
+
+    def nearest(self, platform, user_lat, user_lon, product_name=None):
+        """
+        Find the nearest warehouse fulfilling a product on a platform
+
+        Args:
+            platform: platform name
+            user_lat: array of user latitudes
+            user_lon: array of user longitudes
+            product_name: optional product the warehouse must stock
+
+        Returns:
+            tuple: (warehouse row indices, distances in km) as arrays, or (None, None)
+                   if the platform has no warehouses
+        """
+        tree, rows = self._tree(platform, product_name)
+        if tree is None:
+            return None, None
+
+        user_points = np.radians(np.column_stack([np.ravel(user_lat), np.ravel(user_lon)]))
+        distance, position = tree.query(user_points, k=1)
+        return rows[position[:, 0]], distance[:, 0] * EARTH_RADIUS_KM
+
+    def region_distance_matrix(self):
+        """
+        Distances from every warehouse to every indexed pin-code region
+
+        Returns:
+            tuple: (region codes, distance matrix of shape (n_regions, n_warehouses) in km)
+        """
+        codes, region_lat, region_lon = self.pincode_index.regions()
+        distance = haversine(region_lat[:, np.newaxis], region_lon[:, np.newaxis],
+                             self.lat[np.newaxis, :], self.lon[np.newaxis, :])
+        return codes, distance
@@ -0,0 +1,91 @@
+"""
+Precompute price and sales forecasts into the on-disk forecast store
+
+Run before the app starts serving so that Streamlit workers load fitted
+forecasts from disk instead of refitting Prophet after every restart.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import config
+from modules.data_loader import DataLoader
+from modules.forecast_store import ForecastStore
+from modules.forecasting import PriceForecastor, SalesForecastor
+
+
+def precompute_forecasts(data_dir, store_dir, periods=config.FORECAST_PERIODS,
+                         n_jobs=config.FORECAST_WORKERS, backend=config.FORECAST_BACKEND,
+                         incremental=config.FORECAST_INCREMENTAL):
+    """
+    Fit forecasts for every available product and persist them
+    
+    Args:
+        data_dir: directory with the product CSV files
+        store_dir: forecast store directory
+        periods: forecast horizon in days
+        incremental: refit only series that changed since their last stored fit, warm-started
+    
+    Returns:
+        int: number of forecasts available in the store
+    """
+    data_loader = DataLoader(str(data_dir))
+    store = ForecastStore(store_dir)
+    
+    for product in data_loader.get_available_products():
+        start = time.time()
+        product_reviews = data_loader.load_product_reviews(product)
+        
+        if product_reviews is None:
+            print(f"⚠️  Skipping {product}: could not load data")
+            continue
+        
+        # Same column detection as the product details page
+        platform_col = data_loader.extract_platform_column(product_reviews) or 'Platform'
+        date_col = data_loader.extract_date_column(product_reviews)
+        price_col = data_loader.extract_price_column(product_reviews)
+        sales_col = data_loader.extract_sales_column(product_reviews)
+        
+        forecasters = [
+            (PriceForecastor(product, store=store, backend=backend, n_jobs=n_jobs,
+                             timeout=config.FORECAST_TIMEOUT, incremental=incremental), price_col),
+            (SalesForecastor(product, store=store, backend=backend, n_jobs=n_jobs,
+                             timeout=config.FORECAST_TIMEOUT, incremental=incremental), sales_col)
+        ]
+        
+        for forecaster, value_col in forecasters:
+            if not (date_col and value_col):
+                continue
+            prepared_data = forecaster.prepare_data(product_reviews, platform_col, date_col, value_col)
+            if prepared_data:
+                forecaster.forecast(prepared_data, periods=periods)
+        
+        print(f"✅ {product} ({time.time() - start:.1f}s)")
+    
+    return len(store)
+
+
+if __name__ == "__main__":
+    app_dir = Path(__file__).parent
+    
+    parser = argparse.ArgumentParser(description="Precompute forecasts into the on-disk forecast store")
+    parser.add_argument('--data-dir', type=str, default=str(app_dir / 'data'), help='Path to data directory')
+    parser.add_argument('--store-dir', type=str, default=str(app_dir / config.FORECAST_STORE_DIR),
+                        help='Path to forecast store directory')
+    parser.add_argument('--periods', type=int, default=config.FORECAST_PERIODS, help='Forecast horizon in days')
+    parser.add_argument('--workers', type=int, default=config.FORECAST_WORKERS,
+                        help='Worker processes for parallel fitting (1 = in-process)')
+    parser.add_argument('--backend', type=str, default=config.FORECAST_BACKEND, help="Forecasting engine ('prophet' or 'numpy')")
+    parser.add_argument('--full', action='store_true',
+                        help='Refit every series from scratch instead of only those that changed')
+    
+    args = parser.parse_args()
+    
+    print("📈 Precomputing forecasts...\n")
+    total = precompute_forecasts(args.data_dir, args.store_dir, args.periods, args.workers, args.backend,
+                                 incremental=config.FORECAST_INCREMENTAL and not args.full)
+    print(f"\n✅ Forecast store ready: {total} forecast(s) in {args.store_dir}")
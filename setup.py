@@ -38,11 +38,11 @@ def verify_python_version():
     version = sys.version_info
     print(f"Python {version.major}.{version.minor}.{version.micro}")
     
-    if version.major == 3 and version.minor >= 8:
-        print("✅ Python version OK (3.8+)")
+    if version.major == 3 and version.minor >= 10:
+        print("✅ Python version OK (3.10+)")
         return True
     else:
-        print("❌ Python 3.8 or higher required")
+        print("❌ Python 3.10 or higher required")
         return False
 
 def create_data_directory():
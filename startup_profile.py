@@ -0,0 +1,176 @@
+"""
+Cold-start profiler for the Streamlit app
+
+Measures, each in a fresh interpreter:
+- import time of every module app.py imports (via python -X importtime)
+- time to first render of the home page (via Streamlit's AppTest)
+
+and reports whether the heavy ML packages were imported on the way. Run it
+in CI with budgets to catch cold-start regressions; it exits non-zero when
+a budget is exceeded or a deferred package is imported at startup.
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+import config
+
+APP_DIR = Path(__file__).parent
+
+# Modules app.py imports at startup
+APP_MODULES = [
+    'config',
+    'modules.data_loader',
+    'modules.fake_review_detector',
+    'modules.forecast_store',
+    'modules.carbon_emissions',
+    'modules.analytics',
+    'modules.analytics_service'
+]
+
+# Packages that must only be imported on first use, never to draw the home page
+DEFERRED_PACKAGES = ['prophet', 'cmdstanpy', 'xgboost', 'sklearn', 'scipy']
+
+RENDER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+app.run()
+print(json.dumps({
+    'first_render_ms': (time.perf_counter() - start) * 1000,
+    'exceptions': [str(e.value) for e in app.exception],
+    'loaded': sorted({name.split('.')[0] for name in sys.modules})
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output
+    
+    Returns:
+        dict {module: (self ms, cumulative ms, nesting depth)} for every imported module
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000, depth)
+    return timings
+
+
+def profile_imports(modules=APP_MODULES):
+    """
+    Import the app's modules in a fresh interpreter and time each one
+    
+    Returns:
+        dict with per-module cumulative 'modules' ms, 'total_ms', the slowest
+        third-party 'packages' and the 'deferred_loaded' packages
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)],
+        cwd=str(APP_DIR), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the app modules failed:\n{result.stderr[-2000:]}")
+    
+    timings = parse_importtime(result.stderr)
+    packages = {name: cumulative for name, (_, cumulative, _) in timings.items() if '.' not in name}
+    slowest = sorted(
+        ((name, ms) for name, ms in packages.items() if name not in ('config', 'modules')),
+        key=lambda item: item[1], reverse=True
+    )
+    
+    return {
+        'modules': {name: round(timings[name][1], 1) for name in modules if name in timings},
+        'total_ms': round(sum(cumulative for _, cumulative, depth in timings.values() if depth == 0), 1),
+        'packages': {name: round(ms, 1) for name, ms in slowest[:10]},
+        'deferred_loaded': [name for name in DEFERRED_PACKAGES if name in packages]
+    }
+
+
+def profile_first_render(timeout=120):
+    """
+    Render the home page once in a fresh interpreter
+    
+    Returns:
+        dict with 'first_render_ms', script 'exceptions' and the 'deferred_loaded' packages
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', RENDER_SCRIPT, str(APP_DIR / 'app.py'), str(timeout)],
+        cwd=str(APP_DIR), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Rendering the home page failed:\n{result.stderr[-2000:]}")
+    
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['first_render_ms'] = round(report['first_render_ms'], 1)
+    loaded = set(report.pop('loaded'))
+    report['deferred_loaded'] = [name for name in DEFERRED_PACKAGES if name in loaded]
+    return report
+
+
+def check_budgets(report, max_import_ms, max_render_ms):
+    """
+    Returns:
+        list of budget violations (empty when the startup is within budget)
+    """
+    failures = []
+    if max_import_ms is not None and report['imports']['total_ms'] > max_import_ms:
+        failures.append(f"imports took {report['imports']['total_ms']:.0f} ms (budget {max_import_ms} ms)")
+    
+    render = report.get('render')
+    if render is not None:
+        if max_render_ms is not None and render['first_render_ms'] > max_render_ms:
+            failures.append(f"first render took {render['first_render_ms']:.0f} ms (budget {max_render_ms} ms)")
+        if render['exceptions']:
+            failures.append(f"home page raised: {render['exceptions']}")
+    
+    deferred = sorted(set(report['imports']['deferred_loaded']) | set((render or {}).get('deferred_loaded', [])))
+    if deferred:
+        failures.append(f"deferred packages imported at startup: {', '.join(deferred)}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the app's cold start")
+    parser.add_argument('--max-import-ms', type=float, default=config.STARTUP_IMPORT_BUDGET_MS,
+                        help='Fail when importing the app modules takes longer')
+    parser.add_argument('--max-render-ms', type=float, default=config.STARTUP_RENDER_BUDGET_MS,
+                        help='Fail when the first home page render takes longer')
+    parser.add_argument('--skip-render', action='store_true', help='Only profile imports')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    
+    args = parser.parse_args()
+    
+    report = {'imports': profile_imports()}
+    if not args.skip_render:
+        report['render'] = profile_first_render()
+    report['failures'] = check_budgets(report, args.max_import_ms, args.max_render_ms)
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("⏱️  Module import times (cumulative)\n")
+        for name, ms in report['imports']['modules'].items():
+            print(f"  {name:<32} {ms:8.1f} ms")
+        print(f"\n  {'total':<32} {report['imports']['total_ms']:8.1f} ms")
+        print("\n📦 Slowest packages\n")
+        for name, ms in report['imports']['packages'].items():
+            print(f"  {name:<32} {ms:8.1f} ms")
+        if 'render' in report:
+            print(f"\n🖥️  Time to first render: {report['render']['first_render_ms']:.0f} ms")
+        
+        print()
+        for failure in report['failures']:
+            print(f"❌ {failure}")
+        if not report['failures']:
+            print("✅ Cold start within budget")
+    
+    sys.exit(1 if report['failures'] else 0)
@@ -0,0 +1,350 @@
+"""
+Focused checks for the analytics core modules
+
+Run with pytest (python -m pytest test_core.py) or as a plain script
+(python test_core.py), which runs every test_* function and reports each result.
+"""
+
+import asyncio
+import os
+import pickle
+import threading
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT))
+
+TRAINING_DATA = ROOT / 'data' / 'model training.csv'
+
+
+def _write_csv(path, frame):
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+# Caches and stores
+
+def test_lru_cache_evicts_least_recently_used():
+    from modules.cache import LRUCache
+    
+    cache = LRUCache(max_entries=2, max_bytes=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.put('c', 3)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.get('b', 'missing') == 'missing'
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_lru_cache_byte_limit():
+    from modules.cache import LRUCache
+    
+    block = np.zeros(100, dtype=np.float64)  # 800 bytes
+    cache = LRUCache(max_entries=None, max_bytes=2000)
+    cache.put('a', block)
+    cache.put('b', block.copy())
+    assert cache.stats()['bytes'] == 1600
+    cache.put('c', block.copy())
+    assert 'a' not in cache and len(cache) == 2
+    assert cache.stats()['bytes'] <= 2000
+    # Values larger than the whole budget are not cached
+    cache.put('huge', np.zeros(1000))
+    assert 'huge' not in cache and len(cache) == 2
+
+
+def test_forecast_store_round_trip():
+    from modules.forecast_store import ForecastStore
+    
+    forecast = pd.DataFrame({
+        'ds': pd.date_range('2025-01-01', periods=5),
+        'yhat': np.arange(5.0),
+        'yhat_lower': np.arange(5.0) - 1,
+        'yhat_upper': np.arange(5.0) + 1
+    })
+    key = ('Product', 'Amazon', 'sales', 5, 'abc123', 'numpy')
+    state_key = ('Product', 'Amazon', 'sales', 5, 'numpy')
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ForecastStore(tmp)
+        assert store.load(key) is None and len(store) == 0
+        store.save(key, forecast)
+        
+        pd.testing.assert_frame_equal(store.load(key), forecast, check_freq=False)
+        assert len(store) == 1
+        assert store.get_entry(key)['rows'] == 5
+        assert store.load(key[:-1] + ('prophet',)) is None
+        
+        state = {'forecast_key': list(key), 'init': {'k': 0.1}}
+        store.save_state(state_key, state)
+        assert store.load_state(state_key) == state
+        # A fresh instance sees the same entries
+        pd.testing.assert_frame_equal(ForecastStore(tmp).load(key), forecast, check_freq=False)
+
+
+def test_forecast_store_prunes_superseded_versions():
+    from modules.forecast_store import ForecastStore
+    
+    forecast = pd.DataFrame({'ds': pd.date_range('2025-01-01', periods=3), 'yhat': np.zeros(3),
+                             'yhat_lower': np.zeros(3), 'yhat_upper': np.zeros(3)})
+    keys = [('Product', 'Amazon', 'sales', 3, f'hash{i}', 'numpy') for i in range(4)]
+    other = ('Product', 'Flipkart', 'sales', 3, 'hash0', 'numpy')
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ForecastStore(tmp, keep_versions=2)
+        store.save(other, forecast)
+        for i, key in enumerate(keys):
+            store.save(key, forecast)
+            # Distinct mtimes regardless of file system timestamp resolution
+            meta = os.path.join(tmp, store.entry_id(key) + store.META_SUFFIX)
+            os.utime(meta, (1_000_000 + i,) * 2)
+        
+        assert [store.load(key) is not None for key in keys] == [False, False, True, True]
+        assert store.load(other) is not None
+        assert len(store) == 3 and len(os.listdir(tmp)) == 9
+
+
+# Forecasting
+
+def test_forecasters_share_cached_fits():
+    """A second forecaster on identical data reuses the cached fits; changed data misses the cache"""
+    from modules.forecasting import DampedTrendBackend, ForecastCache, SalesForecastor
+    
+    fitted = []
+    
+    class CountingBackend(DampedTrendBackend):
+        def fit_predict(self, series, *args, **kwargs):
+            fitted.extend(series)
+            return super().fit_predict(series, *args, **kwargs)
+    
+    dates = pd.date_range('2025-01-01', periods=20).strftime('%Y-%m-%d')
+    frame = pd.DataFrame({
+        'date': np.tile(dates, 2),
+        'platform': np.repeat(['Amazon', 'Flipkart'], 20),
+        'sales': np.arange(40) % 7 + 10
+    })
+    cache = ForecastCache()
+    
+    def run(df):
+        forecaster = SalesForecastor('Product', cache=cache, backend=CountingBackend())
+        return forecaster.forecast(forecaster.prepare_data(df, 'platform', 'date', 'sales'), periods=7)
+    
+    first = run(frame)
+    assert sorted(fitted) == ['Amazon', 'Flipkart']
+    
+    # Another session or tab on the same data: no fit at all
+    second = run(frame.copy())
+    assert len(fitted) == 2
+    assert all(second[platform] is first[platform] for platform in first)
+    
+    # New Amazon data: only that platform is refitted
+    changed = frame.copy()
+    changed.loc[0, 'sales'] += 5
+    third = run(changed)
+    assert fitted[2:] == ['Amazon']
+    assert third['Flipkart'] is first['Flipkart'] and third['Amazon'] is not first['Amazon']
+    # Platforms keep the data's order whichever of them came from the cache
+    assert list(third) == ['Amazon', 'Flipkart']
+
+
+def test_damped_trend_backend():
+    from modules.forecasting import DampedTrendBackend
+    
+    ds = pd.date_range('2025-01-01', periods=30)
+    series = {
+        'Amazon': pd.DataFrame({'ds': ds, 'y': 10 + 2.0 * np.arange(30)}),
+        'Flipkart': pd.DataFrame({'ds': ds[:20], 'y': np.full(20, 5.0)}),
+        'eBay': pd.DataFrame({'ds': ds[:1], 'y': [1.0]})
+    }
+    forecasts, models, errors, states = DampedTrendBackend(damping=0.9).fit_predict(series, 10, {})
+    
+    assert set(forecasts) == {'Amazon', 'Flipkart'} and set(errors) == {'eBay'}
+    amazon = forecasts['Amazon']
+    assert len(amazon) == 40 and amazon['ds'].iloc[-1] == ds[-1] + pd.Timedelta(days=10)
+    # Exact fit on the history, then a trend that flattens out
+    np.testing.assert_allclose(amazon['yhat'].iloc[:30], series['Amazon']['y'], atol=1e-9)
+    steps = np.diff(amazon['yhat'].iloc[29:].to_numpy())
+    assert np.all(steps > 0) and np.all(np.diff(steps) < 0)
+    assert np.all(amazon['yhat_lower'] <= amazon['yhat']) and np.all(amazon['yhat'] <= amazon['yhat_upper'])
+    np.testing.assert_allclose(forecasts['Flipkart']['yhat'], 5.0)
+
+
+# Fake review detector
+
+def _training_frame():
+    df = pd.read_csv(TRAINING_DATA)
+    return df, df['review_text'].astype(str)
+
+
+def test_detector_sparse_dense_parity():
+    """The CSR features give the same probabilities as their dense equivalent"""
+    from modules.fake_review_detector import FakeReviewDetector
+    from scipy import sparse
+    
+    detector = FakeReviewDetector()
+    detector.train(TRAINING_DATA)
+    df, texts = _training_frame()
+    
+    X = detector._build_features(texts, df)
+    assert sparse.isspmatrix_csr(X)
+    sparse_probs = detector.model.predict_proba(X)[:, 1]
+    dense_probs = detector.model.predict_proba(X.toarray())[:, 1]
+    np.testing.assert_allclose(sparse_probs, dense_probs, atol=1e-6)
+    np.testing.assert_allclose(detector.predict(df), sparse_probs)
+
+
+def test_detector_retrains_old_feature_format():
+    """Artifacts saved with an older feature layout are retrained by the registry"""
+    from modules.fake_review_detector import DetectorRegistry, FakeReviewDetector, FEATURE_FORMAT
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'detector.pkl')
+        detector = FakeReviewDetector()
+        detector.train(TRAINING_DATA)
+        detector.feature_format = FEATURE_FORMAT - 1
+        detector.save(model_path)
+        # Newer than the training data, so it would otherwise be loaded as is
+        os.utime(model_path, (os.path.getmtime(TRAINING_DATA) + 10,) * 2)
+        
+        rebuilt = DetectorRegistry(TRAINING_DATA, model_path).get()
+        assert rebuilt.feature_format == FEATURE_FORMAT
+        with open(model_path, 'rb') as f:
+            assert pickle.load(f)['feature_format'] == FEATURE_FORMAT
+
+
+def test_batch_scoring_keeps_input_order():
+    """Chunks scored in worker processes are written back in input order"""
+    from modules.batch_scoring import score_csv
+    from modules.fake_review_detector import FakeReviewDetector
+    
+    df, _ = _training_frame()
+    reviews = pd.concat([df] * 3, ignore_index=True)
+    reviews.insert(0, 'review_id', np.arange(len(reviews)))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'detector.pkl')
+        detector = FakeReviewDetector()
+        detector.train(TRAINING_DATA)
+        detector.save(model_path)
+        input_path = _write_csv(os.path.join(tmp, 'reviews.csv'), reviews)
+        
+        serial_path = os.path.join(tmp, 'serial.csv')
+        parallel_path = os.path.join(tmp, 'parallel.csv')
+        score_csv(input_path, serial_path, model_path, keep_cols=['review_id'], chunksize=100, verbose=False)
+        stats = score_csv(input_path, parallel_path, model_path, keep_cols=['review_id'], chunksize=100,
+                          n_jobs=2, verbose=False)
+        
+        serial = pd.read_csv(serial_path)
+        parallel = pd.read_csv(parallel_path)
+        assert stats['rows'] == len(reviews)
+        assert parallel['review_id'].tolist() == list(range(len(reviews)))
+        pd.testing.assert_frame_equal(parallel, serial)
+        np.testing.assert_allclose(serial['fake_probability'], detector.predict(reviews), atol=1e-6)
+
+
+# Catalog and geography
+
+def test_catalog_ranges_and_search():
+    from modules.catalog import CatalogIndex
+    from modules.data_store import DataStore
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        _write_csv(os.path.join(data_dir, 'reviews.csv'), pd.DataFrame({
+            'product_name': ['Red Kettle', 'Red Kettle', 'Blue Mug', 'Blue Mug', 'Blue Mug', 'Red Kettle'],
+            'review_text': ['good', 'bad', 'nice', 'ok', 'fine', 'great'],
+            'rating': [5, 1, 4, 3, 4, 5]
+        }))
+        _write_csv(os.path.join(data_dir, 'lamp.csv'), pd.DataFrame({
+            'review_text': ['bright', 'dim'], 'rating': [5, 2]
+        }))
+        
+        catalog = CatalogIndex(DataStore(data_dir, store_dir=os.path.join(tmp, 'store')),
+                               aliases={'Desk Lamp': 'lamp.csv'})
+        
+        assert catalog.names.tolist() == ['Blue Mug', 'Desk Lamp', 'Red Kettle']
+        assert catalog.locate('Red Kettle') == [('reviews.csv', 0, 2), ('reviews.csv', 5, 6)]
+        assert catalog.locate('Blue Mug') == [('reviews.csv', 2, 5)]
+        assert catalog.locate('Desk Lamp') == [('lamp.csv', 0, 2)]
+        assert catalog.load_product('Red Kettle')['review_text'].tolist() == ['good', 'bad', 'great']
+        
+        assert catalog.search('red') == (['Red Kettle'], 1)
+        assert catalog.search('', offset=1, limit=1) == (['Desk Lamp'], 3)
+        assert catalog.search('mug kettle') == ([], 0)
+        
+        signature = catalog.product_signature('Blue Mug')
+        assert [part[:3] for part in signature] == [('reviews.csv', 2, 5)]
+
+
+def test_pincode_lookup_prefix_fallback():
+    from modules.geo import PincodeIndex, fallback_coordinates
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = _write_csv(os.path.join(tmp, 'pins.csv'), pd.DataFrame({
+            'pincode': ['560001', '560', '56', '11'],
+            'latitude': [12.97, 13.0, 14.0, 28.6],
+            'longitude': [77.59, 77.5, 76.0, 77.2]
+        }))
+        index = PincodeIndex(csv_path, index_dir=tmp)
+        
+        lat, lon = index.lookup(['560001', '560099', '569999', '110001', 'abc'])
+        np.testing.assert_allclose(lat[:4], [12.97, 13.0, 14.0, 28.6])
+        np.testing.assert_allclose(lon[:4], [77.59, 77.5, 76.0, 77.2])
+        assert (lat[4], lon[4]) == fallback_coordinates('abc')
+        # Zone '1' is derived from its circles; the compiled index is reopened from disk
+        assert index.get('199999') == (28.6, 77.2)
+        assert PincodeIndex(csv_path, index_dir=tmp).get(560001) == (12.97, 77.59)
+
+
+# API plumbing
+
+def test_request_coalescer_shares_inflight_calls():
+    from modules.analytics_service import RequestCoalescer
+    
+    release = threading.Event()
+    calls = []
+    
+    def compute(value):
+        calls.append(value)
+        release.wait(5)
+        return {'value': value}
+    
+    async def scenario():
+        coalescer = RequestCoalescer()
+        tasks = [asyncio.ensure_future(coalescer.run(('key',), compute, 1)) for _ in range(3)]
+        other = asyncio.ensure_future(coalescer.run(('other',), compute, 2))
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        await other
+        assert coalescer.stats() == {'inflight': 0, 'started': 2, 'coalesced': 2}
+        # Finished results are not kept
+        await coalescer.run(('key',), compute, 1)
+        return results
+    
+    results = asyncio.run(scenario())
+    assert results[0] is results[1] is results[2]
+    assert sorted(calls) == [1, 1, 2]
+
+
+def _run_all():
+    failures = 0
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            try:
+                func()
+                print(f"✅ {name}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ {name}: {type(e).__name__}: {str(e)}")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if _run_all() else 0)